@@ -0,0 +1,112 @@
+"""Allocation check for the capture/match hot loop.
+
+Runs steady-state cycles of capture_window_screenshot + match_template_image
+against an in-memory frame source and measures, with tracemalloc, the peak
+memory allocated per cycle with the buffer pool disabled and enabled. Fails
+if the pool still allocates new buffers after warm-up or does not cut the
+per-cycle allocations substantially.
+
+Run from the repository root:
+    python benchmark_allocations.py
+"""
+
+import os
+import tempfile
+import tracemalloc
+
+import cv2
+import numpy as np
+
+import src.action_loop as action_loop
+from src.vision.buffer_pool import get_buffer_pool
+from src.vision.frame_source import FrameSource, WindowGeometry
+
+WIDTH, HEIGHT = 1280, 720
+WINDOW = 1
+WARMUP_CYCLES = 5
+CYCLES = 20
+CASES = [
+    # (label, crop_area, threshold, gray)
+    ("color 99%, full window", None, 0.99, False),
+    ("color 99%, crop 400x300", (300, 200, 400, 300), 0.99, False),
+    ("gray 90%, crop 400x300", (300, 200, 400, 300), 0.90, True),
+]
+
+
+class StaticFrameSource(FrameSource):
+    """Serves one preallocated BGRX frame, like a capture that reuses its bitmap"""
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    def is_valid(self, window) -> bool:
+        return True
+
+    def geometry(self, window) -> WindowGeometry:
+        return WindowGeometry(WIDTH, HEIGHT, 0, 0)
+
+    def capture(self, window, rect=None):
+        if rect:
+            return action_loop.crop_frame(self.frame, rect)
+        return self.frame
+
+
+def run_cycle(template_path, crop_area, threshold, gray):
+    screenshot = action_loop.capture_window_screenshot(WINDOW, crop_area, gray=gray)
+    return action_loop.match_template_image(screenshot, template_path, 1, threshold)
+
+
+def measure(template_path, crop_area, threshold, gray):
+    """Return (peak bytes allocated per cycle, pool allocations after warm-up)"""
+    for _ in range(WARMUP_CYCLES):
+        run_cycle(template_path, crop_area, threshold, gray)
+    pool = get_buffer_pool()
+    allocations_before = pool.allocations
+
+    tracemalloc.start()
+    peaks = []
+    for _ in range(CYCLES):
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        run_cycle(template_path, crop_area, threshold, gray)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return int(np.median(peaks)), pool.allocations - allocations_before
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, size=(HEIGHT, WIDTH, 4), dtype=np.uint8)
+    template_path = os.path.join(tempfile.mkdtemp(), "template.png")
+    cv2.imwrite(template_path, np.ascontiguousarray(frame[320:360, 420:500, :3]))
+    action_loop.set_frame_source(StaticFrameSource(frame))
+
+    # Silence the matcher's per-call log lines
+    import builtins
+    print_ = builtins.print
+    builtins.print = lambda *args, **kwargs: None
+
+    rows = []
+    failed = False
+    for label, crop_area, threshold, gray in CASES:
+        get_buffer_pool().enabled = False
+        unpooled, _ = measure(template_path, crop_area, threshold, gray)
+        get_buffer_pool().enabled = True
+        get_buffer_pool().clear()
+        pooled, new_buffers = measure(template_path, crop_area, threshold, gray)
+        rows.append((label, unpooled, pooled, new_buffers))
+        # Left over per cycle: small per-match temporaries (the template comes from the cache)
+        if new_buffers or pooled > unpooled * 0.25:
+            failed = True
+
+    builtins.print = print_
+    print(f"Synthetic {WIDTH}x{HEIGHT} BGRX frame, {CYCLES} cycles per case after {WARMUP_CYCLES} warm-up cycles")
+    print("=" * 76)
+    print(f"{'case':<28}{'KB/cycle unpooled':>18}{'KB/cycle pooled':>17}{'new buffers':>13}")
+    for label, unpooled, pooled, new_buffers in rows:
+        print(f"{label:<28}{unpooled / 1024:>18.1f}{pooled / 1024:>17.1f}{new_buffers:>13}")
+    print("=" * 76)
+    if failed:
+        print("❌ Steady-state cycles still allocate frame-sized buffers")
+        exit(1)
+    print("✅ Steady-state cycles reuse pooled buffers")
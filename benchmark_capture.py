@@ -0,0 +1,100 @@
+"""Micro-benchmark for the screenshot conversion path on synthetic BGRX buffers.
+
+Compares the old PIL -> numpy -> cvtColor conversion with the zero-copy
+view + crop + single conversion used by capture_window_screenshot, and
+prints the bytes copied per frame and the time per frame for each. The
+gray rows compare BGR-then-gray with the direct BGRX -> gray conversion
+used for OCR and grayscale template matching.
+
+Run from the repository root:
+    python benchmark_capture.py
+"""
+
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from src.vision.frames import bgrx_view, crop_frame, to_bgr, to_gray
+
+WIDTH, HEIGHT = 1920, 1080
+CROPS = [
+    ("full window", None),
+    ("crop 640x360", (200, 150, 640, 360)),
+    ("crop 192x64", (10, 26, 192, 64)),
+]
+ITERATIONS = 50
+
+
+def old_path(bits, crop_area):
+    """Conversion as it was done before: three full-frame copies, then crop"""
+    img = Image.frombuffer("RGB", (WIDTH, HEIGHT), bits, "raw", "BGRX", 0, 1)
+    screenshot_np = np.array(img)
+    screenshot_bgr = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
+    if crop_area:
+        screenshot_bgr = crop_frame(screenshot_bgr, crop_area)
+    # PIL keeps RGB images with 4 bytes per pixel internally
+    copied = WIDTH * HEIGHT * 4 + screenshot_np.nbytes + screenshot_np.nbytes
+    return screenshot_bgr, copied
+
+
+def new_path(bits, crop_area):
+    """View the raw bits, crop by slicing, convert only the crop"""
+    frame = bgrx_view(bits, WIDTH, HEIGHT)
+    if crop_area:
+        frame = crop_frame(frame, crop_area)
+    screenshot_bgr = to_bgr(frame)
+    return screenshot_bgr, screenshot_bgr.nbytes
+
+
+def bgr_then_gray_path(bits, crop_area):
+    """Grayscale the way matchers did it: BGR screenshot first, then gray"""
+    screenshot_bgr, copied = new_path(bits, crop_area)
+    gray = cv2.cvtColor(screenshot_bgr, cv2.COLOR_BGR2GRAY)
+    return gray, copied + gray.nbytes
+
+
+def gray_path(bits, crop_area):
+    """Convert the (cropped) BGRX view straight to gray"""
+    frame = bgrx_view(bits, WIDTH, HEIGHT)
+    if crop_area:
+        frame = crop_frame(frame, crop_area)
+    gray = to_gray(frame)
+    return gray, gray.nbytes
+
+
+def run(path, bits, crop_area):
+    result, copied = path(bits, crop_area)
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        path(bits, crop_area)
+    elapsed_ms = (time.perf_counter() - start) * 1000.0 / ITERATIONS
+    return result, copied, elapsed_ms
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    bits = rng.integers(0, 256, size=WIDTH * HEIGHT * 4, dtype=np.uint8).tobytes()
+
+    print(f"Synthetic {WIDTH}x{HEIGHT} BGRX frame, {ITERATIONS} iterations per case")
+    print("=" * 72)
+    print(f"{'case':<16}{'path':<6}{'MB copied/frame':>18}{'ms/frame':>12}")
+    for label, crop_area in CROPS:
+        old_result, old_copied, old_ms = run(old_path, bits, crop_area)
+        new_result, new_copied, new_ms = run(new_path, bits, crop_area)
+        if not np.array_equal(old_result, new_result):
+            print(f"❌ {label}: conversions disagree")
+            exit(1)
+        print(f"{label:<16}{'old':<6}{old_copied / 1e6:>18.2f}{old_ms:>12.2f}")
+        print(f"{'':<16}{'new':<6}{new_copied / 1e6:>18.2f}{new_ms:>12.2f}")
+
+        bgr_gray_result, bgr_gray_copied, bgr_gray_ms = run(bgr_then_gray_path, bits, crop_area)
+        gray_result, gray_copied, gray_ms = run(gray_path, bits, crop_area)
+        if not np.array_equal(bgr_gray_result, gray_result):
+            print(f"❌ {label}: grayscale conversions disagree")
+            exit(1)
+        print(f"{'':<16}{'bgr>g':<6}{bgr_gray_copied / 1e6:>18.2f}{bgr_gray_ms:>12.2f}")
+        print(f"{'':<16}{'gray':<6}{gray_copied / 1e6:>18.2f}{gray_ms:>12.2f}")
+    print("=" * 72)
+    print("✅ Old and new paths produce identical BGR and grayscale frames")
@@ -0,0 +1,98 @@
+"""Benchmark of the single-channel prefilter for color template matching.
+
+Searches the synthetic window from benchmark_matching.py for templates cut
+out of it with the color strategy (>= 0.99), once correlating all three
+channels everywhere and once with the prefilter (one channel first, every
+channel scored only where it passes). The prefiltered search is timed
+splitting the screenshot itself, and with planes split beforehand as the
+action loop shares them between a cycle's matchers. Each template is
+searched in the window it was cut from ("present") and in a different
+synthetic window ("absent"). A grayscale match of the same template is
+timed for comparison, including the conversion of the screenshot to gray.
+Fails if the prefiltered search ever returns a match the three-channel
+search did not, or a confidence more than MAX_CONFIDENCE_DIFF off.
+Candidates are scored in float64, while OpenCV's float32 map can be 3e-4
+short of 1.0 on exact copies whose template has a low-contrast channel.
+Two overlapping positions that score the same within that error may also
+resolve the other way.
+
+Run from the repository root:
+    python benchmark_color_matching.py
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from benchmark_matching import HEIGHT, WIDTH, synthetic_window, template_positions
+from src.vision.frames import to_gray
+from src.vision.template_matcher import TemplateMatcher
+
+TEMPLATE_SIZES = [(24, 24), (48, 32), (96, 64), (160, 100)]
+THRESHOLD = 0.99
+TRIALS = 10
+MAX_CONFIDENCE_DIFF = 1e-3
+
+
+def timed_search(matcher, screenshot, gray=False, planes=None):
+    start = time.perf_counter()
+    if gray:
+        screenshot = to_gray(screenshot)
+    matches = matcher.find_matches(screenshot, limit=1, planes=planes)
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    return (matches[0] if matches else None), elapsed_ms
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    frame = cv2.cvtColor(synthetic_window(rng), cv2.COLOR_BGRA2BGR)
+    other_frame = cv2.cvtColor(synthetic_window(rng), cv2.COLOR_BGRA2BGR)
+
+    print(f"Synthetic {WIDTH}x{HEIGHT} windows, {TRIALS} templates per case")
+    print("=" * 98)
+    print(f"{'template':<10}{'window':>9}{'3 channels ms':>15}{'prefilter ms':>14}{'shared planes ms':>18}"
+          f"{'gray ms':>9}{'found':>8}{'max Δconf':>11}")
+    failed = False
+    for width, height in TEMPLATE_SIZES:
+        positions = template_positions(frame, width, height, rng, TRIALS)
+        for window, screenshot in (("present", frame), ("absent", other_frame)):
+            planes = list(cv2.split(screenshot))
+            times = {"full": [], "prefilter": [], "shared": [], "gray": []}
+            found = 0
+            max_diff = 0.0
+            for x, y in positions:
+                template = np.ascontiguousarray(frame[y:y+height, x:x+width])
+                matchers = {
+                    "full": TemplateMatcher(template, THRESHOLD, prefilter=False),
+                    "prefilter": TemplateMatcher(template, THRESHOLD),
+                    "shared": TemplateMatcher(template, THRESHOLD),
+                    "gray": TemplateMatcher(template, 0.9),
+                }
+                results = {}
+                for label, matcher in matchers.items():
+                    options = {"gray": label == "gray", "planes": planes if label == "shared" else None}
+                    timed_search(matcher, screenshot, **options)  # Warm up the buffer pool
+                    results[label], elapsed_ms = timed_search(matcher, screenshot, **options)
+                    times[label].append(elapsed_ms)
+                full = results["full"]
+                for prefiltered in (results["prefilter"], results["shared"]):
+                    if (full is None) != (prefiltered is None):
+                        failed = True
+                    elif full is not None and (
+                            abs(float(full[2]) - float(prefiltered[2])) > MAX_CONFIDENCE_DIFF or (
+                                full[:2] != prefiltered[:2] and (
+                                    abs(full[0] - prefiltered[0]) >= matchers["full"].overlap_x or
+                                    abs(full[1] - prefiltered[1]) >= matchers["full"].overlap_y))):
+                        failed = True
+                    elif full is not None:
+                        max_diff = max(max_diff, abs(float(full[2]) - float(prefiltered[2])))
+                found += full is not None and full[:2] == (x, y)
+            print(f"{f'{width}x{height}':<10}{window:>9}{np.median(times['full']):>15.2f}"
+                  f"{np.median(times['prefilter']):>14.2f}{np.median(times['shared']):>18.2f}"
+                  f"{np.median(times['gray']):>9.2f}{found:>5}/{TRIALS:<2}{max_diff:>11.1e}")
+    print("=" * 98)
+    if failed:
+        print("❌ Prefiltered search disagreed with the three-channel search")
+        exit(1)
+    print("✅ Prefiltered search found the same matches as the three-channel search")
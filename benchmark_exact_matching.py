@@ -0,0 +1,102 @@
+"""Benchmark of the exact (>= 0.999) matching path against the previous correlation-based one.
+
+Previously exact matching correlated all three channels, took every position
+scoring at least threshold - 0.01 as a candidate and checked each one
+pixel by pixel in a Python loop. The exact path in TemplateMatcher compares
+anchor pixels first and checks only the positions they accept, without any
+correlation. Templates are cut out of the synthetic window from
+benchmark_matching.py and pasted back a few times: unchanged, with up to
++-5 noise on a few pixels (still a match) and with one pixel off by more
+than the tolerance (no match). Fails if both paths ever return different matches.
+
+Run from the repository root:
+    python benchmark_exact_matching.py
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from benchmark_matching import HEIGHT, WIDTH, synthetic_window, template_positions
+from src.vision.template_matcher import EXACT_MAX_PIXEL_DIFF, TemplateMatcher
+
+TEMPLATE_SIZES = [(24, 24), (48, 32), (96, 64), (160, 100)]
+THRESHOLD = 0.999
+TRIALS = 10
+
+
+def reference_matches(screenshot, template, threshold):
+    """Every match as the previous exact strategy found them, best first, overlaps suppressed"""
+    height, width = template.shape[:2]
+    result = None
+    for channel in range(3):
+        channel_result = cv2.matchTemplate(np.ascontiguousarray(screenshot[:, :, channel]),
+                                           np.ascontiguousarray(template[:, :, channel]), cv2.TM_CCOEFF_NORMED)
+        result = channel_result if result is None else np.minimum(result, channel_result)
+    candidates = []
+    for x, y in zip(*np.where(result >= threshold - 0.01)[::-1]):
+        diff = np.abs(screenshot[y:y+height, x:x+width].astype(np.int16) - template.astype(np.int16))
+        similarity = 1.0 - np.mean(np.mean(diff, axis=(0, 1))) / 255.0
+        if similarity >= threshold and np.max(diff) <= EXACT_MAX_PIXEL_DIFF:
+            candidates.append((x, y, similarity))
+    candidates.sort(key=lambda match: match[2], reverse=True)
+    overlap_x, overlap_y = max(width // 2, 10), max(height // 2, 10)
+    matches = []
+    for x, y, similarity in candidates:
+        if all(abs(x - kept_x) >= overlap_x or abs(y - kept_y) >= overlap_y for kept_x, kept_y, _ in matches):
+            matches.append((x, y, similarity))
+    return matches
+
+
+def paste_copies(frame, template, rng):
+    """Paste an exact copy, a copy with a little noise and a copy with one pixel out of tolerance"""
+    height, width = template.shape[:2]
+    frame = frame.copy()
+    noise = rng.integers(-5, 6, template.shape) * (rng.random(template.shape[:2]) < 0.05)[:, :, None]
+    noisy = np.clip(template.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+    broken = template.copy()
+    broken[height // 2, width // 2] = (broken[height // 2, width // 2].astype(np.int16) + 128) % 256
+    for copy in (template, noisy, broken):
+        x, y = int(rng.integers(0, WIDTH - width)), int(rng.integers(0, HEIGHT - height))
+        frame[y:y+height, x:x+width] = copy
+    return frame
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    value = function(*args)
+    return value, (time.perf_counter() - start) * 1000.0
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    window = cv2.cvtColor(synthetic_window(rng), cv2.COLOR_BGRA2BGR)
+
+    print(f"Synthetic {WIDTH}x{HEIGHT} window, {TRIALS} templates per size, threshold {THRESHOLD}")
+    print("=" * 64)
+    print(f"{'template':<10}{'matches':>9}{'correlation ms':>16}{'exact ms':>11}{'speedup':>10}")
+    failed = False
+    for width, height in TEMPLATE_SIZES:
+        times = {"reference": [], "exact": []}
+        found = 0
+        for x, y in template_positions(window, width, height, rng, TRIALS):
+            template = np.ascontiguousarray(window[y:y+height, x:x+width])
+            frame = paste_copies(window, template, rng)
+            matcher = TemplateMatcher(template, THRESHOLD)
+            matcher.find_matches(frame)  # Warm up the buffer pool
+            expected, reference_ms = timed(reference_matches, frame, template, THRESHOLD)
+            matches, exact_ms = timed(matcher.find_matches, frame)
+            times["reference"].append(reference_ms)
+            times["exact"].append(exact_ms)
+            found += len(matches)
+            if [(int(mx), int(my), float(s)) for mx, my, s in matches] != \
+                    [(int(mx), int(my), float(s)) for mx, my, s in expected]:
+                failed = True
+        reference_ms, exact_ms = np.median(times["reference"]), np.median(times["exact"])
+        print(f"{f'{width}x{height}':<10}{found:>9}{reference_ms:>16.2f}{exact_ms:>11.2f}{reference_ms / exact_ms:>9.0f}x")
+    print("=" * 64)
+    if failed:
+        print("❌ Exact path results differ from the correlation-based search")
+        exit(1)
+    print("✅ Exact path returns the same matches as the correlation-based search")
@@ -0,0 +1,168 @@
+"""Benchmark of coarse-to-fine (pyramid) template matching against the exhaustive search.
+
+Builds a synthetic UI-like 1920x1080 window (gradients, panels, text) and a
+noise-like one (per-pixel random colors, the fine detail a pyramid level
+averages away), cuts templates of several sizes out of them at random
+positions and searches the whole window for them with and without pyramid
+mode. Prints the time per search, the recall (template found at the position
+it was cut from) and the largest confidence difference between both
+searches. A second table times templates cut from another window of the
+same kind, which are mostly absent (on the UI-like window, gradients can
+still match at low thresholds): a pyramid search that finds nothing runs the
+exhaustive search as well unless its coarse pass ruled the template out.
+Fails if the pyramid search ever disagrees with the exhaustive one.
+
+Run from the repository root:
+    python benchmark_matching.py
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from src.vision.template_matcher import PYRAMID_ABSENT_MARGIN, TemplateMatcher
+
+WIDTH, HEIGHT = 1920, 1080
+TEMPLATE_SIZES = [(24, 24), (48, 32), (96, 64), (160, 100)]
+THRESHOLDS = [0.8, 0.99]
+TRIALS = 10
+
+
+def synthetic_window(rng):
+    """Gradient background with panels, buttons and text, plus a little sensor-like noise"""
+    y, x = np.mgrid[0:HEIGHT, 0:WIDTH]
+    frame = np.dstack([(x * 255 // WIDTH), (y * 255 // HEIGHT), ((x + y) * 255 // (WIDTH + HEIGHT))]).astype(np.uint8)
+    for _ in range(120):
+        x0, y0 = int(rng.integers(0, WIDTH - 40)), int(rng.integers(0, HEIGHT - 20))
+        x1, y1 = x0 + int(rng.integers(20, 300)), y0 + int(rng.integers(10, 120))
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        cv2.rectangle(frame, (x0, y0), (x1, y1), color, -1 if rng.random() < 0.6 else 2)
+    for _ in range(200):
+        origin = (int(rng.integers(0, WIDTH - 100)), int(rng.integers(15, HEIGHT)))
+        text = "".join(chr(c) for c in rng.integers(65, 91, int(rng.integers(3, 10))))
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        cv2.putText(frame, text, origin, cv2.FONT_HERSHEY_SIMPLEX, float(rng.uniform(0.4, 1.2)), color, 1, cv2.LINE_AA)
+    noise = rng.integers(-2, 3, frame.shape)
+    frame = np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+
+
+def noise_window(rng):
+    """Random color per pixel: no smooth area anywhere"""
+    frame = rng.integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+
+
+def template_positions(frame, width, height, rng, count):
+    """Random positions whose crop has enough detail to be a sensible template"""
+    positions = []
+    while len(positions) < count:
+        x, y = int(rng.integers(0, WIDTH - width)), int(rng.integers(0, HEIGHT - height))
+        # Spatial detail (gray std); a flat color with sensor noise is no UI element
+        if cv2.cvtColor(frame[y:y+height, x:x+width], cv2.COLOR_BGRA2GRAY).std() > 25:
+            positions.append((x, y))
+    return positions
+
+
+def timed_search(matcher, screenshot):
+    start = time.perf_counter()
+    matches = matcher.find_matches(screenshot, limit=1)
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    return (matches[0] if matches else None), elapsed_ms
+
+
+def compare_searches(name, frame, rng):
+    """Print one table for a window; returns False if the pyramid search ever disagreed"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY)
+    print(f"Synthetic {name} {WIDTH}x{HEIGHT} window, {TRIALS} templates per case")
+    print("=" * 92)
+    print(f"{'template':<10}{'threshold':>10}{'pyramid':>9}{'exhaustive ms':>15}{'pyramid ms':>12}"
+          f"{'recall exh.':>13}{'recall pyr.':>13}{'max Δconf':>10}")
+    agreed = True
+    for width, height in TEMPLATE_SIZES:
+        positions = template_positions(frame, width, height, rng, TRIALS)
+        for threshold in THRESHOLDS:
+            # Gray matching runs on gray screenshots, as the action loop captures them
+            screenshot = gray if threshold < 0.99 else frame
+            times = {False: [], True: []}
+            found = {False: 0, True: 0}
+            max_diff = 0.0
+            factor = 0
+            for x, y in positions:
+                template = np.ascontiguousarray(frame[y:y+height, x:x+width, :3])
+                results = {}
+                for pyramid in (False, True):
+                    matcher = TemplateMatcher(template, threshold, pyramid=pyramid)
+                    factor = max(factor, matcher.pyramid_factor)
+                    timed_search(matcher, screenshot)  # Warm up the buffer pool
+                    match, elapsed_ms = timed_search(matcher, screenshot)
+                    times[pyramid].append(elapsed_ms)
+                    results[pyramid] = match
+                    if match is not None and match[:2] == (x, y):
+                        found[pyramid] += 1
+                exhaustive, pyramid_match = results[False], results[True]
+                if (exhaustive is None) != (pyramid_match is None) or (
+                        exhaustive is not None and exhaustive[:2] != pyramid_match[:2]):
+                    agreed = False
+                elif exhaustive is not None:
+                    max_diff = max(max_diff, abs(float(exhaustive[2]) - float(pyramid_match[2])))
+            print(f"{f'{width}x{height}':<10}{threshold:>10.2f}{(f'1/{factor}' if factor else 'off'):>9}"
+                  f"{np.median(times[False]):>15.2f}{np.median(times[True]):>12.2f}"
+                  f"{found[False] / TRIALS:>13.0%}{found[True] / TRIALS:>13.0%}{max_diff:>10.1e}")
+    print("=" * 92)
+    return agreed
+
+
+def compare_absent(name, frame, other, rng):
+    """Print search times for templates cut from another window; returns False if the searches disagreed"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY)
+    print(f"Templates from another {name} window, {TRIALS} templates per case")
+    print("=" * 66)
+    print(f"{'template':<10}{'threshold':>10}{'exhaustive ms':>15}{'pyramid ms':>12}{'fallbacks':>11}{'found':>8}")
+    agreed = True
+    for width, height in TEMPLATE_SIZES:
+        positions = template_positions(other, width, height, rng, TRIALS)
+        for threshold in THRESHOLDS:
+            screenshot = gray if threshold < 0.99 else frame
+            times = {False: [], True: []}
+            found = 0
+            fallbacks = 0
+            for x, y in positions:
+                template = np.ascontiguousarray(other[y:y+height, x:x+width, :3])
+                results = {}
+                for pyramid in (False, True):
+                    matcher = TemplateMatcher(template, threshold, pyramid=pyramid)
+                    timed_search(matcher, screenshot)
+                    match, elapsed_ms = timed_search(matcher, screenshot)
+                    times[pyramid].append(elapsed_ms)
+                    results[pyramid] = match
+                    if pyramid and matcher.pyramid_factor:
+                        # The exhaustive search ran too unless the coarse pass ruled the template out
+                        _, coarse_best = matcher._pyramid_result(screenshot)
+                        if match is None and (coarse_best is None or coarse_best >= threshold - PYRAMID_ABSENT_MARGIN):
+                            fallbacks += 1
+                if results[False] is not None:
+                    found += 1
+                if (results[False] is None) != (results[True] is None) or (
+                        results[False] is not None and results[False][:2] != results[True][:2]):
+                    agreed = False
+            print(f"{f'{width}x{height}':<10}{threshold:>10.2f}{np.median(times[False]):>15.2f}"
+                  f"{np.median(times[True]):>12.2f}{fallbacks:>11}{found:>8}")
+    print("=" * 66)
+    return agreed
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    failed = False
+    for name, make_window in (("UI-like", synthetic_window), ("noise", noise_window)):
+        frame = make_window(rng)
+        if not compare_searches(name, frame, rng):
+            failed = True
+        if not compare_absent(name, frame, make_window(rng), rng):
+            failed = True
+    if failed:
+        print("❌ Pyramid search disagreed with the exhaustive search")
+        exit(1)
+    print("✅ Pyramid search found the same matches as the exhaustive search")
@@ -0,0 +1,99 @@
+"""Benchmark of peak extraction on dense template-matching result maps.
+
+Low thresholds (profiles use 68%) let tens of thousands of positions pass.
+This compares the previous Python ranking + greedy suppression loop with
+the NumPy peak finder and the iterative minMaxLoc search in src.vision.peaks
+on synthetic frames where many positions match: smooth blotches and a tiled
+pattern. Fails if they ever return different matches.
+
+Run from the repository root:
+    python benchmark_peaks.py
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from src.vision.peaks import find_peaks, find_peaks_iterative
+
+WIDTH, HEIGHT = 1280, 720
+TEMPLATE_SIZE = 40
+THRESHOLDS = [0.68, 0.8]
+LIMITS = [1, 2, 5, 50, None]
+
+
+def reference_peaks(result, threshold, overlap_x, overlap_y, limit=None):
+    """The ranking and suppression as match_template_image used to do it"""
+    locations = np.where(result >= threshold)
+    matches = []
+    for pt in zip(*locations[::-1]):
+        matches.append((pt[0], pt[1], result[pt[1], pt[0]]))
+    matches.sort(key=lambda x: x[2], reverse=True)
+    filtered = []
+    for x, y, conf in matches:
+        overlap = False
+        for existing_x, existing_y, _ in filtered:
+            if abs(x - existing_x) < overlap_x and abs(y - existing_y) < overlap_y:
+                overlap = True
+                break
+        if not overlap:
+            filtered.append((x, y, conf))
+            if limit is not None and len(filtered) >= limit:
+                break
+    return filtered
+
+
+def dense_frames(rng):
+    """Gray frames where a large share of positions correlate with the template"""
+    blotches = cv2.GaussianBlur(rng.random((HEIGHT, WIDTH)).astype(np.float32), (0, 0), 12)
+    blotches = cv2.normalize(blotches, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+    tile = rng.integers(0, 256, (24, 24), dtype=np.uint8)
+    tiled = np.tile(tile, (HEIGHT // 24 + 1, WIDTH // 24 + 1))[:HEIGHT, :WIDTH]
+    tiled = np.clip(tiled.astype(np.int16) + rng.integers(-20, 21, tiled.shape), 0, 255).astype(np.uint8)
+    return [("blotches", blotches), ("tiled", tiled)]
+
+
+def as_tuples(peaks):
+    return [(int(x), int(y), float(value)) for x, y, value in peaks]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    value = function(*args)
+    return value, (time.perf_counter() - start) * 1000.0
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    overlap = max(TEMPLATE_SIZE // 2, 10)
+
+    print(f"Synthetic {WIDTH}x{HEIGHT} gray frames, {TEMPLATE_SIZE}x{TEMPLATE_SIZE} template")
+    print("=" * 88)
+    print(f"{'frame':<10}{'threshold':>10}{'candidates':>12}{'limit':>7}{'matches':>9}"
+          f"{'python ms':>12}{'numpy ms':>11}{'minMaxLoc ms':>15}")
+    failed = False
+    for label, frame in dense_frames(rng):
+        template = np.ascontiguousarray(frame[300:300 + TEMPLATE_SIZE, 500:500 + TEMPLATE_SIZE])
+        result = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+        for threshold in THRESHOLDS:
+            candidates = int(np.count_nonzero(result >= threshold))
+            for limit in LIMITS:
+                expected, python_ms = timed(reference_peaks, result, threshold, overlap, overlap, limit)
+                peaks, numpy_ms = timed(find_peaks, result, threshold, overlap, overlap, limit)
+                if as_tuples(peaks) != as_tuples(expected):
+                    failed = True
+                iterative_column = f"{'-':>15}"
+                if limit is not None:
+                    # The iterative search overwrites the map it suppresses in
+                    iterative, iterative_ms = timed(find_peaks_iterative, result.copy(), threshold, overlap, overlap, limit)
+                    if as_tuples(iterative) != as_tuples(expected):
+                        failed = True
+                    iterative_column = f"{iterative_ms:>15.2f}"
+                print(f"{label:<10}{threshold:>10.2f}{candidates:>12}{str(limit):>7}{len(peaks):>9}"
+                      f"{python_ms:>12.1f}{numpy_ms:>11.2f}{iterative_column}")
+    print("=" * 88)
+    if failed:
+        print("❌ Peak finder results differ from the Python loop")
+        exit(1)
+    print("✅ Peak finders return the same matches as the Python loop")
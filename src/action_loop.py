@@ -3,19 +3,76 @@ import time
 import os
 import glob
 from datetime import datetime
-import win32con
-import win32gui
-import win32api
-import win32ui
 import keyboard
 import cv2
 import numpy as np
 from PIL import Image
-import ctypes
-from ctypes import wintypes
+
+# Input is sent with window messages, which only exist on Windows. Capture goes
+# through the frame source, so the matchers also run on other platforms.
+try:
+    import win32con
+    import win32gui
+    import win32api
+except ImportError:
+    win32con = win32gui = win32api = None
+
+from src.vision.frames import crop_frame, downscale, split_planes, to_bgr, to_gray
+from src.vision.frame_cache import FrameCache
+from src.vision.capture_plan import action_crop_area, plan_cycle_capture
+from src.vision.frame_source import get_frame_source, set_frame_source
+from src.vision.change_detection import ChangeDetector, region_signature
+from src.vision.capture_thread import CaptureThread
+from src.vision.shm_ring import FrameRing
+from src.vision.latency import get_latency_recorder, record_latency
+from src.vision.buffer_pool import get_buffer_pool
+from src.vision.session_recorder import SessionRecorder
+from src.vision.template_cache import get_template_cache, template_signature
+from src.vision.template_matcher import STRATEGY_COLOR, get_template_matcher, select_strategy
+from src.vision.location_tracker import LocationTracker
 
 running_flags = {}
 threads = {}
+frame_caches = {}  # hwnd -> FrameCache for the cycle currently running on that window
+change_detector = ChangeDetector()  # Last region signature/result per (hwnd, matcher action)
+capture_threads = {}  # hwnd -> CaptureThread when background capture is enabled
+frame_rings = {}  # hwnd -> FrameRing the capture thread publishes to (CAPTURE_SHARED_RING_SLOTS)
+session_recorder = None  # SessionRecorder while a session is being recorded
+_recording_plan_notices = set()  # hwnds told that recording replaced their region capture plan
+location_tracker = LocationTracker()  # Last match location per (hwnd, image matcher action)
+
+# Max age of a cached frame within a cycle (None = until the next input action)
+FRAME_CACHE_MAX_AGE_MS = None
+
+# Capture the full window instead of the union of the matchers' crops once the
+# union covers at least this fraction of the client area
+CAPTURE_PLAN_FULL_WINDOW_RATIO = 0.6
+
+# Search full-window image matchers coarse-to-fine (an action's "pyramid" key overrides this).
+# Off by default: the coarse pass can miss matches on fine detail it averages away, and
+# when it finds fewer matches than asked for the exhaustive search runs as well, so
+# a template that is absent but resembles something on screen costs more than without
+IMAGE_MATCH_PYRAMID = False
+
+# Pixels around an image matcher's last match searched before its whole region
+# (an action's "track_margin" overrides this, "track_location": false disables it)
+TRACK_MARGIN_PIXELS = 16
+# A match near the last location is only taken if it scores at least the last confidence minus
+# this (local and full-window correlation differ by float rounding); otherwise the whole region is searched
+TRACK_CONFIDENCE_TOLERANCE = 0.001
+
+# Background capture rate per window (None = capture synchronously in the action thread)
+CAPTURE_FPS = None
+
+# Also publish every background-captured frame to a shared-memory FrameRing with this many
+# slots, for matcher/OCR processes to attach to by get_frame_ring_name(hwnd) (None = off)
+CAPTURE_SHARED_RING_SLOTS = None
+
+# How often each window logs its capture latency summary (None = never)
+LATENCY_LOG_INTERVAL_SECONDS = 60
+
+# Window id used when running actions against a replay instead of a live window
+REPLAY_WINDOW = -1
 
 # Try to configure Tesseract path early (optional, won't break if pytesseract not installed)
 try:
@@ -58,9 +115,12 @@ def save_image_matcher_screenshot(screenshot):
         filename = f"image_matcher_{timestamp}.png"
         filepath = os.path.join(logs_dir, filename)
         
-        # Convert BGR to RGB for saving (OpenCV uses BGR, PIL uses RGB)
-        screenshot_rgb = cv2.cvtColor(screenshot, cv2.COLOR_BGR2RGB)
-        img = Image.fromarray(screenshot_rgb)
+        # Convert BGR to RGB for saving (OpenCV uses BGR, PIL uses RGB); grayscale is saved as is
+        if screenshot.ndim == 2:
+            img = Image.fromarray(screenshot)
+        else:
+            screenshot_rgb = cv2.cvtColor(to_bgr(screenshot), cv2.COLOR_BGR2RGB)
+            img = Image.fromarray(screenshot_rgb)
         img.save(filepath, "PNG", optimize=False, compress_level=1)  # Faster saving
         
         # Quick cleanup: only check if we need to delete (optimize file operations)
@@ -95,9 +155,12 @@ def save_ocr_matcher_screenshot(screenshot):
         filename = f"ocr_image_{timestamp}.png"
         filepath = os.path.join(logs_dir, filename)
         
-        # Convert BGR to RGB for saving (OpenCV uses BGR, PIL uses RGB)
-        screenshot_rgb = cv2.cvtColor(screenshot, cv2.COLOR_BGR2RGB)
-        img = Image.fromarray(screenshot_rgb)
+        # Convert BGR to RGB for saving (OpenCV uses BGR, PIL uses RGB); grayscale is saved as is
+        if screenshot.ndim == 2:
+            img = Image.fromarray(screenshot)
+        else:
+            screenshot_rgb = cv2.cvtColor(to_bgr(screenshot), cv2.COLOR_BGR2RGB)
+            img = Image.fromarray(screenshot_rgb)
         img.save(filepath, "PNG", optimize=False, compress_level=1)  # Faster saving
         
         # Quick cleanup: only check if we need to delete (optimize file operations)
@@ -137,305 +200,298 @@ def read_file_last_line(file_path):
         return ""
 
 
-def capture_window_screenshot(hwnd, crop_area=None):
+def capture_window_screenshot(hwnd, crop_area=None, region_only=True, max_age_ms=None, gray=False,
+                              scale=1, scale_method="area", split=False):
     """Capture a screenshot of the specified window using PrintWindow (works even when minimized)
     
+    When the window has a background capture thread, the latest buffered frame is
+    used. Otherwise, when the window has a frame cache for the current cycle, the
+    planned region (or full window) is captured once and every matcher whose crop
+    lies inside it crops from that frame.
+    
     Args:
         hwnd: Window handle
         crop_area: Optional tuple (x, y, width, height) to crop the screenshot. 
                    Coordinates are relative to the window client area.
+        region_only: When cropping, blit only the crop rectangle if the window is visible,
+                     falling back to a full PrintWindow render otherwise
+        max_age_ms: Oldest acceptable background frame; older frames trigger a synchronous capture
+        gray: Return a single-channel grayscale screenshot, converted straight from the
+              BGRX capture (for OCR and grayscale template matching)
+        scale: Downscale the (cropped) screenshot by this factor (1, 2, 4 or 8)
+        scale_method: "area" (block average) or "stride" (sampling), see frames.downscale
+        split: Also return the screenshot's B, G, R planes for color matching. They are
+               views into planes of the cycle's frame, split once and shared by the cycle's
+               matchers; None when the screenshot did not come from the frame cache (or
+               is gray or downscaled) and the matcher splits it itself
     
     Returns:
-        Screenshot as numpy array (BGR format), or None on failure
+        Screenshot as numpy array (BGR format, or grayscale if gray is set), or None on failure.
+        The array comes from the thread's buffer pool and is reused by the next capture of the
+        same size on this thread. With split, a tuple (screenshot, planes).
     """
-    hwndDC = None
-    mfcDC = None
-    saveDC = None
-    bitmap = None
+    started = time.perf_counter()
+    planes = None
+    capture_thread = capture_threads.get(hwnd)
+    if capture_thread is not None and capture_thread.running:
+        screenshot, frame_info = capture_thread.read(crop_area, max_age_ms, gray=gray)
+        if screenshot is not None:
+            screenshot = downscale(screenshot, scale, scale_method)
+            record_latency(hwnd, "total", time.perf_counter() - started)
+            return (screenshot, planes) if split else screenshot
+        # No fresh enough frame in time, capture synchronously instead
     
-    try:
-        # Verify window handle is still valid (fast check, no logging)
-        if not win32gui.IsWindow(hwnd):
+    frame_cache = frame_caches.get(hwnd)
+    if frame_cache is not None and not frame_cache.covers(crop_area):
+        # Outside the planned capture (e.g. a nested matcher), capture on its own
+        frame_cache = None
+    if frame_cache is None:
+        frame = capture_window_frame(hwnd, crop_area, region_only)
+    else:
+        frame = frame_cache.get()
+        if frame is None:
+            frame = capture_window_frame(hwnd, frame_cache.region)
+            if frame is not None:
+                frame_cache.put(frame)
+        if frame is not None and gray:
+            # Convert the shared frame once, the other grayscale matchers of the cycle reuse it
+            gray_frame = frame_cache.get_gray()
+            if gray_frame is None:
+                gray_frame = to_gray(frame)
+                frame_cache.put_gray(gray_frame)
+            frame = gray_frame
+        elif frame is not None and split and scale == 1:
+            # Split the shared frame once, the other color matchers of the cycle reuse the planes
+            planes = frame_cache.get_planes()
+            if planes is None:
+                pool = get_buffer_pool()
+                planes = split_planes(frame, [pool.get(f"cycle_plane_{channel}", frame.shape[:2]) for channel in range(3)])
+                frame_cache.put_planes(planes)
+        if frame is not None and crop_area:
+            cropped_at = time.perf_counter()
+            frame_crop_area = frame_cache.frame_crop_area(crop_area)
+            frame = crop_frame(frame, frame_crop_area)
+            if planes is not None:
+                planes = [crop_frame(plane, frame_crop_area) for plane in planes]
+            record_latency(hwnd, "crop", time.perf_counter() - cropped_at)
+    
+    if frame is None:
+        return (None, None) if split else None
+    _check_frame_size(hwnd, frame, crop_area)
+    pool = get_buffer_pool()
+    if scale > 1:
+        # Shrink before converting, so the conversion only touches the small frame
+        scaled_shape = (frame.shape[0] // scale, frame.shape[1] // scale) + frame.shape[2:]
+        frame = downscale(frame, scale, scale_method, dst=pool.get("screenshot_scaled", scaled_shape))
+        if frame is None:
             return None
-        
-        # Get client rectangle (content area of the window)
-        left, top, right, bottom = win32gui.GetClientRect(hwnd)
-        width = right - left
-        height = bottom - top
-        
-        # If client rect is zero (window is minimized), get the restore size
-        if width == 0 or height == 0:
-            try:
-                # Get window placement to find restore size
-                placement = win32gui.GetWindowPlacement(hwnd)
-                if placement and len(placement) > 2:
-                    # placement[2] is rcNormalPosition (restore rectangle)
-                    restore_rect = placement[2]
-                    if restore_rect:
-                        # restore_rect is (left, top, right, bottom)
-                        width = restore_rect[2] - restore_rect[0]
-                        height = restore_rect[3] - restore_rect[1]
-                        # Adjust for window borders (approximate)
-                        # We'll use the restore size but need to account for borders
-                        # For now, use the restore size directly
-                        if width > 0 and height > 0:
-                            print(f"ℹ️ Window is minimized, using restore size: {width}x{height}")
-                        else:
-                            # Try GetWindowRect as fallback
-                            try:
-                                left, top, right, bottom = win32gui.GetWindowRect(hwnd)
-                                width = right - left
-                                height = bottom - top
-                            except:
-                                pass
-                
-                # If still zero, try GetWindowRect
-                if width == 0 or height == 0:
-                    try:
-                        left, top, right, bottom = win32gui.GetWindowRect(hwnd)
-                        width = right - left
-                        height = bottom - top
-                    except:
-                        pass
-                
-                # If still zero, we can't proceed
-                if width == 0 or height == 0:
-                    print(f"⚠️ Cannot determine window size (minimized or zero size)")
-                    return None
-            except Exception as e:
-                print(f"⚠️ Error getting window size: {e}")
-                return None
-        
-        # Get device context
-        hwndDC = win32gui.GetWindowDC(hwnd)
-        if not hwndDC:
-            return None  # Fast fail, no logging to avoid slowdown
-        
-        mfcDC = win32ui.CreateDCFromHandle(hwndDC)
-        saveDC = mfcDC.CreateCompatibleDC()
-        
-        # Create bitmap
-        bitmap = win32ui.CreateBitmap()
-        bitmap.CreateCompatibleBitmap(mfcDC, width, height)
-        saveDC.SelectObject(bitmap)
-        
-        # PrintWindow with PW_RENDERFULLCONTENT = 2 (Windows 8+)
-        # This works even when the window is minimized
-        # Call PrintWindow through ctypes since it's not directly available in win32gui
-        user32 = ctypes.windll.user32
-        PW_RENDERFULLCONTENT = 2
-        result = user32.PrintWindow(hwnd, saveDC.GetSafeHdc(), PW_RENDERFULLCONTENT)
-        
-        if not result:
-            return None  # Fast fail, no logging to avoid slowdown
-        
-        # Get bitmap data
-        bmpinfo = bitmap.GetInfo()
-        bmpstr = bitmap.GetBitmapBits(True)
-        
-        # Convert to PIL Image
-        img = Image.frombuffer(
-            "RGB",
-            (bmpinfo["bmWidth"], bmpinfo["bmHeight"]),
-            bmpstr,
-            "raw",
-            "BGRX",
-            0,
-            1
+    # The only copy made per screenshot: the (cropped) view converted to BGR or gray,
+    # written into a pooled buffer
+    converted_at = time.perf_counter()
+    height, width = frame.shape[:2]
+    if not gray:
+        screenshot = to_bgr(frame, dst=pool.get("screenshot", (height, width, 3)))
+    elif frame.ndim == 2:
+        # Already converted by the frame cache, copy the crop out of the shared frame
+        screenshot = pool.get("screenshot_gray", (height, width))
+        np.copyto(screenshot, frame)
+    else:
+        screenshot = to_gray(frame, dst=pool.get("screenshot_gray", (height, width)))
+    finished = time.perf_counter()
+    record_latency(hwnd, "convert", finished - converted_at)
+    record_latency(hwnd, "total", finished - started)
+    return (screenshot, planes) if split else screenshot
+
+
+def capture_matcher_screenshot(hwnd, action, crop_area, threshold, scale=1, scale_method="area"):
+    """Capture an image matcher's screenshot: grayscale below 0.99, with the cycle's shared planes for color matching
+    
+    Returns:
+        Tuple (screenshot, planes); planes is None unless the color strategy can use shared ones
+    """
+    max_age_ms = action.get("max_frame_age_ms")
+    if select_strategy(threshold) == STRATEGY_COLOR:
+        return capture_window_screenshot(
+            hwnd, crop_area, max_age_ms=max_age_ms, scale=scale, scale_method=scale_method, split=True
         )
+    screenshot = capture_window_screenshot(
+        hwnd, crop_area, max_age_ms=max_age_ms, gray=threshold < 0.99, scale=scale, scale_method=scale_method
+    )
+    return screenshot, None
+
+
+def _check_frame_size(hwnd, frame, crop_area):
+    """Drop the cached geometry when a capture does not have the size it was computed for"""
+    source = get_frame_source()
+    if crop_area:
+        expected = (crop_area[3], crop_area[2])
+    else:
+        geometry = source.cached_geometry(hwnd)
+        if geometry is None:
+            return
+        expected = (geometry.height, geometry.width)
+    if frame.shape[:2] != expected:
+        source.invalidate_geometry(hwnd)
+
+
+def capture_window_frame(hwnd, crop_area=None, region_only=True):
+    """Capture the window as a BGRX numpy view of the raw bitmap bits (no conversion)
+    
+    Args:
+        hwnd: Window handle
+        crop_area: Optional tuple (x, y, width, height) relative to the window client area
+        region_only: When cropping, let the frame source capture only the crop rectangle
+    
+    Returns:
+        Read-only (height, width, 4) uint8 array, cropped if crop_area is given, or None on failure
+    """
+    try:
+        source = get_frame_source()
+        if region_only:
+            return source.capture(hwnd, crop_area)
         
-        # Convert PIL Image to numpy array for OpenCV
-        screenshot_np = np.array(img)
-        # Convert RGB to BGR for OpenCV
-        screenshot_bgr = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
-        
-        # Crop the screenshot if crop_area is specified
-        if crop_area:
-            crop_x, crop_y, crop_width, crop_height = crop_area
-            # Ensure crop coordinates are within bounds
-            h, w = screenshot_bgr.shape[:2]
-            crop_x = max(0, min(crop_x, w - 1))
-            crop_y = max(0, min(crop_y, h - 1))
-            crop_width = min(crop_width, w - crop_x)
-            crop_height = min(crop_height, h - crop_y)
-            
-            if crop_width > 0 and crop_height > 0:
-                screenshot_bgr = screenshot_bgr[crop_y:crop_y+crop_height, crop_x:crop_x+crop_width]
-        
-        # Explicitly delete intermediate objects to free memory
-        del img
-        del screenshot_np
-        del bmpstr
-        
-        return screenshot_bgr
+        frame = source.capture(hwnd)
+        if frame is not None and crop_area:
+            frame = crop_frame(frame, crop_area)
+        return frame
     except Exception as e:
         print(f"⚠️ Error capturing screenshot: {e}")
         import traceback
         traceback.print_exc()
         return None
-    finally:
-        # Always cleanup resources, even if an exception occurred
-        try:
-            if bitmap:
-                try:
-                    win32gui.DeleteObject(bitmap.GetHandle())
-                except:
-                    pass
-            if saveDC:
-                try:
-                    saveDC.DeleteDC()
-                except:
-                    pass
-            if mfcDC:
-                try:
-                    mfcDC.DeleteDC()
-                except:
-                    pass
-            if hwndDC and hwnd:
-                try:
-                    win32gui.ReleaseDC(hwnd, hwndDC)
-                except:
-                    pass
-        except:
-            pass  # Ignore cleanup errors
 
 
-def match_template_image(screenshot, template_path, match_number=1, threshold=0.99):
+def get_client_crop_area(hwnd, action):
+    """Get an image/OCR matcher's crop area in client coordinates
+    
+    Crop coordinates are stored as screen coordinates and converted using the
+    window's current client position, then clamped to the client area.
+    
+    Returns:
+        Tuple (x, y, width, height), or None to capture the whole window
+    """
+    if action.get("use_full_screen", False):
+        return None
+    if not ("crop_x" in action and "crop_y" in action and "crop_width" in action and "crop_height" in action):
+        return None
+    
+    try:
+        # Same conversion the cycle's capture plan uses, so planned regions line up
+        return action_crop_area(action, get_frame_source().cached_geometry(hwnd))
+    except Exception as e:
+        print(f"⚠️ Error converting crop coordinates: {e}")
+        # Fall back to using coordinates as-is (assume they're already client coordinates)
+        return (
+            action["crop_x"],
+            action["crop_y"],
+            action["crop_width"],
+            action["crop_height"]
+        )
+
+
+def get_match_threshold(action):
+    """Get an image matcher's threshold as 0.0-1.0 (stored as 0-100 or as a fraction)"""
+    threshold = action.get("threshold", 99)
+    if isinstance(threshold, int):
+        threshold = threshold / 100.0  # Convert 0-100 to 0.0-1.0
+    return threshold
+
+
+def evaluate_if_changed(hwnd, action, screenshot, evaluate):
+    """Run a matcher unless its region is unchanged since the action's last evaluation
+    
+    Actions can set "change_tolerance" (mean absolute difference of a small
+    grayscale thumbnail, 0-255) to treat near-identical regions as unchanged,
+    or "change_detection": false to always evaluate. An image matcher is also
+    evaluated again once its template file changes (mtime or size).
+    
+    Args:
+        hwnd: Window handle
+        action: The image/OCR matcher action
+        screenshot: The region the matcher is about to evaluate
+        evaluate: Callable running the matcher, its result is cached
+    
+    Returns:
+        evaluate()'s result, or the previous result if the region has not changed
+    """
+    if not action.get("change_detection", True):
+        return evaluate()
+    
+    tolerance = action.get("change_tolerance", 0)
+    signature = region_signature(screenshot, tolerance)
+    # An edited template file invalidates the cached result like changed pixels do
+    image_path = action.get("image_path")
+    dependency = template_signature(image_path) if image_path else None
+    unchanged, result = change_detector.lookup(hwnd, action, signature, tolerance, dependency)
+    if unchanged:
+        return result
+    
+    result = evaluate()
+    change_detector.store(hwnd, action, signature, result, dependency)
+    return result
+
+
+def match_template_image(screenshot, template_path, match_number=1, threshold=0.99, scale=1, scale_method="area",
+                         pyramid=False, near=None, margin=TRACK_MARGIN_PIXELS):
     """Match a template image in the screenshot and return the nth match location
     
+    Takes the same arguments as find_template_match.
+    
+    Returns:
+        Tuple (x, y) of the match location, or None if not found
+    """
+    match = find_template_match(screenshot, template_path, match_number, threshold, scale, scale_method,
+                                pyramid, near, margin)
+    return match[:2] if match is not None else None
+
+
+def find_template_match(screenshot, template_path, match_number=1, threshold=0.99, scale=1, scale_method="area",
+                        pyramid=False, near=None, margin=TRACK_MARGIN_PIXELS, planes=None):
+    """Match a template image in the screenshot and return the nth match with its confidence
+    
     Args:
-        screenshot: Screenshot image as numpy array (BGR format)
-        template_path: Path to the template image file
+        screenshot: Screenshot image as numpy array (BGR, or BGRA/BGRX straight from capture)
+        template_path: Path to the template image file (decoded once, see TemplateCache)
         match_number: Which match to return (1 = first, 2 = second, etc.)
         threshold: Matching threshold (0.0 to 1.0)
+        scale: Factor the screenshot was downscaled by; the template is downscaled the
+               same way and the location is mapped back to full resolution
+        scale_method: Method the screenshot was downscaled with ("area" or "stride")
+        pyramid: Search coarse-to-fine (for full-window searches, see TemplateMatcher)
+        near: Only search within margin pixels of this (x, y), e.g. the last match location
+        margin: Search radius around near, in full-resolution pixels
+        planes: Optional B, G, R planes of the screenshot for color matching (see capture_window_screenshot)
     
     Returns:
-        Tuple (x, y) of the match location, or None if not found
+        Tuple (x, y, confidence) of the match, or None if not found
     """
-    template = None
     try:
         # Validate screenshot
         if screenshot is None or screenshot.size == 0:
             print(f"⚠️ Invalid screenshot provided")
             return None
         
-        # Load template image
-        template = cv2.imread(template_path, cv2.IMREAD_COLOR)
-        if template is None:
-            print(f"⚠️ Could not load template image: {template_path}")
+        # Compiled once per template/threshold/scale; a missing file was already reported once
+        matcher = get_template_matcher(template_path, threshold, scale, scale_method, pyramid)
+        if matcher is None:
             return None
         
-        # Check if screenshot is smaller than template (can't match)
-        if screenshot.shape[0] < template.shape[0] or screenshot.shape[1] < template.shape[1]:
-            print(f"⚠️ Screenshot ({screenshot.shape[1]}x{screenshot.shape[0]}) is smaller than template ({template.shape[1]}x{template.shape[0]})")
-            return None
-        
-        template_h, template_w = template.shape[:2]
-        
-        # For high thresholds (>= 0.99), use color matching for pixel-perfect matching
-        # For lower thresholds, use grayscale for more flexible matching
-        use_color_matching = threshold >= 0.99
-        
-        if use_color_matching:
-            # Use color matching for strict, pixel-perfect matching
-            # Split into BGR channels and match each channel separately
-            # Then combine results - all channels must match well
-            
-            # Method 1: Multi-channel template matching
-            # Match each color channel separately
-            result_b = cv2.matchTemplate(screenshot[:,:,0], template[:,:,0], cv2.TM_CCOEFF_NORMED)
-            result_g = cv2.matchTemplate(screenshot[:,:,1], template[:,:,1], cv2.TM_CCOEFF_NORMED)
-            result_r = cv2.matchTemplate(screenshot[:,:,2], template[:,:,2], cv2.TM_CCOEFF_NORMED)
-            
-            # Combine results: all channels must exceed threshold
-            # Use minimum of all three channels (all must match well)
-            result_combined = np.minimum(np.minimum(result_b, result_g), result_r)
-            
-            # For very strict matching (100%), also verify pixel-by-pixel
-            if threshold >= 0.999:
-                # Find candidates first
-                candidate_locations = np.where(result_combined >= (threshold - 0.01))  # Slightly lower for candidates
-                candidates = []
-                for pt in zip(*candidate_locations[::-1]):
-                    x, y = pt[0], pt[1]
-                    # Extract the region from screenshot
-                    region = screenshot[y:y+template_h, x:x+template_w]
-                    if region.shape == template.shape:
-                        # Calculate pixel-perfect match percentage
-                        diff = np.abs(region.astype(np.int16) - template.astype(np.int16))
-                        # Calculate mean absolute difference per channel
-                        mean_diff = np.mean(diff, axis=(0, 1))
-                        # Convert to similarity (0-1 scale, where 1 = perfect match)
-                        # For 8-bit images, max difference is 255 per channel
-                        similarity = 1.0 - (np.mean(mean_diff) / 255.0)
-                        
-                        if similarity >= threshold:
-                            # Also check that no single pixel is too different
-                            max_pixel_diff = np.max(diff)
-                            if max_pixel_diff <= 10:  # Allow small differences for anti-aliasing
-                                candidates.append((x, y, similarity))
-                
-                # Sort by similarity
-                candidates.sort(key=lambda x: x[2], reverse=True)
-                matches = candidates
-            else:
-                # For 99% threshold, use combined channel matching
-                locations = np.where(result_combined >= threshold)
-                matches = []
-                for pt in zip(*locations[::-1]):
-                    confidence = result_combined[pt[1], pt[0]]
-                    matches.append((pt[0], pt[1], confidence))
-                matches.sort(key=lambda x: x[2], reverse=True)
+        if near is not None:
+            matches = matcher.find_near(screenshot, near, margin, limit=match_number, planes=planes)
         else:
-            # Use grayscale matching for lower thresholds (more flexible)
-            screenshot_gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
-            template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
-            
-            # Perform template matching
-            result = cv2.matchTemplate(screenshot_gray, template_gray, cv2.TM_CCOEFF_NORMED)
-            
-            # Find all locations where the result exceeds the threshold
-            locations = np.where(result >= threshold)
-            
-            # Get all matches with their confidence scores
-            matches = []
-            for pt in zip(*locations[::-1]):  # Switch x and y coordinates
-                confidence = result[pt[1], pt[0]]
-                matches.append((pt[0], pt[1], confidence))
-            
-            # Sort by confidence (highest first)
-            matches.sort(key=lambda x: x[2], reverse=True)
-        
-        # Remove overlapping matches (non-maximum suppression)
-        filtered_matches = []
-        # Use template size to determine overlap distance (matches within template size are overlapping)
-        overlap_distance_x = max(template_w // 2, 10)  # At least 10 pixels
-        overlap_distance_y = max(template_h // 2, 10)  # At least 10 pixels
-        
-        for match in matches:
-            x, y, conf = match
-            # Check if this match overlaps with any existing match
-            overlap = False
-            for existing_x, existing_y, _ in filtered_matches:
-                # If matches are within the overlap distance, consider them overlapping
-                if abs(x - existing_x) < overlap_distance_x and abs(y - existing_y) < overlap_distance_y:
-                    overlap = True
-                    break
-            if not overlap:
-                # Verify the match is within bounds
-                if (x >= 0 and y >= 0 and 
-                    x + template_w <= screenshot.shape[1] and 
-                    y + template_h <= screenshot.shape[0]):
-                    filtered_matches.append((x, y, conf))
+            matches = matcher.find_matches(screenshot, limit=match_number, planes=planes)
         
         # Return the nth match (1-indexed)
-        if len(filtered_matches) >= match_number:
-            x, y, confidence = filtered_matches[match_number - 1]
-            match_type = "color" if use_color_matching else "grayscale"
-            print(f"🖼️ Image match #{match_number} found at ({x}, {y}) with confidence {confidence:.4f} ({match_type} matching)")
-            return (x, y)
+        if len(matches) >= match_number:
+            x, y, confidence = matches[match_number - 1]
+            where = ", near last location" if near is not None else ""
+            print(f"🖼️ Image match #{match_number} found at ({x}, {y}) with confidence {confidence:.4f} ({matcher.match_type} matching{where})")
+            return (x, y, float(confidence))
+        elif near is not None:
+            # The caller falls back to the full search
+            return None
         else:
-            print(f"🖼️ Image match #{match_number} not found (found {len(filtered_matches)} matches)")
+            print(f"🖼️ Image match #{match_number} not found (found {len(matches)} matches)")
             return None
             
     except Exception as e:
@@ -443,17 +499,54 @@ def match_template_image(screenshot, template_path, match_number=1, threshold=0.
         import traceback
         traceback.print_exc()
         return None
-    finally:
-        # Explicitly release template memory if it was loaded
-        if template is not None:
-            del template
+
+
+def match_image_tracked(hwnd, action, screenshot, template_path, match_number=1, threshold=0.99, scale=1,
+                        scale_method="area", pyramid=False, planes=None):
+    """Match an image matcher's template near its last match location first, then everywhere
+    
+    Only the first match is tracked. The local match is only taken if it scores at
+    least as well as the last one (within TRACK_CONFIDENCE_TOLERANCE), so a tracked
+    element that got worse is looked for everywhere again. A copy elsewhere that
+    starts to score higher while the tracked one stays the same is not noticed until
+    the tracked one changes.
+    
+    Returns:
+        Tuple (x, y) of the match location, or None if not found
+    """
+    tracking = match_number == 1 and action.get("track_location", True)
+    if tracking:
+        last_location, last_confidence = location_tracker.last_match(hwnd, action)
+        if last_location is not None:
+            margin = action.get("track_margin", TRACK_MARGIN_PIXELS)
+            match = find_template_match(
+                screenshot, template_path, 1, threshold, scale, scale_method, near=last_location, margin=margin,
+                planes=planes
+            )
+            hit = match is not None and (
+                last_confidence is None or match[2] >= last_confidence - TRACK_CONFIDENCE_TOLERANCE
+            )
+            location_tracker.record(hwnd, action, hit)
+            if hit:
+                location_tracker.store(hwnd, action, match[:2], match[2])
+                return match[:2]
+    
+    match = find_template_match(screenshot, template_path, match_number, threshold, scale, scale_method, pyramid,
+                                planes=planes)
+    if match is None:
+        if tracking:
+            location_tracker.store(hwnd, action, None)
+        return None
+    if tracking:
+        location_tracker.store(hwnd, action, match[:2], match[2])
+    return match[:2]
 
 
 def match_ocr_text(screenshot, search_text, case_sensitive=False, match_mode="contains"):
     """Perform OCR on screenshot and search for text
     
     Args:
-        screenshot: OpenCV image (BGR format) or PIL Image
+        screenshot: OpenCV image (BGR, BGRA/BGRX or grayscale) or PIL Image
         search_text: Text to search for
         case_sensitive: Whether search should be case sensitive
         match_mode: Matching mode - "contains", "starts_with", or "ends_with"
@@ -543,10 +636,9 @@ def match_ocr_text(screenshot, search_text, case_sensitive=False, match_mode="co
             
             # Preprocess image for better OCR accuracy
             # Convert to grayscale
-            if len(screenshot.shape) == 3:
-                gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = screenshot
+            # Preprocessing images are written into the thread's pooled buffers
+            pool = get_buffer_pool()
+            gray = to_gray(screenshot, dst=pool.get("ocr_gray", (h, w)))
             
             # Check if image is mostly black/empty
             mean_brightness = np.mean(gray)
@@ -556,20 +648,21 @@ def match_ocr_text(screenshot, search_text, case_sensitive=False, match_mode="co
             
             # Increase contrast using CLAHE (Contrast Limited Adaptive Histogram Equalization)
             clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
-            enhanced = clahe.apply(gray)
+            enhanced = clahe.apply(gray, dst=pool.get("ocr_enhanced", (h, w)))
             
             # Apply adaptive thresholding to improve text contrast
             # This helps with text on dark backgrounds
             thresh = cv2.adaptiveThreshold(
-                enhanced, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+                enhanced, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2,
+                dst=pool.get("ocr_thresh", (h, w))
             )
             
             # Convert back to RGB for PIL
-            screenshot_rgb = cv2.cvtColor(enhanced, cv2.COLOR_GRAY2RGB)
+            screenshot_rgb = cv2.cvtColor(enhanced, cv2.COLOR_GRAY2RGB, dst=pool.get("ocr_rgb", (h, w, 3)))
             pil_image = Image.fromarray(screenshot_rgb)
             
             # Also create a thresholded version for OCR
-            thresh_rgb = cv2.cvtColor(thresh, cv2.COLOR_GRAY2RGB)
+            thresh_rgb = cv2.cvtColor(thresh, cv2.COLOR_GRAY2RGB, dst=pool.get("ocr_thresh_rgb", (h, w, 3)))
             pil_image_thresh = Image.fromarray(thresh_rgb)
         else:
             pil_image = screenshot
@@ -692,7 +785,9 @@ def execute_actions(actions, hwnd):
         elif action["type"] == "double_click":
             send_double_click(hwnd, action["x"], action["y"])
         elif action["type"] == "delay":
-            time.sleep(action["ms"] / 1000.0)
+            get_frame_source().sleep(action["ms"] / 1000.0)
+            # Delays wait for the screen to change, don't match against the old frame
+            invalidate_frame_cache(hwnd)
         elif action["type"] == "hotkey":
             send_hotkey(
                 hwnd,
@@ -723,61 +818,32 @@ def execute_actions(actions, hwnd):
             
             if image_path:
                 # Verify window is still valid before capturing
-                if not win32gui.IsWindow(hwnd):
+                if not get_frame_source().is_valid(hwnd):
                     print(f"⚠️ Window handle {hwnd} is no longer valid")
                     return
                 
                 # Get crop area if specified (only if not using full screen)
-                crop_area = None
-                use_full_screen = action.get("use_full_screen", False)
-                if not use_full_screen and "crop_x" in action and "crop_y" in action and "crop_width" in action and "crop_height" in action:
-                    # Crop coordinates are stored as screen coordinates, need to convert to client coordinates
-                    try:
-                        screen_x = action["crop_x"]
-                        screen_y = action["crop_y"]
-                        crop_width = action["crop_width"]
-                        crop_height = action["crop_height"]
-                        
-                        # Convert screen coordinates to client coordinates
-                        # Use ScreenToClient to convert the top-left corner directly
-                        client_top_left = win32gui.ScreenToClient(hwnd, (screen_x, screen_y))
-                        client_x = client_top_left[0]
-                        client_y = client_top_left[1]
-                        
-                        # Get client rect for bounds checking
-                        client_rect = win32gui.GetClientRect(hwnd)
-                        
-                        # Ensure coordinates are within client bounds
-                        client_x = max(0, min(client_x, client_rect[2] - 1))
-                        client_y = max(0, min(client_y, client_rect[3] - 1))
-                        crop_width = min(crop_width, client_rect[2] - client_x)
-                        crop_height = min(crop_height, client_rect[3] - client_y)
-                        
-                        if crop_width > 0 and crop_height > 0:
-                            crop_area = (client_x, client_y, crop_width, crop_height)
-                    except Exception as e:
-                        print(f"⚠️ Error converting crop coordinates: {e}")
-                        # Fall back to using coordinates as-is (assume they're already client coordinates)
-                        crop_area = (
-                            action["crop_x"],
-                            action["crop_y"],
-                            action["crop_width"],
-                            action["crop_height"]
-                        )
+                crop_area = get_client_crop_area(hwnd, action)
                 
-                # Capture screenshot of the window
-                screenshot = capture_window_screenshot(hwnd, crop_area)
+                # Get threshold (0-100, convert to 0.0-1.0)
+                threshold = get_match_threshold(action)
+                # Optional coarse matching on a downscaled screenshot
+                scale = action.get("scale", 1)
+                scale_method = action.get("scale_method", "area")
+                # Full-window searches go coarse-to-fine if enabled (IMAGE_MATCH_PYRAMID or the action)
+                pyramid = action.get("pyramid", IMAGE_MATCH_PYRAMID and crop_area is None)
+                
+                # Capture screenshot of the window (grayscale is enough below 0.99)
+                screenshot, planes = capture_matcher_screenshot(hwnd, action, crop_area, threshold, scale, scale_method)
                 if screenshot is not None:
                     try:
-                        # Save screenshot to logs folder
-                        save_image_matcher_screenshot(screenshot)
+                        def match_image():
+                            # Save screenshot to logs folder
+                            save_image_matcher_screenshot(screenshot)
+                            return match_image_tracked(hwnd, action, screenshot, image_path, match_number, threshold, scale, scale_method, pyramid, planes)
                         
-                        # Get threshold (0-100, convert to 0.0-1.0)
-                        threshold = action.get("threshold", 99)
-                        if isinstance(threshold, int):
-                            threshold = threshold / 100.0  # Convert 0-100 to 0.0-1.0
-                        # Try to match the template
-                        match_location = match_template_image(screenshot, image_path, match_number, threshold)
+                        # Try to match the template (reuses the last result if the region is unchanged)
+                        match_location = evaluate_if_changed(hwnd, action, screenshot, match_image)
                         if match_location is not None:
                             # Image matched - execute true actions
                             execute_actions(true_actions, hwnd)
@@ -802,57 +868,24 @@ def execute_actions(actions, hwnd):
             
             if search_text:
                 # Verify window is still valid before capturing
-                if not win32gui.IsWindow(hwnd):
+                if not get_frame_source().is_valid(hwnd):
                     print(f"⚠️ Window handle {hwnd} is no longer valid")
                     return
                 
                 # Get crop area if specified (only if not using full screen)
-                crop_area = None
-                use_full_screen = action.get("use_full_screen", False)
-                if not use_full_screen and "crop_x" in action and "crop_y" in action and "crop_width" in action and "crop_height" in action:
-                    # Crop coordinates are stored as screen coordinates, need to convert to client coordinates
-                    try:
-                        screen_x = action["crop_x"]
-                        screen_y = action["crop_y"]
-                        crop_width = action["crop_width"]
-                        crop_height = action["crop_height"]
-                        
-                        # Convert screen coordinates to client coordinates
-                        # Use ScreenToClient to convert the top-left corner
-                        client_top_left = win32gui.ScreenToClient(hwnd, (screen_x, screen_y))
-                        client_x = client_top_left[0]
-                        client_y = client_top_left[1]
-                        
-                        # Get client rect for bounds checking
-                        client_rect = win32gui.GetClientRect(hwnd)
-                        
-                        # Ensure coordinates are within client bounds
-                        client_x = max(0, min(client_x, client_rect[2] - 1))
-                        client_y = max(0, min(client_y, client_rect[3] - 1))
-                        crop_width = min(crop_width, client_rect[2] - client_x)
-                        crop_height = min(crop_height, client_rect[3] - client_y)
-                        
-                        if crop_width > 0 and crop_height > 0:
-                            crop_area = (client_x, client_y, crop_width, crop_height)
-                    except Exception as e:
-                        print(f"⚠️ Error converting crop coordinates: {e}")
-                        # Fall back to using coordinates as-is
-                        crop_area = (
-                            action["crop_x"],
-                            action["crop_y"],
-                            action["crop_width"],
-                            action["crop_height"]
-                        )
+                crop_area = get_client_crop_area(hwnd, action)
                 
-                # Capture screenshot of the window
-                screenshot = capture_window_screenshot(hwnd, crop_area)
+                # Capture screenshot of the window (OCR only needs grayscale)
+                screenshot = capture_window_screenshot(hwnd, crop_area, max_age_ms=action.get("max_frame_age_ms"), gray=True)
                 if screenshot is not None:
                     try:
-                        # Save screenshot to logs folder
-                        save_ocr_matcher_screenshot(screenshot)
+                        def match_text():
+                            # Save screenshot to logs folder
+                            save_ocr_matcher_screenshot(screenshot)
+                            return match_ocr_text(screenshot, search_text, case_sensitive, match_mode)
                         
-                        # Perform OCR and search for text
-                        text_found = match_ocr_text(screenshot, search_text, case_sensitive, match_mode)
+                        # Perform OCR and search for text (reuses the last result if the region is unchanged)
+                        text_found = evaluate_if_changed(hwnd, action, screenshot, match_text)
                         if text_found:
                             # Text found - execute true actions
                             execute_actions(true_actions, hwnd)
@@ -869,20 +902,190 @@ def execute_actions(actions, hwnd):
                     execute_actions(false_actions, hwnd)
 
 
-def loop_for_process(name, hwnd, actions):
+def loop_for_process(name, hwnd, actions, capture_fps=None):
     running_flags[hwnd] = True
     print(f"🧵 Started thread for {name} ({hwnd})")
+    get_frame_source().attach(hwnd)
+    # Decode every template once up front; missing files are reported here, once
+    get_template_cache().preload(actions)
+    if capture_fps and hwnd != REPLAY_WINDOW:
+        start_capture_thread(name, hwnd, capture_fps)
+    try:
+        _run_action_cycles(name, hwnd, actions)
+    finally:
+        stop_capture_thread(hwnd)
+        # Free the capture resources (DCs/bitmaps, shared images) held by this thread
+        get_frame_source().release_all()
+        get_buffer_pool().clear()
+        # A restart may attach to a different window that reuses the handle, calibrate again
+        selector = getattr(get_frame_source(), "selector", None)
+        if selector is not None:
+            selector.forget(hwnd)
+        # Results and locations belong to this run's action list, a restart may load another
+        change_detector.forget(hwnd)
+        location_tracker.forget(hwnd)
+
+
+def get_frame_ring_name(hwnd):
+    """Shared memory name of the window's FrameRing (see CAPTURE_SHARED_RING_SLOTS)"""
+    return f"hcring_{os.getpid()}_{hwnd}"
+
+
+def start_capture_thread(name, hwnd, fps):
+    """Start capturing the window in the background at the given FPS"""
+    source = get_frame_source()
+    ring = None
+    if CAPTURE_SHARED_RING_SLOTS:
+        geometry = source.cached_geometry(hwnd)
+        if geometry is None:
+            print(f"⚠️ Can't size the shared frame ring for {name}, frames are not shared")
+        else:
+            ring = FrameRing.create(geometry.width, geometry.height, slots=CAPTURE_SHARED_RING_SLOTS,
+                                    name=get_frame_ring_name(hwnd))
+            frame_rings[hwnd] = ring
+            print(f"🔗 Sharing {name} frames in shared memory {ring.name}")
+    capture_thread = CaptureThread(
+        hwnd,
+        source,
+        fps,
+        name=name,
+        active=lambda: running_flags.get(hwnd, False),
+        ring=ring
+    )
+    capture_threads[hwnd] = capture_thread
+    capture_thread.start()
+    print(f"📷 Started capture thread for {name} ({hwnd}) at {fps:g} fps")
+
+
+def stop_capture_thread(hwnd):
+    capture_thread = capture_threads.pop(hwnd, None)
+    if capture_thread is not None:
+        capture_thread.stop()
+    # After the thread stopped writing; attached processes keep their mapping until they close it
+    ring = frame_rings.pop(hwnd, None)
+    if ring is not None:
+        ring.close()
+        ring.unlink()
+
+
+def start_session_recording(path, **options):
+    """Record every window's frames (once per cycle) and the input sent to it
+    
+    Recordings hold full-window frames (replay serves them as the window), so while
+    recording, a window without a capture thread captures its full window each cycle
+    even when its matchers would only need a smaller region; this is logged per window.
+    
+    Args:
+        path: Recording file (.hcrec), appended to if it exists
+        options: SessionRecorder options (keyframe_interval, tile_size, max_queue)
+    """
+    global session_recorder
+    stop_session_recording()
+    recorder = SessionRecorder(path, **options)
+    recorder.start()
+    _recording_plan_notices.clear()
+    session_recorder = recorder
+    return recorder
+
+
+def stop_session_recording():
+    """Stop recording and flush the recording file"""
+    global session_recorder
+    recorder, session_recorder = session_recorder, None
+    if recorder is not None:
+        recorder.stop()
+
+
+def _record_cycle_frame(hwnd):
+    """Record the full window as a cycle starts
+    
+    The frame comes from the capture thread, or is the cycle's full-window FrameCache entry
+    that the matchers crop from afterwards, so recording adds no capture of its own.
+    """
+    recorder = session_recorder
+    if recorder is None:
+        return
+    capture_thread = capture_threads.get(hwnd)
+    frame_cache = frame_caches.get(hwnd)
+    if capture_thread is not None:
+        frame, _ = capture_thread.read()
+    elif frame_cache is not None and frame_cache.region is None:
+        frame = frame_cache.get()
+        if frame is None:
+            frame = capture_window_frame(hwnd)
+            if frame is not None:
+                frame_cache.put(frame)
+    else:
+        frame = None
+    if frame is not None:
+        recorder.record_frame(hwnd, frame)
+
+
+def _record_input(hwnd, event_type, **fields):
+    recorder = session_recorder
+    if recorder is not None:
+        recorder.record_event(hwnd, event_type, **fields)
+
+
+def get_capture_stats(hwnd=None):
+    """Get background capture statistics for the UI and logs
+    
+    Args:
+        hwnd: Window handle, or None for every window with a capture thread
+    
+    Returns:
+        Dict hwnd -> {"target_fps", "actual_fps", "sequence", "timestamp", "age_ms"};
+        sequence/timestamp/age_ms are None before the first frame
+    """
+    if hwnd is None:
+        items = list(capture_threads.items())
+    else:
+        items = [(hwnd, capture_threads[hwnd])] if hwnd in capture_threads else []
+    
+    stats = {}
+    for window, capture_thread in items:
+        frame_info = capture_thread.latest_info()
+        stats[window] = {
+            "target_fps": capture_thread.fps,
+            "actual_fps": capture_thread.actual_fps,
+            "sequence": frame_info.sequence if frame_info else None,
+            "timestamp": frame_info.timestamp if frame_info else None,
+            "age_ms": frame_info.age_ms() if frame_info else None,
+        }
+    return stats
+
+
+def get_capture_latency(hwnd=None):
+    """Get p50/p95/p99 capture latency per stage (geometry, render, read_bits, crop, convert, total)
+    
+    Returns:
+        Dict hwnd -> stage -> {"count", "p50", "p95", "p99"} in milliseconds
+    """
+    return get_latency_recorder().summary(hwnd)
+
+
+def _run_action_cycles(name, hwnd, actions):
+    """Run the action list for a window until the thread stops"""
     max_iterations = 10000  # Prevent infinite loops
     iteration_count = 0
+    last_latency_log = time.monotonic()
     
     while True:
         if not running_flags.get(hwnd, False):
+            # Don't hold capture resources while paused, they are rebuilt on resume
+            get_frame_source().release(hwnd)
             time.sleep(0.1)
             continue
 
         try:
+            source = get_frame_source()
+            source.begin_cycle(hwnd)
+            if source.exhausted:
+                # Finite source (replay) has no more frames
+                break
+            
             if not actions:
-                time.sleep(1)
+                source.sleep(1)
                 continue
             
             # Use index-based loop to support conditional jumps
@@ -890,6 +1093,21 @@ def loop_for_process(name, hwnd, actions):
             cycle_count = 0
             max_cycles = 1000  # Max cycles per loop iteration to prevent infinite loops
             
+            # With several matchers in this pass, capture their crops' union (or the full
+            # window) once and let them share it
+            plan = plan_cycle_capture(actions, source.cached_geometry(hwnd), CAPTURE_PLAN_FULL_WINDOW_RATIO)
+            if session_recorder is not None and hwnd not in capture_threads:
+                # The recording needs the full window anyway, let the matchers crop from that capture
+                frame_caches[hwnd] = FrameCache(FRAME_CACHE_MAX_AGE_MS)
+                if plan is not None and plan.region is not None and hwnd not in _recording_plan_notices:
+                    _recording_plan_notices.add(hwnd)
+                    print(f"⏺️ {name}: recording captures the full window instead of the planned "
+                          f"{plan.region[2]}x{plan.region[3]} region of {plan.matcher_count} matchers")
+            elif plan is not None:
+                frame_caches[hwnd] = FrameCache(FRAME_CACHE_MAX_AGE_MS, plan.region)
+            if session_recorder is not None:
+                _record_cycle_frame(hwnd)
+            
             while action_index < len(actions) and cycle_count < max_cycles:
                 if not running_flags.get(hwnd, False):
                     break
@@ -908,7 +1126,9 @@ def loop_for_process(name, hwnd, actions):
                 elif action["type"] == "double_click":
                     send_double_click(hwnd, action["x"], action["y"])
                 elif action["type"] == "delay":
-                    time.sleep(action["ms"] / 1000.0)
+                    get_frame_source().sleep(action["ms"] / 1000.0)
+                    # Delays wait for the screen to change, don't match against the old frame
+                    invalidate_frame_cache(hwnd)
                 elif action["type"] == "hotkey":
                     send_hotkey(
                         hwnd,
@@ -944,55 +1164,26 @@ def loop_for_process(name, hwnd, actions):
                     
                     if image_path:
                         # Get crop area if specified (only if not using full screen)
-                        crop_area = None
-                        use_full_screen = action.get("use_full_screen", False)
-                        if not use_full_screen and "crop_x" in action and "crop_y" in action and "crop_width" in action and "crop_height" in action:
-                            # Crop coordinates are stored as screen coordinates, need to convert to client coordinates
-                            try:
-                                screen_x = action["crop_x"]
-                                screen_y = action["crop_y"]
-                                crop_width = action["crop_width"]
-                                crop_height = action["crop_height"]
-                                
-                                # Convert screen coordinates to client coordinates
-                                # Use ScreenToClient to convert the top-left corner directly
-                                client_top_left = win32gui.ScreenToClient(hwnd, (screen_x, screen_y))
-                                client_x = client_top_left[0]
-                                client_y = client_top_left[1]
-                                
-                                # Get client rect for bounds checking
-                                client_rect = win32gui.GetClientRect(hwnd)
-                                
-                                # Ensure coordinates are within client bounds
-                                client_x = max(0, min(client_x, client_rect[2] - 1))
-                                client_y = max(0, min(client_y, client_rect[3] - 1))
-                                crop_width = min(crop_width, client_rect[2] - client_x)
-                                crop_height = min(crop_height, client_rect[3] - client_y)
-                                
-                                if crop_width > 0 and crop_height > 0:
-                                    crop_area = (client_x, client_y, crop_width, crop_height)
-                            except Exception as e:
-                                print(f"⚠️ Error converting crop coordinates: {e}")
-                                # Fall back to using coordinates as-is (assume they're already client coordinates)
-                                crop_area = (
-                                    action["crop_x"],
-                                    action["crop_y"],
-                                    action["crop_width"],
-                                    action["crop_height"]
-                                )
+                        crop_area = get_client_crop_area(hwnd, action)
                         
-                        # Capture screenshot of the window
-                        screenshot = capture_window_screenshot(hwnd, crop_area)
+                        # Get threshold (0-100, convert to 0.0-1.0)
+                        threshold = get_match_threshold(action)
+                        # Optional coarse matching on a downscaled screenshot
+                        scale = action.get("scale", 1)
+                        scale_method = action.get("scale_method", "area")
+                        # Full-window searches go coarse-to-fine if enabled (IMAGE_MATCH_PYRAMID or the action)
+                        pyramid = action.get("pyramid", IMAGE_MATCH_PYRAMID and crop_area is None)
+                        
+                        # Capture screenshot of the window (grayscale is enough below 0.99)
+                        screenshot, planes = capture_matcher_screenshot(hwnd, action, crop_area, threshold, scale, scale_method)
                         if screenshot is not None:
-                            # Save screenshot to logs folder
-                            save_image_matcher_screenshot(screenshot)
+                            def match_image():
+                                # Save screenshot to logs folder
+                                save_image_matcher_screenshot(screenshot)
+                                return match_image_tracked(hwnd, action, screenshot, image_path, match_number, threshold, scale, scale_method, pyramid, planes)
                             
-                            # Get threshold (0-100, convert to 0.0-1.0)
-                            threshold = action.get("threshold", 99)
-                            if isinstance(threshold, int):
-                                threshold = threshold / 100.0  # Convert 0-100 to 0.0-1.0
-                            # Try to match the template
-                            match_location = match_template_image(screenshot, image_path, match_number, threshold)
+                            # Try to match the template (reuses the last result if the region is unchanged)
+                            match_location = evaluate_if_changed(hwnd, action, screenshot, match_image)
                             if match_location is not None:
                                 # Image matched - execute true actions
                                 print(f"✓ Image match #{match_number} found in {image_path}, executing {len(true_actions)} true actions")
@@ -1016,51 +1207,19 @@ def loop_for_process(name, hwnd, actions):
                     
                     if search_text:
                         # Get crop area if specified (only if not using full screen)
-                        crop_area = None
-                        use_full_screen = action.get("use_full_screen", False)
-                        if not use_full_screen and "crop_x" in action and "crop_y" in action and "crop_width" in action and "crop_height" in action:
-                            # Crop coordinates are stored as screen coordinates, need to convert to client coordinates
-                            try:
-                                screen_x = action["crop_x"]
-                                screen_y = action["crop_y"]
-                                crop_width = action["crop_width"]
-                                crop_height = action["crop_height"]
-                                
-                                # Convert screen coordinates to client coordinates
-                                # Use ScreenToClient to convert the top-left corner directly
-                                client_top_left = win32gui.ScreenToClient(hwnd, (screen_x, screen_y))
-                                client_x = client_top_left[0]
-                                client_y = client_top_left[1]
-                                
-                                # Get client rect for bounds checking
-                                client_rect = win32gui.GetClientRect(hwnd)
-                                
-                                # Ensure coordinates are within client bounds
-                                client_x = max(0, min(client_x, client_rect[2] - 1))
-                                client_y = max(0, min(client_y, client_rect[3] - 1))
-                                crop_width = min(crop_width, client_rect[2] - client_x)
-                                crop_height = min(crop_height, client_rect[3] - client_y)
-                                
-                                if crop_width > 0 and crop_height > 0:
-                                    crop_area = (client_x, client_y, crop_width, crop_height)
-                            except Exception as e:
-                                print(f"⚠️ Error converting crop coordinates: {e}")
-                                crop_area = (
-                                    action["crop_x"],
-                                    action["crop_y"],
-                                    action["crop_width"],
-                                    action["crop_height"]
-                                )
+                        crop_area = get_client_crop_area(hwnd, action)
                         
-                        # Capture screenshot of the window
-                        screenshot = capture_window_screenshot(hwnd, crop_area)
+                        # Capture screenshot of the window (OCR only needs grayscale)
+                        screenshot = capture_window_screenshot(hwnd, crop_area, max_age_ms=action.get("max_frame_age_ms"), gray=True)
                         if screenshot is not None:
                             try:
-                                # Save screenshot to logs folder
-                                save_ocr_matcher_screenshot(screenshot)
+                                def match_text():
+                                    # Save screenshot to logs folder
+                                    save_ocr_matcher_screenshot(screenshot)
+                                    return match_ocr_text(screenshot, search_text, case_sensitive, match_mode)
                                 
-                                # Perform OCR and search for text
-                                text_found = match_ocr_text(screenshot, search_text, case_sensitive, match_mode)
+                                # Perform OCR and search for text (reuses the last result if the region is unchanged)
+                                text_found = evaluate_if_changed(hwnd, action, screenshot, match_text)
                                 if text_found:
                                     # Text found - execute true actions
                                     print(f"✓ OCR text '{search_text}' found, executing {len(true_actions)} true actions")
@@ -1089,23 +1248,63 @@ def loop_for_process(name, hwnd, actions):
 
         except Exception as e:
             print(f"❌ Error in {name}: {e}")
+        finally:
+            # Frames never carry over to the next cycle
+            frame_caches.pop(hwnd, None)
 
         iteration_count += 1
         if iteration_count >= max_iterations:
             print(f"⚠️ Maximum iterations reached for {name}, resetting counter")
             iteration_count = 0
         
-        time.sleep(1)  # short pause between action loop cycles
+        if LATENCY_LOG_INTERVAL_SECONDS and time.monotonic() - last_latency_log >= LATENCY_LOG_INTERVAL_SECONDS:
+            print(f"⏱️ {name}: {get_latency_recorder().format_summary(hwnd)}")
+            print(f"🎯 {name}: {location_tracker.format_summary(hwnd)}")
+            print(f"♻️ {name}: {change_detector.format_summary(hwnd)}")
+            last_latency_log = time.monotonic()
+        
+        get_frame_source().sleep(1)  # short pause between action loop cycles
+
+
+def run_replay(actions, source, name="replay"):
+    """Run the action list against a ReplayFrameSource until the recording ends
+    
+    Runs on the calling thread. Input actions are logged but not sent anywhere.
+    
+    Returns:
+        Number of action-loop cycles that were run
+    """
+    hwnd = REPLAY_WINDOW
+    previous_source = get_frame_source()
+    set_frame_source(source)
+    running_flags[hwnd] = True
+    try:
+        loop_for_process(name, hwnd, actions)
+    finally:
+        running_flags.pop(hwnd, None)
+        set_frame_source(previous_source)
+    
+    print(f"🎞️ Replay finished: {source.cycles} cycles, {source.cycles_per_second():.1f} cycles/s")
+    return source.cycles
 
 
-def start_threads_for_all(attached_processes, actions):
+def start_threads_for_all(attached_processes, actions, capture_fps=None):
+    """Start an action thread per window
+    
+    Args:
+        capture_fps: Enable a background capture thread per window at this rate
+                     (defaults to CAPTURE_FPS)
+    """
+    if capture_fps is None:
+        capture_fps = CAPTURE_FPS
+    
     for name, hwnd, base_address in attached_processes:
         if running_flags.get(hwnd):
             continue
 
         t = threading.Thread(
             target=loop_for_process,
-            args=(name, hwnd, actions),
+            args=(name, hwnd, actions, capture_fps),
             daemon=True
         )
         threads[hwnd] = t
@@ -1139,8 +1338,42 @@ def _listen_for_keys():
 
 
 
+def invalidate_frame_cache(hwnd):
+    """Drop the window's cached frame once the screen may have changed"""
+    frame_cache = frame_caches.get(hwnd)
+    if frame_cache is not None:
+        frame_cache.invalidate()
+    # Background frames from before this point are stale too
+    capture_thread = capture_threads.get(hwnd)
+    if capture_thread is not None:
+        capture_thread.invalidate()
+
+
+def _input_supported(hwnd, description):
+    """Return False (and log) when input can't be sent to this window"""
+    if hwnd == REPLAY_WINDOW:
+        print(f"🎞️ Replay: {description}")
+        return False
+    if win32gui is None:
+        print(f"⚠️ Input is only supported on Windows, skipping {description}")
+        return False
+    return True
+
+
+def _screen_to_client(hwnd, x, y):
+    """Convert click coordinates with the cached window geometry"""
+    geometry = get_frame_source().cached_geometry(hwnd)
+    if geometry is None:
+        return win32gui.ScreenToClient(hwnd, (x, y))
+    return geometry.screen_to_client(x, y)
+
+
 def send_left_click(hwnd, x, y):
-    x, y = win32gui.ScreenToClient(hwnd, (x, y))
+    invalidate_frame_cache(hwnd)
+    _record_input(hwnd, "left_click", x=x, y=y)
+    if not _input_supported(hwnd, f"left click at ({x}, {y})"):
+        return
+    x, y = _screen_to_client(hwnd, x, y)
     lParam = win32api.MAKELONG(x, y)
     win32gui.PostMessage(hwnd, win32con.WM_MOUSEMOVE, 0, lParam)
     win32gui.PostMessage(hwnd, win32con.WM_LBUTTONDOWN, win32con.MK_LBUTTON, lParam)
@@ -1148,7 +1381,11 @@ def send_left_click(hwnd, x, y):
 
 
 def send_double_click(hwnd, x, y):
-    x, y = win32gui.ScreenToClient(hwnd, (x, y))
+    invalidate_frame_cache(hwnd)
+    _record_input(hwnd, "double_click", x=x, y=y)
+    if not _input_supported(hwnd, f"double click at ({x}, {y})"):
+        return
+    x, y = _screen_to_client(hwnd, x, y)
     lParam = win32api.MAKELONG(x, y)
 
     win32gui.PostMessage(hwnd, win32con.WM_MOUSEMOVE, 0, lParam)
@@ -1162,6 +1399,11 @@ def send_hotkey(hwnd, key, ctrl=False, alt=False, shift=False):
     """Send a hotkey combination to the specified window"""
     import time
     
+    invalidate_frame_cache(hwnd)
+    _record_input(hwnd, "hotkey", key=key, ctrl=ctrl, alt=alt, shift=shift)
+    if not _input_supported(hwnd, f"hotkey {key}"):
+        return
+    
     # Log the hotkey being sent
     modifiers = []
     if ctrl:
@@ -3,12 +3,13 @@
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
     QDialogButtonBox, QPushButton, QFileDialog, QMessageBox,
-    QListWidget, QListWidgetItem, QGroupBox, QScrollArea, QWidget, QSpinBox, QCheckBox
+    QListWidget, QListWidgetItem, QGroupBox, QScrollArea, QWidget, QSpinBox, QCheckBox, QComboBox
 )
 from PyQt5.QtCore import Qt
 import os
 
 from src.action_types.base import BaseActionType
+from src.vision.frames import SCALE_FACTORS
 from src.ui.icons import get_icon, get_icon_text, get_unicode_icon
 
 
@@ -203,6 +204,19 @@ class ImageMatcherDialog(QDialog):
         threshold_layout.addStretch()
         layout.addLayout(threshold_layout)
         
+        # Scale input (coarse checks on a downscaled screenshot)
+        scale_label = QLabel("Scale (match on a downscaled screenshot, for coarse checks):")
+        scale_label.setStyleSheet("font-size: 12px; color: #333; font-weight: bold;")
+        layout.addWidget(scale_label)
+        
+        scale_layout = QHBoxLayout()
+        self.scale_input = QComboBox()
+        for factor in SCALE_FACTORS:
+            self.scale_input.addItem("Full resolution" if factor == 1 else f"1/{factor}", factor)
+        scale_layout.addWidget(self.scale_input)
+        scale_layout.addStretch()
+        layout.addLayout(scale_layout)
+        
         # Full screen checkbox
         self.full_screen_checkbox = QCheckBox("Use full screen screenshot (no crop area)")
         self.full_screen_checkbox.setStyleSheet("""
@@ -675,6 +689,10 @@ class ImageMatcherDialog(QDialog):
             "use_full_screen": self.use_full_screen
         }
         
+        scale = self.scale_input.currentData()
+        if scale > 1:
+            action["scale"] = scale
+        
         # Add crop area if selected (only if not using full screen)
         if self.crop_area and not self.use_full_screen:
             x, y, width, height = self.crop_area
@@ -703,6 +721,8 @@ class ImageMatcherDialog(QDialog):
             # Old format: convert 0.0-1.0 to 0-100
             threshold = int(threshold * 100)
         self.threshold_input.setValue(threshold)
+        scale_index = self.scale_input.findData(action_data.get("scale", 1))
+        self.scale_input.setCurrentIndex(max(scale_index, 0))
         self.true_actions = action_data.get("true_actions", []).copy()
         self.false_actions = action_data.get("false_actions", []).copy()
         self._populate_sub_action_list(True)
@@ -803,7 +823,9 @@ class ImageMatcherActionType(BaseActionType):
         filename = os.path.basename(image_path) if image_path else "No image"
         true_count = len(true_actions)
         false_count = len(false_actions)
-        return f"Image Matcher: {filename} (match #{match_number}, threshold: {threshold}%) → True: {true_count} actions, False: {false_count} actions"
+        scale = action_data.get("scale", 1)
+        scale_text = f", scale: 1/{scale}" if scale > 1 else ""
+        return f"Image Matcher: {filename} (match #{match_number}, threshold: {threshold}%{scale_text}) → True: {true_count} actions, False: {false_count} actions"
     
     def validate_action_data(self, action_data: dict) -> bool:
         threshold = action_data.get("threshold", 99)
@@ -821,6 +843,7 @@ class ImageMatcherActionType(BaseActionType):
             isinstance(action_data["match_number"], int) and
             action_data["match_number"] >= 1 and
             threshold_valid and
+            action_data.get("scale", 1) in SCALE_FACTORS and
             isinstance(action_data["true_actions"], list) and
             isinstance(action_data["false_actions"], list)
         )
@@ -3,12 +3,12 @@ from PyQt5.QtWidgets import (
     QScrollArea, QListWidget, QMessageBox, QDialog, QListWidgetItem,
     QGroupBox, QFrame, QSizePolicy, QCheckBox
 )
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, pyqtSignal, QTimer
 from PyQt5.QtGui import QIcon
 import json
 import os
 
-from src.action_loop import start_threads_for_all
+from src.action_loop import start_threads_for_all, get_capture_stats
 from src.action_types import get_action_registry
 from src.ui.icons import get_icon, get_icon_text, get_unicode_icon
 
@@ -325,6 +325,14 @@ class CoordinateCaptureWindow(QWidget):
         processes_label.setWordWrap(True)
         layout.addWidget(processes_label)
         
+        # --- Background capture status (only shown when capture threads are running)
+        self.capture_status_label = QLabel()
+        self.capture_status_label.setStyleSheet("color: #666; font-size: 10px; padding: 5px;")
+        self.capture_status_label.setVisible(False)
+        layout.addWidget(self.capture_status_label)
+        self.capture_status_timer = QTimer(self)
+        self.capture_status_timer.timeout.connect(self._update_capture_status)
+        
         # Apply group box styling
         self._apply_group_box_styling()
 
@@ -533,6 +541,24 @@ class CoordinateCaptureWindow(QWidget):
             }
         """)
         start_threads_for_all(self.attached_processes, self.actions)
+        self.capture_status_timer.start(1000)
+
+    def _update_capture_status(self):
+        """Show measured capture FPS and latest frame age per window"""
+        stats = get_capture_stats()
+        if not stats:
+            self.capture_status_label.setVisible(False)
+            return
+        titles = {hwnd: name for name, hwnd, base in self.attached_processes}
+        parts = []
+        for hwnd, window_stats in stats.items():
+            age = window_stats["age_ms"]
+            age_text = f"{age:.0f} ms" if age is not None else "-"
+            parts.append(
+                f"{titles.get(hwnd, hwnd)}: {window_stats['actual_fps']:.1f}/{window_stats['target_fps']:g} fps, frame age {age_text}"
+            )
+        self.capture_status_label.setText("Capture: " + " | ".join(parts))
+        self.capture_status_label.setVisible(True)
 
     def save_actions(self):
         try:
@@ -0,0 +1,95 @@
+"""Screen capture package used by the action loop.
+
+This package contains the capture plumbing shared by the image and OCR matchers:
+- CaptureBackend: Abstract interface for the platform calls that render a window
+- Win32CaptureBackend: PrintWindow based backend (Windows)
+- CaptureContext: Per-window device contexts and bitmap kept alive between captures
+- get_capture_context() / release_capture_context(): Per-thread context registry
+- frames: Zero-copy helpers to view, crop and convert raw BGRX capture bits
+- regions: Pure crop rectangle math (compute_source_rect)
+- FrameCache: Planned frame shared by the matchers of one cycle
+- plan_cycle_capture(): Union-of-crops (or full window) capture plan for a cycle's matchers
+- FrameSource: Interface the action loop captures through (capture, geometry)
+- GeometryCache: Window geometry reused for a short TTL by capture, crops and clicks
+- Win32FrameSource: PrintWindow/BitBlt frame source (Windows)
+- X11ShmFrameSource: MIT-SHM frame source for X11/Xvfb (src.vision.x11_source)
+- get_frame_source() / set_frame_source(): Global frame source used by the action loop
+- ReplayFrameSource: Serves recorded PNG/.npy/video frames offline (src.vision.replay_source)
+- ChangeDetector: Reuses a matcher's result while its region is unchanged
+- CaptureThread: Background capture into a double buffer, serving the latest frame
+- FrameRing: Shared-memory frame ring for matcher/OCR processes (src.vision.shm_ring)
+- LatencyRecorder: Rolling per-window, per-stage capture latency (p50/p95/p99)
+- CaptureMethod / CaptureMethodSelector: Per-window calibration of the fastest valid capture method
+- BufferPool / get_buffer_pool(): Per-thread scratch arrays reused across cycles
+- SessionRecorder / SessionReader: Delta-compressed recording of frames and input events
+- TemplateCache / get_template_cache(): Decoded templates shared by all windows, mtime/size invalidated
+- TemplateMatcher / get_template_matcher(): Template preprocessing compiled once per matcher
+- LocationTracker: Last match location per image matcher, searched first
+"""
+
+from src.vision.capture_context import (
+    CaptureBackend,
+    Win32CaptureBackend,
+    CaptureContext,
+    get_capture_context,
+    release_capture_context,
+    release_all_capture_contexts,
+    set_capture_backend,
+)
+from src.vision.frame_cache import FrameCache
+from src.vision.capture_plan import CapturePlan, plan_cycle_capture
+from src.vision.buffer_pool import BufferPool, get_buffer_pool
+from src.vision.capture_methods import CaptureMethod, CaptureMethodSelector, ContextCaptureMethod
+from src.vision.change_detection import ChangeDetector, region_signature
+from src.vision.capture_thread import CaptureThread, FrameInfo
+from src.vision.latency import LatencyRecorder, get_latency_recorder, record_latency
+from src.vision.session_recorder import SessionRecorder, SessionReader
+from src.vision.template_cache import TemplateCache, get_template_cache
+from src.vision.template_matcher import TemplateMatcher, get_template_matcher
+from src.vision.location_tracker import LocationTracker
+from src.vision.frame_source import (
+    FrameSource,
+    WindowGeometry,
+    GeometryCache,
+    Win32FrameSource,
+    get_frame_source,
+    set_frame_source,
+)
+
+__all__ = [
+    'CaptureBackend',
+    'Win32CaptureBackend',
+    'CaptureContext',
+    'get_capture_context',
+    'release_capture_context',
+    'release_all_capture_contexts',
+    'set_capture_backend',
+    'FrameCache',
+    'CapturePlan',
+    'plan_cycle_capture',
+    'BufferPool',
+    'get_buffer_pool',
+    'CaptureMethod',
+    'CaptureMethodSelector',
+    'ContextCaptureMethod',
+    'ChangeDetector',
+    'region_signature',
+    'CaptureThread',
+    'FrameInfo',
+    'LatencyRecorder',
+    'get_latency_recorder',
+    'record_latency',
+    'SessionRecorder',
+    'SessionReader',
+    'TemplateCache',
+    'get_template_cache',
+    'TemplateMatcher',
+    'get_template_matcher',
+    'LocationTracker',
+    'FrameSource',
+    'WindowGeometry',
+    'GeometryCache',
+    'Win32FrameSource',
+    'get_frame_source',
+    'set_frame_source',
+]
@@ -0,0 +1,61 @@
+"""Per-thread pool of reusable scratch arrays for the capture/match hot loop.
+
+Every cycle used to allocate the screenshot copy, the matchTemplate result
+maps and the OCR preprocessing images afresh. The pool hands out the same
+array for the same (name, shape, dtype) every time, so OpenCV can write into
+it through dst=/result= and steady-state cycles allocate (almost) nothing.
+
+The name keeps buffers that are alive at the same time apart (e.g. the
+three per-channel result maps). A pooled array is only valid until the next
+get() with the same key on the same thread: callers must not keep it across
+cycles. Pools are per thread, like the capture contexts, so window loops
+never share buffers.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class BufferPool:
+    """Reusable arrays keyed by (name, shape, dtype)"""
+
+    # Buffers kept per thread; crop sizes are few, so this is never reached in practice
+    MAX_BUFFERS = 64
+
+    def __init__(self):
+        self.enabled = True  # False hands out fresh arrays (for comparison benchmarks)
+        self.allocations = 0  # Arrays created by the pool
+        self._buffers = OrderedDict()  # (name, shape, dtype) -> array, least recently used first
+
+    def get(self, name, shape, dtype=np.uint8):
+        """Return an uninitialized array for this key, reusing the previous one if there is one"""
+        if not self.enabled:
+            return np.empty(shape, dtype=dtype)
+        key = (name, tuple(shape), np.dtype(dtype).str)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = np.empty(shape, dtype=dtype)
+            self.allocations += 1
+            self._buffers[key] = buffer
+            if len(self._buffers) > self.MAX_BUFFERS:
+                self._buffers.popitem(last=False)
+        else:
+            self._buffers.move_to_end(key)
+        return buffer
+
+    def clear(self):
+        """Drop every pooled array"""
+        self._buffers.clear()
+
+
+_thread_state = threading.local()
+
+
+def get_buffer_pool() -> BufferPool:
+    """Get the calling thread's buffer pool"""
+    pool = getattr(_thread_state, "pool", None)
+    if pool is None:
+        pool = _thread_state.pool = BufferPool()
+    return pool
@@ -0,0 +1,323 @@
+"""Persistent per-window capture contexts.
+
+Creating the window DC, the memory DC and the bitmap for every screenshot is
+a large part of the capture cost, so each window keeps them alive in a
+CaptureContext and only rebuilds them when the capture size changes.
+The platform calls sit behind CaptureBackend so the caching logic does not
+depend on Win32.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from abc import ABC, abstractmethod
+
+from src.vision.latency import record_latency
+
+
+class CaptureBackend(ABC):
+    """Platform calls used by CaptureContext to render a window into a bitmap"""
+
+    @abstractmethod
+    def create_surface(self, hwnd, width, height):
+        """Allocate the DCs and bitmap for a width x height capture.
+
+        Returns an opaque surface object, or None if the window has no DC.
+        """
+        pass
+
+    # Names accepted by render(method=...), in order of preference
+    RENDER_METHODS = ()
+
+    @abstractmethod
+    def render(self, hwnd, surface, method=None) -> bool:
+        """Render the window into the surface bitmap, return True on success
+
+        method selects one of RENDER_METHODS; None uses the backend's default.
+        """
+        pass
+
+    def blit_region(self, hwnd, surface, rect) -> bool:
+        """Copy rect (x, y, width, height) of the visible window into the surface
+
+        Returns False when the region cannot be copied directly (e.g. the window
+        is minimized or covered), the caller then falls back to render().
+        """
+        return False
+
+    @abstractmethod
+    def read_bits(self, surface) -> bytes:
+        """Return the raw BGRX bytes of the surface bitmap"""
+        pass
+
+    @abstractmethod
+    def release_surface(self, hwnd, surface):
+        """Free everything allocated by create_surface()"""
+        pass
+
+
+class _Win32Surface:
+    """GDI objects backing one capture size"""
+
+    def __init__(self, hwnd_dc, mfc_dc, save_dc, bitmap, width=0, height=0):
+        self.width = width
+        self.height = height
+        self.hwnd_dc = hwnd_dc
+        self.mfc_dc = mfc_dc
+        self.save_dc = save_dc
+        self.bitmap = bitmap
+
+
+class Win32CaptureBackend(CaptureBackend):
+    """Capture backend using PrintWindow (works even when the window is minimized)"""
+
+    # PrintWindow flag, Windows 8+
+    PW_RENDERFULLCONTENT = 2
+
+    # print_window_full: PrintWindow(PW_RENDERFULLCONTENT), works minimized and for DirectX content
+    # print_window: plain PrintWindow, faster but black for windows that draw with DirectX
+    # bitblt: copy of the on-screen window DC, fastest but only for visible, uncovered windows
+    RENDER_METHODS = ("print_window_full", "print_window", "bitblt")
+
+    def create_surface(self, hwnd, width, height):
+        import win32gui
+        import win32ui
+
+        hwnd_dc = win32gui.GetWindowDC(hwnd)
+        if not hwnd_dc:
+            return None
+
+        mfc_dc = None
+        save_dc = None
+        try:
+            mfc_dc = win32ui.CreateDCFromHandle(hwnd_dc)
+            save_dc = mfc_dc.CreateCompatibleDC()
+            bitmap = win32ui.CreateBitmap()
+            bitmap.CreateCompatibleBitmap(mfc_dc, width, height)
+            save_dc.SelectObject(bitmap)
+        except Exception:
+            # Don't leak the DCs if the bitmap could not be created
+            self.release_surface(hwnd, _Win32Surface(hwnd_dc, mfc_dc, save_dc, None))
+            raise
+        return _Win32Surface(hwnd_dc, mfc_dc, save_dc, bitmap, width, height)
+
+    def render(self, hwnd, surface, method=None) -> bool:
+        import ctypes
+
+        if method == "bitblt":
+            return self.blit_region(hwnd, surface, (0, 0, surface.width, surface.height))
+
+        flags = 0 if method == "print_window" else self.PW_RENDERFULLCONTENT
+        # PrintWindow is not exposed by win32gui, call it through ctypes
+        user32 = ctypes.windll.user32
+        return bool(user32.PrintWindow(hwnd, surface.save_dc.GetSafeHdc(), flags))
+
+    def blit_region(self, hwnd, surface, rect) -> bool:
+        import win32con
+        import win32gui
+
+        # BitBlt only sees what is on screen, leave minimized/covered windows to PrintWindow
+        if win32gui.IsIconic(hwnd) or not self._is_region_on_top(hwnd, rect):
+            return False
+
+        x, y, width, height = rect
+        # The window DC has the same origin as the PrintWindow output, so the
+        # blitted pixels line up with a crop of a full render
+        surface.save_dc.BitBlt((0, 0), (width, height), surface.mfc_dc, (x, y), win32con.SRCCOPY)
+        return True
+
+    def read_bits(self, surface) -> bytes:
+        return surface.bitmap.GetBitmapBits(True)
+
+    def _is_region_on_top(self, hwnd, rect):
+        """Check that the corners and center of the region belong to the window on screen"""
+        import win32con
+        import win32gui
+
+        x, y, width, height = rect
+        window_left, window_top, _, _ = win32gui.GetWindowRect(hwnd)
+        points = [
+            (x, y), (x + width - 1, y), (x, y + height - 1),
+            (x + width - 1, y + height - 1), (x + width // 2, y + height // 2),
+        ]
+        for px, py in points:
+            hit = win32gui.WindowFromPoint((window_left + px, window_top + py))
+            if not hit or win32gui.GetAncestor(hit, win32con.GA_ROOT) != win32gui.GetAncestor(hwnd, win32con.GA_ROOT):
+                return False
+        return True
+
+    def release_surface(self, hwnd, surface):
+        import win32gui
+
+        # Release in reverse order of creation, ignoring errors so one stale
+        # handle does not keep the others alive
+        if surface.bitmap:
+            try:
+                win32gui.DeleteObject(surface.bitmap.GetHandle())
+            except:
+                pass
+        if surface.save_dc:
+            try:
+                surface.save_dc.DeleteDC()
+            except:
+                pass
+        if surface.mfc_dc:
+            try:
+                surface.mfc_dc.DeleteDC()
+            except:
+                pass
+        if surface.hwnd_dc:
+            try:
+                win32gui.ReleaseDC(hwnd, surface.hwnd_dc)
+            except:
+                pass
+
+
+class CaptureContext:
+    """Capture resources for one window, reused until the capture size changes"""
+
+    # Region surfaces are kept per crop size; a profile only has a handful of crops
+    MAX_REGION_SURFACES = 4
+
+    def __init__(self, hwnd, backend: CaptureBackend):
+        self.hwnd = hwnd
+        self.backend = backend
+        self.size = None  # (width, height) of the current surface
+        self.rebuild_count = 0  # Number of times a surface was (re)created
+        self._surface = None
+        self._region_surfaces = OrderedDict()  # (width, height) -> surface, oldest first
+
+    def grab(self, width, height, method=None):
+        """Render the window at width x height and return its raw BGRX bytes
+
+        Args:
+            method: Backend render method (see CaptureBackend.RENDER_METHODS), None for the default
+
+        Returns:
+            Bytes of length width * height * 4, or None if the window could not be rendered
+        """
+        if self._surface is None or self.size != (width, height):
+            self._release_surface()
+            surface = self._create_surface(width, height)
+            if surface is None:
+                return None
+            self._surface = surface
+            self.size = (width, height)
+
+        try:
+            started = time.perf_counter()
+            if not self.backend.render(self.hwnd, self._surface, method):
+                return None
+            rendered = time.perf_counter()
+            bits = self.backend.read_bits(self._surface)
+            record_latency(self.hwnd, "render", rendered - started)
+            record_latency(self.hwnd, "read_bits", time.perf_counter() - rendered)
+            return bits
+        except Exception:
+            # The DCs may be stale (window recreated, display change), start over next time
+            self._release_surface()
+            raise
+
+    def grab_region(self, rect):
+        """Copy only rect (x, y, width, height) of the window and return its raw BGRX bytes
+
+        Returns:
+            Bytes of length width * height * 4, or None if the backend cannot copy the
+            region directly and the caller should fall back to grab()
+        """
+        size = (rect[2], rect[3])
+        surface = self._region_surfaces.get(size)
+        if surface is None:
+            surface = self._create_surface(*size)
+            if surface is None:
+                return None
+            self._region_surfaces[size] = surface
+            if len(self._region_surfaces) > self.MAX_REGION_SURFACES:
+                _, oldest = self._region_surfaces.popitem(last=False)
+                self._release(oldest)
+        else:
+            self._region_surfaces.move_to_end(size)
+
+        try:
+            started = time.perf_counter()
+            if not self.backend.blit_region(self.hwnd, surface, rect):
+                return None
+            rendered = time.perf_counter()
+            bits = self.backend.read_bits(surface)
+            record_latency(self.hwnd, "render", rendered - started)
+            record_latency(self.hwnd, "read_bits", time.perf_counter() - rendered)
+            return bits
+        except Exception:
+            del self._region_surfaces[size]
+            self._release(surface)
+            raise
+
+    def release(self):
+        """Free the cached resources; the next grab() recreates them"""
+        self._release_surface()
+        while self._region_surfaces:
+            _, surface = self._region_surfaces.popitem()
+            self._release(surface)
+
+    def _create_surface(self, width, height):
+        surface = self.backend.create_surface(self.hwnd, width, height)
+        if surface is not None:
+            self.rebuild_count += 1
+        return surface
+
+    def _release_surface(self):
+        if self._surface is not None:
+            surface = self._surface
+            self._surface = None
+            self.size = None
+            self._release(surface)
+
+    def _release(self, surface):
+        try:
+            self.backend.release_surface(self.hwnd, surface)
+        except Exception as e:
+            print(f"⚠️ Error releasing capture context for {self.hwnd}: {e}")
+
+
+# GDI requires a DC to be released by the thread that acquired it, so contexts
+# are kept per thread. Each window loop thread only ever sees its own contexts.
+_thread_state = threading.local()
+_backend_factory = Win32CaptureBackend
+
+
+def set_capture_backend(factory):
+    """Set the callable used to create the backend for new capture contexts"""
+    global _backend_factory
+    _backend_factory = factory
+
+
+def _get_contexts() -> dict:
+    contexts = getattr(_thread_state, "contexts", None)
+    if contexts is None:
+        contexts = {}
+        _thread_state.contexts = contexts
+    return contexts
+
+
+def get_capture_context(hwnd) -> CaptureContext:
+    """Get (or create) the calling thread's capture context for a window"""
+    contexts = _get_contexts()
+    context = contexts.get(hwnd)
+    if context is None:
+        context = CaptureContext(hwnd, _backend_factory())
+        contexts[hwnd] = context
+    return context
+
+
+def release_capture_context(hwnd):
+    """Release the calling thread's capture context for a window, if any"""
+    context = _get_contexts().pop(hwnd, None)
+    if context is not None:
+        context.release()
+
+
+def release_all_capture_contexts():
+    """Release every capture context owned by the calling thread"""
+    contexts = _get_contexts()
+    for hwnd in list(contexts):
+        release_capture_context(hwnd)
@@ -0,0 +1,183 @@
+"""Adaptive choice of the capture method per window.
+
+PrintWindow with PW_RENDERFULLCONTENT works in every window state but is
+slow; plain PrintWindow or a BitBlt of the window DC are much faster for
+windows that draw through GDI and are visible. When a window attaches,
+CaptureMethodSelector times every CaptureMethod on it, keeps the ones whose
+pixels match the others and uses the fastest. A method that later returns
+black or fails is dropped for that window until the next calibration, and
+the capture falls back to the next method right away.
+
+The selector only talks to the CaptureMethod interface, so it can be driven
+by fake methods on any platform.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+from src.vision.capture_context import get_capture_context
+from src.vision.frames import bgrx_view
+
+
+def is_black_frame(frame, step=8):
+    """Return True if a sparse grid of pixels is all zero (cheap check for failed renders)"""
+    return not frame[::step, ::step, :3].any()
+
+
+def frames_match(first, second, tolerance):
+    """Return True if two frames have the same size and a mean absolute difference within tolerance"""
+    if first.shape != second.shape:
+        return False
+    return float(np.mean(cv2.absdiff(first[:, :, :3], second[:, :, :3]))) <= tolerance
+
+
+class CaptureMethod(ABC):
+    """One way of capturing a full window frame"""
+
+    name = "method"
+
+    @abstractmethod
+    def capture(self, window, width, height):
+        """Capture the window at width x height
+
+        Returns:
+            (height, width, 4) uint8 BGRX array, or None on failure
+        """
+        pass
+
+
+class ContextCaptureMethod(CaptureMethod):
+    """Renders through the thread's CaptureContext with one of the backend's render methods"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def capture(self, window, width, height):
+        bits = get_capture_context(window).grab(width, height, method=self.name)
+        if bits is None:
+            return None
+        return bgrx_view(bits, width, height)
+
+
+class _WindowSelection:
+    def __init__(self, order, calibrated_at):
+        self.order = order  # Methods to try, fastest valid first
+        self.calibrated_at = calibrated_at
+
+
+class CaptureMethodSelector:
+    """Calibrates capture methods per window and falls back when the chosen one fails"""
+
+    # Captures timed per method during calibration (the median is used)
+    CALIBRATION_ROUNDS = 3
+    # Mean absolute difference per channel allowed between methods' frames
+    MATCH_TOLERANCE = 2.0
+    # Methods dropped after a failure get another chance at the next calibration
+    RECALIBRATE_SECONDS = 300
+
+    def __init__(self, methods):
+        """
+        Args:
+            methods: CaptureMethods in order of preference; the first one should work
+                     in every window state and is the last resort
+        """
+        self.methods = list(methods)
+        self._selections = {}  # window -> _WindowSelection
+        self._lock = threading.Lock()
+
+    def calibrate(self, window, width, height):
+        """Time every method on the window and pick the fastest one with matching pixels
+
+        Returns:
+            List of method names in the order they will be tried
+        """
+        timings = {}
+        frames = {}
+        for method in self.methods:
+            durations = []
+            frame = None
+            for _ in range(self.CALIBRATION_ROUNDS):
+                started = time.perf_counter()
+                try:
+                    frame = method.capture(window, width, height)
+                except Exception as e:
+                    print(f"⚠️ Capture method {method.name} failed on {window}: {e}")
+                    frame = None
+                durations.append(time.perf_counter() - started)
+                if frame is None or is_black_frame(frame):
+                    frame = None
+                    break
+            if frame is not None:
+                # Sources may reuse their buffers, keep our own copy for comparison
+                frames[method.name] = np.array(frame)
+                timings[method.name] = float(np.median(durations))
+
+        # The first working method in preference order is the reference the others must match
+        reference = next((frames[method.name] for method in self.methods if method.name in frames), None)
+        valid = [
+            method for method in self.methods
+            if method.name in frames and frames_match(frames[method.name], reference, self.MATCH_TOLERANCE)
+        ]
+        valid.sort(key=lambda method: timings[method.name])
+        # Keep the rejected methods at the end in preference order, a black window still needs a capture
+        order = valid + [method for method in self.methods if method not in valid]
+
+        with self._lock:
+            self._selections[window] = _WindowSelection(order, time.monotonic())
+
+        report = ", ".join(
+            f"{method.name} {timings[method.name] * 1000:.1f} ms" + ("" if method in valid else " (pixels differ)")
+            if method.name in timings else f"{method.name} black or failed"
+            for method in self.methods
+        )
+        print(f"🎯 Capture calibration for {window}: {report} -> using {order[0].name}")
+        return [method.name for method in order]
+
+    def selected(self, window):
+        """Name of the method currently used for the window, or None before calibration"""
+        with self._lock:
+            selection = self._selections.get(window)
+        return selection.order[0].name if selection else None
+
+    def capture(self, window, width, height):
+        """Capture with the window's selected method, falling back on black or failed frames"""
+        with self._lock:
+            selection = self._selections.get(window)
+        if selection is None or time.monotonic() - selection.calibrated_at >= self.RECALIBRATE_SECONDS:
+            self.calibrate(window, width, height)
+            with self._lock:
+                selection = self._selections[window]
+
+        last_frame = None
+        order = list(selection.order)
+        for index, method in enumerate(order):
+            try:
+                frame = method.capture(window, width, height)
+            except Exception:
+                # Stale handles etc. raise; the next method may still work
+                if index == len(order) - 1:
+                    raise
+                frame = None
+            if frame is not None and not is_black_frame(frame):
+                if index > 0:
+                    self._demote(window, selection, order[:index])
+                return frame
+            if frame is not None:
+                last_frame = frame
+        # Every method returned black: the window content may really be black
+        return last_frame
+
+    def forget(self, window):
+        """Drop the window's calibration (e.g. when it detaches)"""
+        with self._lock:
+            self._selections.pop(window, None)
+
+    def _demote(self, window, selection, failed):
+        with self._lock:
+            names = ", ".join(method.name for method in failed)
+            selection.order = [method for method in selection.order if method not in failed] + list(failed)
+        print(f"⚠️ Capture method {names} returned a black or failed frame on {window}, using {selection.order[0].name}")
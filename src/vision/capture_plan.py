@@ -0,0 +1,105 @@
+"""Capture planning for one pass over a window's actions.
+
+When a pass evaluates several cropped matchers, capturing each crop on its
+own repeats the per-capture overhead, while capturing the full window wastes
+work on pixels nobody looks at. The planner looks at the top-level matchers
+of the pass up front and picks one capture for all of them: the bounding
+union of their crops, or the full window when that union would cover most
+of it anyway.
+
+Everything here is pure: it only looks at the action dicts and the client
+geometry, so it can be checked without a window.
+"""
+
+from src.vision.regions import compute_source_rect
+
+CAPTURE_ACTION_TYPES = ("image_matcher", "ocr_matcher")
+
+
+class CapturePlan:
+    """One shared capture for the matchers of a pass"""
+
+    def __init__(self, region, matcher_count):
+        self.region = region  # (x, y, width, height) in client coordinates, None = full window
+        self.matcher_count = matcher_count  # Top-level matchers sharing the capture
+
+    def __repr__(self):
+        return f"CapturePlan(region={self.region}, matcher_count={self.matcher_count})"
+
+
+def rect_contains(outer, inner):
+    """Return True if rectangle inner (x, y, width, height) lies inside outer"""
+    return (
+        inner[0] >= outer[0] and inner[1] >= outer[1] and
+        inner[0] + inner[2] <= outer[0] + outer[2] and
+        inner[1] + inner[3] <= outer[1] + outer[3]
+    )
+
+
+def rect_union(rects):
+    """Bounding rectangle of a list of (x, y, width, height) rectangles"""
+    left = min(rect[0] for rect in rects)
+    top = min(rect[1] for rect in rects)
+    right = max(rect[0] + rect[2] for rect in rects)
+    bottom = max(rect[1] + rect[3] for rect in rects)
+    return (left, top, right - left, bottom - top)
+
+
+def action_crop_area(action, geometry):
+    """Convert a matcher's stored crop to a client-area rectangle
+
+    Crop coordinates are stored as screen coordinates and converted using the
+    window's client position, then clamped to the client area.
+
+    Args:
+        action: image_matcher/ocr_matcher action dict
+        geometry: WindowGeometry of the window, or None if unknown
+
+    Returns:
+        Tuple (x, y, width, height), or None to capture the whole window
+    """
+    if action.get("use_full_screen", False):
+        return None
+    if not ("crop_x" in action and "crop_y" in action and "crop_width" in action and "crop_height" in action):
+        return None
+    if geometry is None or geometry.minimized:
+        # No usable client area to crop against, capture the whole window
+        return None
+
+    client_x, client_y = geometry.screen_to_client(action["crop_x"], action["crop_y"])
+    return compute_source_rect((client_x, client_y, action["crop_width"], action["crop_height"]),
+                               geometry.width, geometry.height)
+
+
+def plan_cycle_capture(actions, geometry, full_window_ratio=0.6):
+    """Plan one shared capture for the top-level matchers of a pass
+
+    Matchers inside true/false branches only run conditionally, so they are not
+    planned for; they still use the shared capture when their crop lies inside it.
+
+    Args:
+        actions: The window's action list
+        geometry: WindowGeometry of the window, or None if unknown
+        full_window_ratio: Capture the full window once the union covers at least
+                           this fraction of the client area
+
+    Returns:
+        CapturePlan, or None when fewer than two matchers would share the capture
+    """
+    crops = []
+    for action in actions:
+        if not action.get("enabled", True) or action.get("type") not in CAPTURE_ACTION_TYPES:
+            continue
+        crops.append(action_crop_area(action, geometry))
+
+    if len(crops) < 2:
+        return None
+    if any(crop is None for crop in crops) or geometry is None:
+        # At least one matcher needs the whole window
+        return CapturePlan(None, len(crops))
+
+    union = rect_union(crops)
+    client_area = geometry.width * geometry.height
+    if client_area <= 0 or union[2] * union[3] >= full_window_ratio * client_area:
+        return CapturePlan(None, len(crops))
+    return CapturePlan(union, len(crops))
@@ -0,0 +1,208 @@
+"""Background capture thread with latest-frame double buffering.
+
+A CaptureThread keeps capturing one window at a target FPS into two
+preallocated buffers. The action thread reads the most recent complete
+buffer without waiting for PrintWindow, and every frame carries its capture
+timestamp so a matcher can ask for a minimum freshness.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from src.vision.frames import crop_frame, to_bgr, to_gray
+
+# How often the measured FPS is written to the log
+FPS_LOG_INTERVAL_SECONDS = 60.0
+
+
+class FrameInfo:
+    """Metadata of a buffered frame"""
+
+    def __init__(self, sequence, timestamp, shape):
+        self.sequence = sequence  # Increases by one per captured frame
+        self.timestamp = timestamp  # time.monotonic() when the capture finished
+        self.shape = shape
+
+    def age_ms(self):
+        return (time.monotonic() - self.timestamp) * 1000.0
+
+
+class _Buffer:
+    def __init__(self):
+        self.image = None
+        self.info = None
+        self.writes = 0  # Odd while the writer is filling the buffer
+
+
+class CaptureThread:
+    """Captures a window in the background and serves the latest frame"""
+
+    def __init__(self, window, source, fps=10.0, name=None, active=None, ring=None):
+        """
+        Args:
+            window: Window to capture
+            source: FrameSource used for capturing (resources are held by the capture thread)
+            fps: Target frames per second
+            name: Name used in logs
+            active: Optional callable; while it returns False the thread idles and frees its resources
+            ring: Optional FrameRing that every frame is also published to for consumer processes
+        """
+        self.window = window
+        self.source = source
+        self.fps = fps
+        self.name = name or str(window)
+        self.active = active
+        self.ring = ring
+        self.actual_fps = 0.0  # Measured over the last second
+        self._buffers = [_Buffer(), _Buffer()]
+        self._front = None  # Index of the buffer holding the latest complete frame
+        self._sequence = 0
+        self._min_timestamp = 0.0
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+        self._ring_overflow_logged = False
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"capture-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._running
+
+    def latest_info(self):
+        """Return FrameInfo of the latest frame, or None before the first capture"""
+        with self._condition:
+            if self._front is None:
+                return None
+            return self._buffers[self._front].info
+
+    def invalidate(self):
+        """Ignore frames captured before now, e.g. after input was sent to the window"""
+        with self._condition:
+            self._min_timestamp = time.monotonic()
+
+    def read(self, rect=None, max_age_ms=None, wait_ms=None, gray=False):
+        """Copy (a region of) the latest frame as BGR
+
+        Args:
+            rect: Optional (x, y, width, height) crop in client coordinates
+            max_age_ms: Reject frames older than this
+            wait_ms: How long to wait for a fresh enough frame (default: two frame intervals)
+            gray: Return a single-channel grayscale copy instead of BGR
+
+        Returns:
+            Tuple (image, FrameInfo), or (None, None) if no fresh frame is available
+        """
+        if wait_ms is None:
+            wait_ms = 2000.0 / self.fps if self.fps else 0.0
+        deadline = time.monotonic() + wait_ms / 1000.0
+
+        while True:
+            with self._condition:
+                while not self._is_fresh(max_age_ms):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._running:
+                        return None, None
+                    self._condition.wait(remaining)
+                buffer = self._buffers[self._front]
+                writes = buffer.writes
+                image = buffer.image
+                info = buffer.info
+
+            # Copy outside the lock; the writer only touches this buffer again after
+            # filling the other one, and the write counter detects if that happened
+            view = crop_frame(image, rect) if rect else image
+            copy = to_gray(view) if gray else to_bgr(view)
+            if copy is view:
+                copy = view.copy()
+            if buffer.writes == writes:
+                return copy, info
+
+    def _is_fresh(self, max_age_ms):
+        if self._front is None:
+            return False
+        info = self._buffers[self._front].info
+        if info.timestamp < self._min_timestamp:
+            return False
+        return max_age_ms is None or info.age_ms() <= max_age_ms
+
+    def _run(self):
+        interval = 1.0 / self.fps if self.fps else 0.0
+        frames_this_second = 0
+        second_started = time.monotonic()
+        last_log = second_started
+        try:
+            while self._running:
+                if self.active is not None and not self.active():
+                    # Paused: don't hold capture resources, they are rebuilt on resume
+                    self.source.release(self.window)
+                    self.invalidate()
+                    self.actual_fps = 0.0
+                    time.sleep(0.1)
+                    continue
+
+                started = time.monotonic()
+                if not self.source.is_valid(self.window):
+                    print(f"⚠️ Capture thread for {self.name}: window is no longer valid, stopping")
+                    break
+
+                frame = self.source.capture(self.window)
+                if frame is not None:
+                    self._publish(frame)
+                    frames_this_second += 1
+
+                now = time.monotonic()
+                if now - second_started >= 1.0:
+                    self.actual_fps = frames_this_second / (now - second_started)
+                    frames_this_second = 0
+                    second_started = now
+                if now - last_log >= FPS_LOG_INTERVAL_SECONDS:
+                    print(f"📷 Capture thread for {self.name}: {self.actual_fps:.1f} fps (target {self.fps:g})")
+                    last_log = now
+
+                sleep_for = interval - (now - started)
+                if sleep_for > 0:
+                    time.sleep(sleep_for)
+        finally:
+            self._running = False
+            with self._condition:
+                self._condition.notify_all()
+            # Capture resources belong to this thread
+            self.source.release_all()
+
+    def _publish(self, frame):
+        back_index = 1 if self._front == 0 else 0
+        buffer = self._buffers[back_index]
+
+        buffer.writes += 1
+        if buffer.image is None or buffer.image.shape != frame.shape:
+            buffer.image = np.empty(frame.shape, dtype=frame.dtype)
+        np.copyto(buffer.image, frame)
+        self._sequence += 1
+        buffer.info = FrameInfo(self._sequence, time.monotonic(), frame.shape)
+        buffer.writes += 1
+
+        with self._condition:
+            self._front = back_index
+            self._condition.notify_all()
+
+        if self.ring is not None:
+            try:
+                self.ring.write(frame, window=self.window)
+            except ValueError as e:
+                # Window grew past the ring's slots; keep capturing for the action thread
+                if not self._ring_overflow_logged:
+                    print(f"⚠️ Capture thread for {self.name}: frame not shared, {e}")
+                    self._ring_overflow_logged = True
@@ -0,0 +1,156 @@
+"""Change detection for matcher regions.
+
+Most image/OCR checks look at regions that stay the same for long stretches.
+ChangeDetector remembers a cheap signature of the pixels each action last
+evaluated, together with the result, so an unchanged region can reuse the
+result instead of running matchTemplate or tesseract again. A result also
+depends on inputs other than the pixels (e.g. the template file), which are
+passed along as a dependency key and must match as well.
+"""
+
+import hashlib
+import threading
+
+import cv2
+import numpy as np
+
+# Longest side of the thumbnail compared when a tolerance is configured
+THUMBNAIL_SIZE = 32
+
+
+class RegionSignature:
+    """Fingerprint of a region: exact digest, or a small grayscale thumbnail for tolerant compares"""
+
+    def __init__(self, shape, digest=None, thumbnail=None):
+        self.shape = shape
+        self.digest = digest
+        self.thumbnail = thumbnail
+
+    def matches(self, other, tolerance=0):
+        """Return True if both regions count as unchanged under the given tolerance"""
+        if other is None or self.shape != other.shape:
+            return False
+        if tolerance <= 0:
+            return self.digest is not None and self.digest == other.digest
+        if self.thumbnail is None or other.thumbnail is None:
+            return False
+        diff = cv2.absdiff(self.thumbnail, other.thumbnail)
+        return float(np.mean(diff)) <= tolerance
+
+
+def region_signature(frame, tolerance=0):
+    """Compute the signature of a region
+
+    Args:
+        frame: Region as numpy array
+        tolerance: 0 for a byte-exact digest, otherwise the thumbnail used for
+                   mean-absolute-difference comparison is computed instead
+
+    Returns:
+        RegionSignature
+    """
+    if tolerance <= 0:
+        data = frame if frame.flags['C_CONTIGUOUS'] else np.ascontiguousarray(frame)
+        digest = hashlib.blake2b(memoryview(data).cast('B'), digest_size=16).digest()
+        return RegionSignature(frame.shape, digest=digest)
+
+    if frame.ndim == 3:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    else:
+        gray = frame
+    h, w = gray.shape[:2]
+    scale = min(1.0, THUMBNAIL_SIZE / max(h, w))
+    size = (max(1, int(w * scale)), max(1, int(h * scale)))
+    thumbnail = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+    return RegionSignature(frame.shape, thumbnail=thumbnail)
+
+
+class _Entry:
+    def __init__(self, action):
+        self.action = action  # Guards against id() reuse after the action dict is replaced
+        self.signature = None
+        self.dependency = None
+        self.result = None
+        self.hits = 0
+        self.misses = 0
+
+
+class ChangeDetector:
+    """Last signature and result per (window, action), with hit/miss counters"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, window, action, signature, tolerance=0, dependency=None):
+        """Check whether the action's region is unchanged since its last evaluation
+
+        Args:
+            dependency: Key of the other inputs the result depends on (e.g. the template
+                        file's mtime/size); a different key never counts as unchanged
+
+        Returns:
+            Tuple (unchanged, previous_result); counts a hit or a miss
+        """
+        entry = self._entry(window, action)
+        if (entry.signature is not None and entry.dependency == dependency
+                and signature.matches(entry.signature, tolerance)):
+            entry.hits += 1
+            return True, entry.result
+        entry.misses += 1
+        return False, None
+
+    def store(self, window, action, signature, result, dependency=None):
+        """Remember the signature, dependency key and result of a fresh evaluation"""
+        entry = self._entry(window, action)
+        entry.signature = signature
+        entry.dependency = dependency
+        entry.result = result
+
+    def counters(self, window, action):
+        """Return (hits, misses) for an action on a window"""
+        with self._lock:
+            entry = self._entries.get((window, id(action)))
+        if entry is None or entry.action is not action:
+            return (0, 0)
+        return (entry.hits, entry.misses)
+
+    def stats(self, window=None):
+        """Return [(window, action, hits, misses), ...] for every tracked action, optionally for one window"""
+        with self._lock:
+            entries = list(self._entries.items())
+        return [
+            (key[0], entry.action, entry.hits, entry.misses)
+            for key, entry in entries
+            if window is None or key[0] == window
+        ]
+
+    def format_summary(self, window):
+        """One log line with how many evaluations of each action on a window were skipped as unchanged"""
+        parts = []
+        skipped = total = 0
+        for _, action, hits, misses in self.stats(window):
+            if hits + misses:
+                name = action.get("image_path") or action.get("text") or action.get("type", "?")
+                name = name.replace("\\", "/").split("/")[-1]
+                parts.append(f"{name} {hits}/{hits + misses}")
+                skipped += hits
+                total += hits + misses
+        if not total:
+            return "change detection: no checks yet"
+        return f"change detection skipped {skipped}/{total} checks ({skipped / total:.0%}): " + ", ".join(parts)
+
+    def forget(self, window):
+        """Drop every entry of a window (e.g. when its loop stops, the action list may be reloaded)"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == window]:
+                del self._entries[key]
+
+    def _entry(self, window, action):
+        key = (window, id(action))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.action is not action:
+                entry = _Entry(action)
+                self._entries[key] = entry
+        return entry
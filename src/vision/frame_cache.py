@@ -0,0 +1,81 @@
+"""Per-window, per-cycle cache of the capture planned for a pass.
+
+Several image/OCR matchers usually check the same window in one pass over
+the action list. The first one captures the planned region (see
+capture_plan.py) or the full client area and the rest crop from the cached
+frame, until an input action changes the screen or the frame gets older than
+max_age_ms. Matchers that only need grayscale share a single-channel version
+of the same frame, converted once, and color matchers share its B, G, R
+planes, split once.
+"""
+
+import time
+
+from src.vision.capture_plan import rect_contains
+
+
+class FrameCache:
+    """Holds the most recent planned frame for one window and one cycle"""
+
+    def __init__(self, max_age_ms=None, region=None):
+        self.max_age_ms = max_age_ms  # None = valid until invalidated
+        self.region = region  # (x, y, width, height) the frame covers, None = full window
+        self.hits = 0
+        self.misses = 0
+        self._frame = None
+        self._gray = None  # Grayscale version of _frame, converted on first request
+        self._planes = None  # B, G, R planes of _frame, split on first request
+        self._captured_at = 0.0
+
+    def get(self):
+        """Return the cached frame, or None if there is none or it is too old"""
+        if self._frame is not None and self.max_age_ms is not None:
+            age_ms = (time.monotonic() - self._captured_at) * 1000.0
+            if age_ms > self.max_age_ms:
+                self.invalidate()
+        if self._frame is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._frame
+
+    def covers(self, crop_area):
+        """Return True if the crop (None = full window) can be cut from the cached region"""
+        if self.region is None:
+            return True
+        return crop_area is not None and rect_contains(self.region, crop_area)
+
+    def frame_crop_area(self, crop_area):
+        """Convert a client-area crop to coordinates inside the cached frame"""
+        if self.region is None:
+            return crop_area
+        return (crop_area[0] - self.region[0], crop_area[1] - self.region[1], crop_area[2], crop_area[3])
+
+    def put(self, frame):
+        """Store a freshly captured frame of the planned region"""
+        self._frame = frame
+        self._gray = None
+        self._planes = None
+        self._captured_at = time.monotonic()
+
+    def get_gray(self):
+        """Return the grayscale version of the cached frame, or None if not converted yet"""
+        return self._gray if self._frame is not None else None
+
+    def put_gray(self, gray):
+        """Store the grayscale version of the current cached frame"""
+        self._gray = gray
+
+    def get_planes(self):
+        """Return the B, G, R planes of the cached frame, or None if not split yet"""
+        return self._planes if self._frame is not None else None
+
+    def put_planes(self, planes):
+        """Store the B, G, R planes of the current cached frame"""
+        self._planes = planes
+
+    def invalidate(self):
+        """Drop the cached frame, e.g. after input was sent to the window"""
+        self._frame = None
+        self._gray = None
+        self._planes = None
@@ -0,0 +1,287 @@
+"""Frame sources: where the action loop gets window pixels from.
+
+The action loop only talks to the FrameSource interface. Win32FrameSource
+wraps the PrintWindow/BitBlt capture contexts; other platforms plug in
+their own implementation (see x11_source.py).
+"""
+
+import platform
+import time
+from abc import ABC, abstractmethod
+
+from src.vision.capture_context import (
+    Win32CaptureBackend,
+    get_capture_context,
+    release_capture_context,
+    release_all_capture_contexts,
+)
+from src.vision.capture_methods import CaptureMethodSelector, ContextCaptureMethod
+from src.vision.frames import bgrx_view, crop_frame
+from src.vision.latency import record_latency
+from src.vision.regions import compute_source_rect
+
+
+class WindowGeometry:
+    """Client area size and position of a window"""
+
+    def __init__(self, width, height, client_x, client_y, minimized=False):
+        self.width = width  # Capture width (restore size when minimized)
+        self.height = height  # Capture height (restore size when minimized)
+        self.client_x = client_x  # Screen x of the client area's top-left corner
+        self.client_y = client_y  # Screen y of the client area's top-left corner
+        self.minimized = minimized
+
+    def screen_to_client(self, x, y):
+        """Convert screen coordinates to client-area coordinates"""
+        return x - self.client_x, y - self.client_y
+
+
+class GeometryCache:
+    """Probed window geometry per window, reused for a short time"""
+
+    def __init__(self, probe, ttl_seconds):
+        """
+        Args:
+            probe: Callable window -> WindowGeometry or None
+            ttl_seconds: How long a probed geometry is reused
+        """
+        self.probe = probe
+        self.ttl_seconds = ttl_seconds
+        self.probes = 0  # Number of times the geometry was actually probed
+        self._entries = {}  # window -> (geometry, probed_at)
+
+    def get(self, window):
+        """Return the window's geometry, probing it if missing or expired"""
+        entry = self._entries.get(window)
+        now = time.monotonic()
+        if entry is not None and now - entry[1] < self.ttl_seconds:
+            return entry[0]
+
+        geometry = self.probe(window)
+        self.probes += 1
+        if geometry is not None:
+            self._entries[window] = (geometry, now)
+        else:
+            # Don't cache failures, the window may be back on the next call
+            self._entries.pop(window, None)
+        return geometry
+
+    def invalidate(self, window=None):
+        """Forget the geometry of one window, or of every window"""
+        if window is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(window, None)
+
+
+class FrameSource(ABC):
+    """Source of window frames for the image and OCR matchers"""
+
+    # Set by finite sources (e.g. a replay) once they have no more frames
+    exhausted = False
+
+    # Seconds cached_geometry() reuses a probed geometry (0 = probe every time)
+    geometry_ttl = 0.0
+
+    @abstractmethod
+    def is_valid(self, window) -> bool:
+        """Return True if the window still exists"""
+        pass
+
+    @abstractmethod
+    def geometry(self, window) -> WindowGeometry:
+        """Return the window's client geometry, or None if it cannot be determined"""
+        pass
+
+    @abstractmethod
+    def capture(self, window, rect=None):
+        """Capture the window, or only rect (x, y, width, height) of its client area
+
+        Returns:
+            (height, width, 4) uint8 BGRX array, or None on failure. The array may be a
+            view into a buffer the source reuses for its next capture; copy it to keep it.
+        """
+        pass
+
+    def cached_geometry(self, window) -> WindowGeometry:
+        """Like geometry(), but reuses the last probe for geometry_ttl seconds
+
+        Shared by capture, crop conversion and click coordinate conversion so
+        they don't each query the window.
+        """
+        if not self.geometry_ttl:
+            return self.geometry(window)
+        cache = self.__dict__.get("_geometry_cache")
+        if cache is None:
+            cache = self._geometry_cache = GeometryCache(self.geometry, self.geometry_ttl)
+        return cache.get(window)
+
+    def invalidate_geometry(self, window=None):
+        """Drop cached geometry, e.g. when a capture came back with an unexpected size"""
+        cache = self.__dict__.get("_geometry_cache")
+        if cache is not None:
+            cache.invalidate(window)
+
+    def attach(self, window):
+        """Called once when the action loop starts on a window (e.g. to calibrate capture)"""
+        pass
+
+    def begin_cycle(self, window):
+        """Called by the action loop before each pass over the window's actions"""
+        pass
+
+    def sleep(self, seconds):
+        """Wait for a delay action or between cycles; offline sources may skip it"""
+        time.sleep(seconds)
+
+    def release(self, window):
+        """Free per-window resources held by the calling thread"""
+        pass
+
+    def release_all(self):
+        """Free every resource held by the calling thread"""
+        pass
+
+
+class Win32FrameSource(FrameSource):
+    """Captures windows with PrintWindow (works when minimized) or BitBlt for visible regions"""
+
+    geometry_ttl = 0.5
+
+    def __init__(self, selector=None):
+        """
+        Args:
+            selector: CaptureMethodSelector for full-window captures; defaults to the
+                      Win32 backend's render methods
+        """
+        if selector is None:
+            selector = CaptureMethodSelector(
+                [ContextCaptureMethod(name) for name in Win32CaptureBackend.RENDER_METHODS]
+            )
+        self.selector = selector
+
+    def attach(self, window):
+        # Pick the fastest capture method that gives the same pixels as PrintWindow
+        if not self.is_valid(window):
+            return
+        geometry = self.geometry(window)
+        if geometry is not None:
+            self.selector.calibrate(window, geometry.width, geometry.height)
+
+    def is_valid(self, window) -> bool:
+        import win32gui
+        return bool(win32gui.IsWindow(window))
+
+    def geometry(self, window) -> WindowGeometry:
+        import win32gui
+
+        if not win32gui.IsWindow(window):
+            return None
+
+        # Get client rectangle (content area of the window)
+        left, top, right, bottom = win32gui.GetClientRect(window)
+        width = right - left
+        height = bottom - top
+        minimized = False
+
+        # If client rect is zero (window is minimized), get the restore size
+        if width == 0 or height == 0:
+            minimized = True
+            try:
+                # Get window placement to find restore size
+                placement = win32gui.GetWindowPlacement(window)
+                if placement and len(placement) > 2:
+                    # placement[2] is rcNormalPosition (restore rectangle)
+                    restore_rect = placement[2]
+                    if restore_rect:
+                        # restore_rect is (left, top, right, bottom)
+                        width = restore_rect[2] - restore_rect[0]
+                        height = restore_rect[3] - restore_rect[1]
+                        if width > 0 and height > 0:
+                            print(f"ℹ️ Window is minimized, using restore size: {width}x{height}")
+
+                # If still zero, try GetWindowRect
+                if width <= 0 or height <= 0:
+                    try:
+                        left, top, right, bottom = win32gui.GetWindowRect(window)
+                        width = right - left
+                        height = bottom - top
+                    except:
+                        pass
+
+                # If still zero, we can't proceed
+                if width <= 0 or height <= 0:
+                    print(f"⚠️ Cannot determine window size (minimized or zero size)")
+                    return None
+            except Exception as e:
+                print(f"⚠️ Error getting window size: {e}")
+                return None
+
+        client_x, client_y = win32gui.ClientToScreen(window, (0, 0))
+        return WindowGeometry(width, height, client_x, client_y, minimized)
+
+    def capture(self, window, rect=None):
+        # Cached geometry also covers the validity check; a closed window fails the render
+        started = time.perf_counter()
+        geometry = self.cached_geometry(window)
+        record_latency(window, "geometry", time.perf_counter() - started)
+        if geometry is None:
+            return None
+        width, height = geometry.width, geometry.height
+
+        context = get_capture_context(window)
+
+        # Copy just the requested rectangle when possible, so capture cost scales with its size
+        if rect:
+            source_rect = compute_source_rect(rect, width, height)
+            if source_rect is not None:
+                region_bits = context.grab_region(source_rect)
+                if region_bits is not None:
+                    region = bgrx_view(region_bits, source_rect[2], source_rect[3])
+                    # An all-black region usually means the blit missed the window content
+                    if region.any():
+                        return region
+
+        # Render the window using the cached DCs/bitmap for this window, with the
+        # method calibrated for it (falls back to PrintWindow, which works even when minimized)
+        frame = self.selector.capture(window, width, height)
+        if frame is None:
+            return None  # Fast fail, no logging to avoid slowdown
+
+        # The frame is a numpy view of the raw BGRX bits, crop by slicing, no copies
+        if rect:
+            started = time.perf_counter()
+            frame = crop_frame(frame, rect)
+            record_latency(window, "crop", time.perf_counter() - started)
+        return frame
+
+    def release(self, window):
+        release_capture_context(window)
+
+    def release_all(self):
+        release_all_capture_contexts()
+
+
+_frame_source = None
+
+
+def create_default_frame_source() -> FrameSource:
+    """Create the frame source for the current platform"""
+    if platform.system() == 'Windows':
+        return Win32FrameSource()
+    from src.vision.x11_source import X11ShmFrameSource
+    return X11ShmFrameSource()
+
+
+def get_frame_source() -> FrameSource:
+    """Get the global frame source used by the action loop"""
+    global _frame_source
+    if _frame_source is None:
+        _frame_source = create_default_frame_source()
+    return _frame_source
+
+
+def set_frame_source(source: FrameSource):
+    """Replace the global frame source (e.g. with a replay or test source)"""
+    global _frame_source
+    _frame_source = source
@@ -0,0 +1,111 @@
+"""Helpers for turning raw bitmap bits into frames without extra copies.
+
+GetBitmapBits returns the window as BGRX bytes. Wrapping those bytes as a
+NumPy view and cropping by slicing means only the cropped region is ever
+copied, once, when it is converted to the layout a matcher needs.
+"""
+
+import cv2
+import numpy as np
+
+from src.vision.regions import compute_source_rect
+
+
+def bgrx_view(bits, width, height):
+    """Wrap raw BGRX bitmap bytes as a (height, width, 4) uint8 array without copying"""
+    return np.frombuffer(bits, dtype=np.uint8).reshape(height, width, 4)
+
+
+def crop_frame(frame, crop_area):
+    """Return a view of the frame limited to crop_area
+
+    Args:
+        frame: Image as numpy array (any channel count)
+        crop_area: Tuple (x, y, width, height), clamped to the frame bounds
+
+    Returns:
+        Sliced view of the frame, or the frame itself if the crop is empty
+    """
+    rect = compute_source_rect(crop_area, frame.shape[1], frame.shape[0])
+    if rect is not None:
+        x, y, width, height = rect
+        return frame[y:y+height, x:x+width]
+    return frame
+
+
+def to_bgr(frame, dst=None):
+    """Return the frame as 3-channel BGR, converting (copying) only BGRA/BGRX input
+
+    Args:
+        dst: Optional (height, width, 3) uint8 array to convert into
+    """
+    if frame.ndim == 3 and frame.shape[2] == 4:
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR, dst=dst)
+    return frame
+
+
+def to_gray(frame, dst=None):
+    """Return the frame as a single-channel image from gray, BGR or BGRA/BGRX input
+
+    Args:
+        dst: Optional (height, width) uint8 array to convert into (gray input is returned as is)
+    """
+    if frame.ndim == 2:
+        return frame
+    if frame.shape[2] == 4:
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY, dst=dst)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=dst)
+
+
+def split_planes(frame, planes=None):
+    """Return the B, G, R planes of a BGR or BGRA/BGRX frame, split in one pass
+
+    Args:
+        planes: Optional list of three (height, width) uint8 arrays to split into
+    """
+    if planes is None:
+        planes = [np.empty(frame.shape[:2], np.uint8) for _ in range(3)]
+    if frame.shape[2] == 3:
+        cv2.split(frame, planes)
+    else:
+        cv2.mixChannels([frame], planes, [0, 0, 1, 1, 2, 2])  # BGRX: skip the X channel
+    return planes
+
+
+# Integer factors supported by downscale()
+SCALE_FACTORS = (1, 2, 4, 8)
+
+
+def downscale(frame, factor, method="area", dst=None):
+    """Shrink a frame by an integer factor
+
+    The frame is first trimmed to a multiple of the factor so every output pixel
+    covers the same factor x factor block; templates downscaled the same way line
+    up with the frame's block grid.
+
+    Args:
+        frame: Image as numpy array (any channel count)
+        factor: One of SCALE_FACTORS
+        method: "area" averages each block, "stride" keeps its top-left pixel (no arithmetic)
+        dst: Optional array of the output shape (and the frame's dtype) to write the result into
+
+    Returns:
+        Downscaled image (the frame itself for factor 1), or None if the frame is smaller than one block
+    """
+    if factor == 1:
+        return frame
+    if factor not in SCALE_FACTORS:
+        raise ValueError(f"Unsupported scale factor {factor}, expected one of {SCALE_FACTORS}")
+    height = frame.shape[0] // factor
+    width = frame.shape[1] // factor
+    if height == 0 or width == 0:
+        return None
+    if method == "stride":
+        sampled = frame[:height * factor:factor, :width * factor:factor]
+        if dst is not None:
+            np.copyto(dst, sampled)
+            return dst
+        # Contiguous so OpenCV accepts it like any other frame
+        return np.ascontiguousarray(sampled)
+    trimmed = frame[:height * factor, :width * factor]
+    return cv2.resize(trimmed, (width, height), dst=dst, interpolation=cv2.INTER_AREA)
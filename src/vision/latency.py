@@ -0,0 +1,126 @@
+"""Per-window capture latency, broken down by stage.
+
+Capture code records how long each stage took (time.perf_counter deltas);
+the recorder keeps the last samples per (window, stage) and computes
+p50/p95/p99 only when someone asks. Recording is a list store and an index
+increment under the histogram's own lock (the capture thread and the action
+thread record the same window's stages), cheap enough to stay on in production.
+
+Stages:
+- geometry: GetClientRect/GetWindowPlacement/ClientToScreen (XGetWindowAttributes on X11)
+- render: PrintWindow or the region BitBlt (XShmGetImage on X11)
+- read_bits: GetBitmapBits
+- crop: Slicing the crop rectangle out of a full frame
+- convert: BGRX -> BGR conversion (the copy handed to the matchers)
+- total: The whole capture_window_screenshot call
+"""
+
+import threading
+
+import numpy as np
+
+STAGES = ("geometry", "render", "read_bits", "crop", "convert", "total")
+
+# Samples kept per (window, stage)
+WINDOW_SIZE = 1024
+
+
+class LatencyHistogram:
+    """Rolling window of the most recent latency samples of one stage"""
+
+    def __init__(self, size=WINDOW_SIZE):
+        self._samples = [0.0] * size
+        self._size = size
+        self._next = 0
+        self._lock = threading.Lock()
+        self.count = 0  # Samples recorded in total
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples[self._next] = seconds
+            self._next = (self._next + 1) % self._size
+            self.count += 1
+
+    def percentiles(self, percents=(50, 95, 99)):
+        """Return the percentiles of the current window in milliseconds, or None if empty"""
+        with self._lock:
+            filled = min(self.count, self._size)
+            samples = np.asarray(self._samples[:filled])
+        if filled == 0:
+            return None
+        return [float(value) * 1000.0 for value in np.percentile(samples, percents)]
+
+
+class LatencyRecorder:
+    """Latency histograms per window and capture stage"""
+
+    def __init__(self):
+        self._histograms = {}  # (window, stage) -> LatencyHistogram
+        self._lock = threading.Lock()
+
+    def record(self, window, stage, seconds):
+        """Record one sample; seconds is a time.perf_counter() delta"""
+        histogram = self._histograms.get((window, stage))
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault((window, stage), LatencyHistogram())
+        histogram.add(seconds)
+
+    def summary(self, window=None):
+        """Get p50/p95/p99 per stage
+
+        Args:
+            window: Window to report, or None for every window
+
+        Returns:
+            Dict window -> stage -> {"count", "p50", "p95", "p99"} (milliseconds)
+        """
+        with self._lock:
+            items = list(self._histograms.items())
+
+        result = {}
+        for (key_window, stage), histogram in items:
+            if window is not None and key_window != window:
+                continue
+            values = histogram.percentiles()
+            if values is None:
+                continue
+            result.setdefault(key_window, {})[stage] = {
+                "count": histogram.count,
+                "p50": values[0],
+                "p95": values[1],
+                "p99": values[2],
+            }
+        return result
+
+    def format_summary(self, window):
+        """One log line with p50/p95/p99 of every recorded stage of a window"""
+        stages = self.summary(window).get(window, {})
+        parts = [
+            f"{stage} {values['p50']:.2f}/{values['p95']:.2f}/{values['p99']:.2f}"
+            for stage, values in sorted(stages.items(), key=lambda item: _stage_order(item[0]))
+        ]
+        return "capture p50/p95/p99 ms: " + (", ".join(parts) if parts else "no samples")
+
+    def reset(self, window=None):
+        """Drop the samples of one window, or of every window"""
+        with self._lock:
+            for key in [key for key in self._histograms if window is None or key[0] == window]:
+                del self._histograms[key]
+
+
+def _stage_order(stage):
+    return STAGES.index(stage) if stage in STAGES else len(STAGES)
+
+
+_latency_recorder = LatencyRecorder()
+
+
+def get_latency_recorder() -> LatencyRecorder:
+    """Get the global capture latency recorder"""
+    return _latency_recorder
+
+
+def record_latency(window, stage, seconds):
+    """Record a capture stage duration for a window on the global recorder"""
+    _latency_recorder.record(window, stage, seconds)
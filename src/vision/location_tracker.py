@@ -0,0 +1,94 @@
+"""Last-known match locations for image matchers.
+
+UI elements rarely move, so an image matcher first searches a small
+neighborhood around the spot where it matched last time and only falls
+back to searching its whole region when that local search fails or scores
+worse than last time. The tracker remembers the location and confidence per
+(window, action) and counts how often the local search hits, so the margin
+can be tuned.
+"""
+
+import threading
+
+
+class _Entry:
+    def __init__(self, action):
+        self.action = action  # Guards against id() reuse after the action dict is replaced
+        self.location = None
+        self.confidence = None
+        self.hits = 0
+        self.misses = 0
+
+
+class LocationTracker:
+    """Last match location per (window, action), with local-search hit/miss counters"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def last_location(self, window, action):
+        """Return the (x, y) the action last matched at on this window, or None"""
+        return self._entry(window, action).location
+
+    def last_match(self, window, action):
+        """Return ((x, y), confidence) of the action's last match on this window, or (None, None)"""
+        entry = self._entry(window, action)
+        return entry.location, entry.confidence
+
+    def store(self, window, action, location, confidence=None):
+        """Remember where and how well the action matched (None forgets the location)"""
+        entry = self._entry(window, action)
+        entry.location = location
+        entry.confidence = confidence if location is not None else None
+
+    def record(self, window, action, hit):
+        """Count a local search as a hit (found near the last location, scoring as well as before) or a miss"""
+        entry = self._entry(window, action)
+        if hit:
+            entry.hits += 1
+        else:
+            entry.misses += 1
+
+    def counters(self, window, action):
+        """Return (hits, misses) for an action on a window"""
+        with self._lock:
+            entry = self._entries.get((window, id(action)))
+        if entry is None or entry.action is not action:
+            return (0, 0)
+        return (entry.hits, entry.misses)
+
+    def stats(self, window=None):
+        """Return [(window, action, hits, misses), ...] for every tracked action, optionally for one window"""
+        with self._lock:
+            entries = list(self._entries.items())
+        return [
+            (key[0], entry.action, entry.hits, entry.misses)
+            for key, entry in entries
+            if window is None or key[0] == window
+        ]
+
+    def format_summary(self, window):
+        """One log line with the local-search hit rate of each tracked action on a window"""
+        parts = []
+        for _, action, hits, misses in self.stats(window):
+            total = hits + misses
+            if total:
+                name = action.get("image_path", "?").replace("\\", "/").split("/")[-1]
+                parts.append(f"{name} {hits / total:.0%} ({hits}/{total})")
+        return "local search hit rate: " + (", ".join(parts) if parts else "no local searches yet")
+
+    def forget(self, window):
+        """Drop every entry of a window (e.g. when its loop stops, the action list may be reloaded)"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == window]:
+                del self._entries[key]
+
+    def _entry(self, window, action):
+        key = (window, id(action))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.action is not action:
+                entry = _Entry(action)
+                self._entries[key] = entry
+        return entry
@@ -0,0 +1,110 @@
+"""Peak extraction and overlap suppression for template-matching result maps.
+
+Matches are ranked by confidence (highest first), ties in row-major order,
+and a match is dropped when it lies within (overlap_x, overlap_y) of a
+better match that was kept: greedy non-maximum suppression. These helpers
+produce exactly that ranking with NumPy instead of Python loops over every
+above-threshold position, which matters with low thresholds where tens of
+thousands of positions pass. When only the first few matches are needed,
+find_peaks_iterative gets them with one cv2.minMaxLoc pass each.
+"""
+
+import cv2
+import numpy as np
+
+# Candidates ranked per round; later rounds only run if too few matches survive
+PEAK_CHUNK_SIZE = 512
+
+
+def suppress_overlaps(xs, ys, overlap_x, overlap_y, limit=None, keep_x=(), keep_y=()):
+    """Greedy non-maximum suppression over candidates already ranked best first
+
+    Args:
+        xs, ys: Candidate positions as integer arrays, best first
+        overlap_x, overlap_y: Candidates closer than this (on both axes) overlap
+        limit: Stop after keeping this many candidates
+        keep_x, keep_y: Positions kept earlier (better ranked) that also suppress
+
+    Returns:
+        Indices into xs/ys of the kept candidates, in rank order
+    """
+    alive = np.ones(len(xs), dtype=bool)
+    for kept_x, kept_y in zip(keep_x, keep_y):
+        alive &= (np.abs(xs - kept_x) >= overlap_x) | (np.abs(ys - kept_y) >= overlap_y)
+
+    kept = []
+    start = 0
+    while limit is None or len(kept) < limit:
+        remaining = np.flatnonzero(alive[start:])
+        if remaining.size == 0:
+            break
+        index = start + int(remaining[0])
+        kept.append(index)
+        # Everything after the kept candidate that overlaps it is out
+        alive[start:] &= (np.abs(xs[start:] - xs[index]) >= overlap_x) | (np.abs(ys[start:] - ys[index]) >= overlap_y)
+        start = index + 1
+    return kept
+
+
+def find_peaks(result, threshold, overlap_x, overlap_y, limit=None, chunk_size=PEAK_CHUNK_SIZE):
+    """Ranked, non-overlapping positions of a result map at or above the threshold
+
+    Candidates are ranked chunk by chunk: argpartition picks the best
+    chunk_size (plus every candidate tied with the last one, so the ranking
+    stays exact), they are sorted by (-value, row-major index) and suppressed
+    against each other and against the matches kept so far. Further chunks are
+    only ranked while fewer than limit matches were kept.
+
+    Returns:
+        List of (x, y, value), best first
+    """
+    flat = result.ravel()
+    indices = np.flatnonzero(flat >= threshold)
+    values = flat[indices]
+    width = result.shape[1]
+
+    peaks = []
+    kept_x, kept_y = [], []
+    while indices.size and (limit is None or len(peaks) < limit):
+        if indices.size > chunk_size:
+            cutoff = values[np.argpartition(-values, chunk_size - 1)[chunk_size - 1]]
+            take = values >= cutoff
+            chunk_indices, chunk_values = indices[take], values[take]
+            indices, values = indices[~take], values[~take]
+        else:
+            chunk_indices, chunk_values = indices, values
+            indices = indices[:0]
+
+        order = np.lexsort((chunk_indices, -chunk_values))
+        chunk_indices, chunk_values = chunk_indices[order], chunk_values[order]
+        ys, xs = np.divmod(chunk_indices, width)
+        remaining = None if limit is None else limit - len(peaks)
+        for index in suppress_overlaps(xs, ys, overlap_x, overlap_y, remaining, kept_x, kept_y):
+            peaks.append((xs[index], ys[index], chunk_values[index]))
+            kept_x.append(xs[index])
+            kept_y.append(ys[index])
+    return peaks
+
+
+def find_peaks_iterative(result, threshold, overlap_x, overlap_y, limit):
+    """Same matches as find_peaks, found by repeatedly taking the maximum
+
+    Each round takes the global maximum with cv2.minMaxLoc (the first one in
+    row-major order on ties) and blanks the overlap box around it, so the next
+    maximum is the best position not overlapping a kept match. One full pass
+    per match: cheaper than ranking every candidate when only a few matches
+    are needed. Overwrites the suppressed areas of result.
+
+    Returns:
+        List of (x, y, value), best first
+    """
+    height, width = result.shape
+    peaks = []
+    while len(peaks) < limit:
+        _, max_value, _, (x, y) = cv2.minMaxLoc(result)
+        if max_value < threshold:
+            break
+        peaks.append((x, y, result[y, x]))
+        result[max(0, y - overlap_y + 1):min(height, y + overlap_y),
+               max(0, x - overlap_x + 1):min(width, x + overlap_x)] = -np.inf
+    return peaks
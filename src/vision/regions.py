@@ -0,0 +1,23 @@
+"""Pure rectangle math shared by the capture and crop code."""
+
+
+def compute_source_rect(crop_area, width, height):
+    """Clamp a crop area to a width x height surface
+
+    Args:
+        crop_area: Tuple (x, y, width, height) relative to the window
+        width: Surface width
+        height: Surface height
+
+    Returns:
+        Tuple (x, y, width, height) fully inside the surface, or None if nothing is left
+    """
+    crop_x, crop_y, crop_width, crop_height = crop_area
+    crop_x = max(0, min(crop_x, width - 1))
+    crop_y = max(0, min(crop_y, height - 1))
+    crop_width = min(crop_width, width - crop_x)
+    crop_height = min(crop_height, height - crop_y)
+
+    if crop_width > 0 and crop_height > 0:
+        return (crop_x, crop_y, crop_width, crop_height)
+    return None
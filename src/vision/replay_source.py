@@ -0,0 +1,218 @@
+"""Replay frame source: feeds recorded frames to the action loop offline.
+
+A recording is a directory of PNGs, an .npy stack (N x H x W x 3 or 4), a
+video file or a session recording (.hcrec, see session_recorder.py). Frame
+timestamps come from a sidecar file with one timestamp in seconds per line
+(timestamps.txt inside the PNG directory, or <file>.timestamps.txt next to an
+.npy/video file), or from the session recording itself; without one they are
+derived from the fps.
+
+In real-time mode the frame shown is the one due at the wall-clock time
+since the first cycle, and delays really sleep. In fast mode every cycle
+gets the next frame and sleeps are skipped, so the cycle rate measures the
+matcher pipeline itself.
+"""
+
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from src.vision.frame_source import FrameSource, WindowGeometry
+from src.vision.frames import crop_frame
+from src.vision.session_recorder import RECORDING_EXTENSION, SessionReader
+
+
+def _read_timestamps(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return [float(line) for line in f if line.strip()]
+
+
+class _PngFrames:
+    def __init__(self, directory):
+        self.paths = sorted(glob.glob(os.path.join(directory, "*.png")))
+        self.fps = None
+
+    def __len__(self):
+        return len(self.paths)
+
+    def read(self, index):
+        return cv2.imread(self.paths[index], cv2.IMREAD_COLOR)
+
+
+class _NpyFrames:
+    def __init__(self, path):
+        # Memory-mapped, frames are only paged in when served
+        self.stack = np.load(path, mmap_mode='r')
+        self.fps = None
+
+    def __len__(self):
+        return len(self.stack)
+
+    def read(self, index):
+        return np.asarray(self.stack[index])
+
+
+class _VideoFrames:
+    def __init__(self, path):
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise ValueError(f"Could not open video: {path}")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or None
+        self.count = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self._next_index = 0
+
+    def __len__(self):
+        return self.count
+
+    def read(self, index):
+        # Decode forward from the current position; only seek when going back (looping)
+        if index < self._next_index:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+            self._next_index = index
+        while self._next_index < index:
+            self.capture.grab()
+            self._next_index += 1
+        ok, frame = self.capture.read()
+        self._next_index += 1
+        return frame if ok else None
+
+
+class _SessionFrames:
+    def __init__(self, path, window=None):
+        self.reader = SessionReader(path)
+        if window is None:
+            windows = self.reader.windows
+            window = windows[0] if windows else None
+        self.window = window
+        self.fps = None
+
+    def __len__(self):
+        return self.reader.frame_count(self.window) if self.window is not None else 0
+
+    def read(self, index):
+        # Decodes forward from the previous frame, so sequential playback applies one delta per frame
+        return self.reader.frame(self.window, index)
+
+    def timestamps(self):
+        return list(self.reader.frame_times(self.window))
+
+
+class ReplayFrameSource(FrameSource):
+    """Serves recorded frames as if they came from a window"""
+
+    def __init__(self, path, realtime=False, loop=False, fps=10.0, client_origin=(0, 0)):
+        """
+        Args:
+            path: Directory of PNGs, .npy stack, video file or session recording (first window)
+            realtime: Pace frames by their timestamps instead of one frame per cycle
+            loop: Start over at the end of the recording instead of finishing
+            fps: Frame rate used when there are no timestamps
+            client_origin: Screen position of the replayed client area, used to convert crop coordinates
+        """
+        if os.path.isdir(path):
+            self._frames = _PngFrames(path)
+            timestamps = _read_timestamps(os.path.join(path, "timestamps.txt"))
+        elif path.lower().endswith(RECORDING_EXTENSION):
+            self._frames = _SessionFrames(path)
+            timestamps = self._frames.timestamps()
+        elif path.lower().endswith(".npy"):
+            self._frames = _NpyFrames(path)
+            timestamps = _read_timestamps(path + ".timestamps.txt")
+        else:
+            self._frames = _VideoFrames(path)
+            timestamps = _read_timestamps(path + ".timestamps.txt")
+
+        if len(self._frames) == 0:
+            raise ValueError(f"No frames found in {path}")
+        if timestamps is None:
+            frame_fps = self._frames.fps or fps
+            timestamps = [index / frame_fps for index in range(len(self._frames))]
+        elif len(timestamps) != len(self._frames):
+            raise ValueError(f"{len(timestamps)} timestamps for {len(self._frames)} frames in {path}")
+
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.client_origin = client_origin
+        self.timestamps = np.asarray(timestamps, dtype=np.float64) - timestamps[0]
+        self.cycles = 0
+        self.exhausted = False
+        self._index = -1
+        self._frame = None
+        self._frame_index = None
+        self._started_at = None
+
+    def is_valid(self, window) -> bool:
+        return True
+
+    def geometry(self, window) -> WindowGeometry:
+        frame = self._current_frame()
+        if frame is None:
+            return None
+        height, width = frame.shape[:2]
+        return WindowGeometry(width, height, self.client_origin[0], self.client_origin[1])
+
+    def capture(self, window, rect=None):
+        frame = self._current_frame()
+        if frame is None:
+            return None
+        if rect:
+            frame = crop_frame(frame, rect)
+        return frame
+
+    def begin_cycle(self, window):
+        now = time.perf_counter()
+        if self._started_at is None:
+            self._started_at = now
+
+        if self.realtime:
+            elapsed = now - self._started_at
+            duration = self.timestamps[-1]
+            if elapsed > duration and not self.loop:
+                self.exhausted = True
+                return
+            if self.loop and duration > 0:
+                elapsed %= duration
+            # Last frame whose timestamp has passed
+            self._index = max(0, int(np.searchsorted(self.timestamps, elapsed, side='right')) - 1)
+        else:
+            self._index += 1
+            if self._index >= len(self.timestamps):
+                if not self.loop:
+                    self.exhausted = True
+                    self._index = len(self.timestamps) - 1
+                    return
+                self._index = 0
+        self.cycles += 1
+
+    def sleep(self, seconds):
+        # Fast mode skips waits so cycles run back to back
+        if self.realtime:
+            time.sleep(seconds)
+
+    def cycles_per_second(self):
+        """Average action-loop cycles per second since the first cycle"""
+        if self._started_at is None:
+            return 0.0
+        elapsed = time.perf_counter() - self._started_at
+        return self.cycles / elapsed if elapsed > 0 else 0.0
+
+    def _current_frame(self):
+        index = max(self._index, 0)
+        if self._frame_index != index:
+            frame = self._frames.read(index)
+            if frame is None:
+                return None
+            # Serve BGRX like a live capture
+            if frame.ndim == 2:
+                frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGRA)
+            elif frame.shape[2] == 3:
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+            self._frame = frame
+            self._frame_index = index
+        return self._frame
@@ -0,0 +1,354 @@
+"""Compact session recordings: what a window showed and which input was sent.
+
+A recording is one append-only file of records. Frames are stored as
+keyframes (the whole frame, zlib-compressed) or as deltas against the
+previous written frame of the same window: only the tiles that changed are
+stored, XORed with the previous pixels, so unchanged areas cost nothing and
+small changes compress well. Input events are stored as small JSON records next
+to the frames, all with wall-clock timestamps.
+
+SessionRecorder does the encoding, compression and writing on a background
+thread; the action thread only copies the frame into a queue, converted to
+BGR so frames from every capture path share one layout and delta against
+each other. When the writer falls behind, frames are dropped (and counted)
+rather than stalling the loop; input events are small and always queued, so
+the recording never misses one. Deltas are always taken against the last
+frame actually written.
+
+SessionReader scans the record headers once to build an index, then serves
+frames by index or by timestamp, decoding from the nearest keyframe.
+
+Layout: the magic, then records of (kind, window, timestamp_ns, length)
+followed by length payload bytes. A truncated last record (e.g. after a
+crash) is ignored by the reader.
+"""
+
+import bisect
+import json
+import queue
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from src.vision.frames import to_bgr
+
+RECORDING_EXTENSION = ".hcrec"
+
+_MAGIC = b"HCREC1\n"
+_RECORD = struct.Struct("<BqqI")  # kind, window, timestamp_ns, payload length
+_FRAME = struct.Struct("<HHBH")  # height, width, channels, tile size (0 = keyframe)
+
+_KIND_KEYFRAME = 1
+_KIND_DELTA = 2
+_KIND_EVENT = 3
+
+# Compression level: low levels are several times faster and still shrink XOR deltas well
+_ZLIB_LEVEL = 1
+
+
+def _changed_tiles(previous, frame, tile_size):
+    """Return the flat indices of the tile_size x tile_size tiles that differ"""
+    height, width = frame.shape[:2]
+    rows = -(-height // tile_size)
+    cols = -(-width // tile_size)
+    changed = np.not_equal(previous, frame)
+    if changed.ndim == 3:
+        changed = changed.any(axis=2)
+    padded = np.zeros((rows * tile_size, cols * tile_size), dtype=bool)
+    padded[:height, :width] = changed
+    return np.flatnonzero(padded.reshape(rows, tile_size, cols, tile_size).any(axis=(1, 3)))
+
+
+def _tile_slices(index, tile_size, width):
+    cols = -(-width // tile_size)
+    y = (index // cols) * tile_size
+    x = (index % cols) * tile_size
+    return slice(y, y + tile_size), slice(x, x + tile_size)
+
+
+def encode_keyframe(frame):
+    """Encode a whole frame"""
+    height, width = frame.shape[:2]
+    channels = frame.shape[2] if frame.ndim == 3 else 1
+    header = _FRAME.pack(height, width, channels, 0)
+    return header + zlib.compress(np.ascontiguousarray(frame).tobytes(), _ZLIB_LEVEL)
+
+
+def encode_delta(previous, frame, tile_size):
+    """Encode the tiles of frame that differ from previous (same shape), XORed with previous"""
+    height, width = frame.shape[:2]
+    channels = frame.shape[2] if frame.ndim == 3 else 1
+    tiles = _changed_tiles(previous, frame, tile_size)
+    parts = []
+    for index in tiles:
+        rows, cols = _tile_slices(int(index), tile_size, width)
+        parts.append(np.bitwise_xor(previous[rows, cols], frame[rows, cols]).tobytes())
+    header = _FRAME.pack(height, width, channels, tile_size) + struct.pack("<I", len(tiles))
+    return header + tiles.astype("<u4").tobytes() + zlib.compress(b"".join(parts), _ZLIB_LEVEL)
+
+
+def decode_frame(payload, previous=None):
+    """Decode a keyframe, or a delta applied to a copy of previous"""
+    height, width, channels, tile_size = _FRAME.unpack_from(payload)
+    shape = (height, width, channels) if channels > 1 else (height, width)
+    offset = _FRAME.size
+    if tile_size == 0:
+        data = zlib.decompress(payload[offset:])
+        return np.frombuffer(data, dtype=np.uint8).reshape(shape).copy()
+
+    if previous is None or previous.shape != shape:
+        raise ValueError("Delta frame without a matching previous frame")
+    (tile_count,) = struct.unpack_from("<I", payload, offset)
+    offset += 4
+    tiles = np.frombuffer(payload, dtype="<u4", count=tile_count, offset=offset)
+    offset += tile_count * 4
+    data = zlib.decompress(payload[offset:])
+
+    frame = previous.copy()
+    position = 0
+    for index in tiles:
+        rows, cols = _tile_slices(int(index), tile_size, width)
+        target = frame[rows, cols]
+        size = target.size
+        xor = np.frombuffer(data, dtype=np.uint8, count=size, offset=position).reshape(target.shape)
+        np.bitwise_xor(target, xor, out=target)
+        position += size
+    return frame
+
+
+class SessionRecorder:
+    """Writes frames and input events of a session to an append-only recording"""
+
+    def __init__(self, path, keyframe_interval=50, tile_size=32, max_queue=64):
+        """
+        Args:
+            path: Recording file; appended to if it already exists
+            keyframe_interval: Write a keyframe every this many frames per window
+            tile_size: Side of the square tiles compared for deltas
+            max_queue: Records waiting for the writer before new frames are dropped (events never are)
+        """
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.tile_size = tile_size
+        self.frames_written = 0
+        self.events_written = 0
+        self.frames_dropped = 0
+        self.bytes_written = 0
+        self.max_queue = max_queue
+        # Unbounded so events never wait; record_frame keeps the backlog at max_queue
+        self._queue = queue.Queue()
+        self._previous = {}  # window -> (last written frame, frames since its keyframe)
+        self._file = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._file = open(self.path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(_MAGIC)
+        self._thread = threading.Thread(target=self._run, name="session-recorder", daemon=True)
+        self._thread.start()
+        print(f"⏺️ Recording session to {self.path}")
+
+    def stop(self):
+        """Write everything queued so far and close the file"""
+        if self._thread is None:
+            return
+        # Everything queued before is still written
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+        self._file = None
+        print(f"⏹️ Recording stopped: {self.frames_written} frames, {self.events_written} events, "
+              f"{self.frames_dropped} frames dropped, "
+              f"{self.bytes_written / 1e6:.1f} MB")
+
+    def record_frame(self, window, frame, timestamp=None):
+        """Queue a BGR copy of a frame (gray, BGR or BGRX); drops it if the writer is behind
+
+        Returns:
+            True if the frame was queued
+        """
+        if not self.running:
+            return False
+        timestamp_ns = time.time_ns() if timestamp is None else int(timestamp * 1e9)
+        # Copy now: capture buffers are reused by the next capture. Converting BGRX copies already
+        copy = to_bgr(frame)
+        if copy is frame:
+            copy = np.array(frame, copy=True)
+        if self._queue.qsize() >= self.max_queue:
+            self.frames_dropped += 1
+            return False
+        self._queue.put(("frame", window, timestamp_ns, copy))
+        return True
+
+    def record_event(self, window, event_type, timestamp=None, **fields):
+        """Queue an input event, e.g. record_event(hwnd, "left_click", x=10, y=20)
+
+        Returns:
+            True if the event was queued (always, while recording)
+        """
+        if not self.running:
+            return False
+        timestamp_ns = time.time_ns() if timestamp is None else int(timestamp * 1e9)
+        event = dict(fields, type=event_type)
+        # Never wait for the writer (the input thread must not stall on a slow disk) and never
+        # drop: events are tiny, a writer that falls behind drops frames instead
+        self._queue.put(("event", window, timestamp_ns, event))
+        return True
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            kind, window, timestamp_ns, data = item
+            try:
+                if kind == "frame":
+                    self._write_frame(window, timestamp_ns, data)
+                else:
+                    payload = json.dumps(data).encode("utf-8")
+                    self._write_record(_KIND_EVENT, window, timestamp_ns, payload)
+                    self.events_written += 1
+            except Exception as e:
+                print(f"⚠️ Session recorder failed to write a {kind}: {e}")
+        self._file.flush()
+
+    def _write_frame(self, window, timestamp_ns, frame):
+        previous, since_keyframe = self._previous.get(window, (None, 0))
+        keyframe = (
+            previous is None
+            or previous.shape != frame.shape
+            or since_keyframe + 1 >= self.keyframe_interval
+        )
+        if keyframe:
+            payload = encode_keyframe(frame)
+            self._write_record(_KIND_KEYFRAME, window, timestamp_ns, payload)
+            since_keyframe = 0
+        else:
+            payload = encode_delta(previous, frame, self.tile_size)
+            self._write_record(_KIND_DELTA, window, timestamp_ns, payload)
+            since_keyframe += 1
+        self._previous[window] = (frame, since_keyframe)
+        self.frames_written += 1
+
+    def _write_record(self, kind, window, timestamp_ns, payload):
+        self._file.write(_RECORD.pack(kind, window, timestamp_ns, len(payload)))
+        self._file.write(payload)
+        self.bytes_written += _RECORD.size + len(payload)
+
+
+class _FrameEntry:
+    def __init__(self, offset, length, timestamp_ns, keyframe, keyframe_index):
+        self.offset = offset
+        self.length = length
+        self.timestamp_ns = timestamp_ns
+        self.keyframe = keyframe
+        self.keyframe_index = keyframe_index  # Index of the keyframe this frame decodes from
+
+
+class SessionReader:
+    """Random access to the frames and events of a recording"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        if self._file.read(len(_MAGIC)) != _MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not a session recording")
+        self._frames = {}  # window -> [_FrameEntry], in recording order
+        self._times = {}  # window -> [timestamp_ns] for bisecting
+        self.events = []  # [{"timestamp", "window", "type", ...}] in recording order
+        self._decoded = None  # (window, index, frame) of the last decoded frame
+        self._build_index()
+
+    def _build_index(self):
+        """Scan the record headers once, reading only the (small) event payloads"""
+        self._file.seek(0, 2)
+        size = self._file.tell()
+        offset = len(_MAGIC)
+        while offset + _RECORD.size <= size:
+            self._file.seek(offset)
+            kind, window, timestamp_ns, length = _RECORD.unpack(self._file.read(_RECORD.size))
+            payload_offset = offset + _RECORD.size
+            if payload_offset + length > size:
+                break  # Truncated last record
+            if kind == _KIND_EVENT:
+                event = json.loads(self._file.read(length).decode("utf-8"))
+                event["timestamp"] = timestamp_ns / 1e9
+                event["window"] = window
+                self.events.append(event)
+            elif kind in (_KIND_KEYFRAME, _KIND_DELTA):
+                entries = self._frames.setdefault(window, [])
+                keyframe = kind == _KIND_KEYFRAME
+                if not keyframe and not entries:
+                    # Delta without its keyframe (recording appended after a failure), unusable
+                    offset = payload_offset + length
+                    continue
+                keyframe_index = len(entries) if keyframe else entries[-1].keyframe_index
+                entries.append(_FrameEntry(payload_offset, length, timestamp_ns, keyframe, keyframe_index))
+                self._times.setdefault(window, []).append(timestamp_ns)
+            offset = payload_offset + length
+
+    @property
+    def windows(self):
+        """Windows that have frames in the recording"""
+        return list(self._frames)
+
+    def frame_count(self, window):
+        return len(self._frames.get(window, []))
+
+    def frame_times(self, window):
+        """Frame timestamps of a window in seconds (wall clock)"""
+        return np.asarray(self._times.get(window, []), dtype=np.float64) / 1e9
+
+    def frame(self, window, index):
+        """Decode frame number index of a window"""
+        entries = self._frames[window]
+        entry = entries[index]
+        start = entry.keyframe_index
+        frame = None
+        # Continue from the last decoded frame when it lies between the keyframe and this one
+        if self._decoded is not None:
+            decoded_window, decoded_index, decoded_frame = self._decoded
+            if decoded_window == window and start <= decoded_index <= index:
+                if decoded_index == index:
+                    return decoded_frame.copy()
+                start, frame = decoded_index + 1, decoded_frame
+        for position in range(start, index + 1):
+            frame = decode_frame(self._read_payload(entries[position]), frame)
+        self._decoded = (window, index, frame)
+        return frame.copy()
+
+    def frame_at(self, window, timestamp):
+        """Return (timestamp, frame) of the last frame shown at the given time, or (None, None)"""
+        times = self._times.get(window, [])
+        index = bisect.bisect_right(times, int(timestamp * 1e9)) - 1
+        if index < 0:
+            return None, None
+        return times[index] / 1e9, self.frame(window, index)
+
+    def events_between(self, start=None, end=None, window=None):
+        """Input events with start <= timestamp < end (seconds), optionally for one window"""
+        return [
+            event for event in self.events
+            if (start is None or event["timestamp"] >= start)
+            and (end is None or event["timestamp"] < end)
+            and (window is None or event["window"] == window)
+        ]
+
+    def close(self):
+        self._file.close()
+
+    def _read_payload(self, entry):
+        self._file.seek(entry.offset)
+        return self._file.read(entry.length)
@@ -0,0 +1,220 @@
+"""Shared-memory frame ring buffer for consumer processes.
+
+The capturing process writes frames into a fixed number of slots in one
+multiprocessing.shared_memory block; matcher/OCR processes attach by name and
+read frames as NumPy views into the slots, so no frame is ever pickled.
+
+Overwrite policy: the writer never waits. Every frame goes into the slot after
+the previous one, overwriting the oldest frame, so a slow reader loses frames
+instead of stalling capture.
+
+Torn reads: each slot has a version counter that is odd while the writer is
+filling it (a seqlock). A reader notes the version when it takes a view and
+calls RingFrame.is_valid() after using (or copying) the pixels; if the writer
+has touched the slot in between, the result must be discarded.
+
+Layout: an int64 header, one int64 metadata row per slot, then the slots,
+each aligned to 64 bytes and sized for the largest frame.
+"""
+
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_MAGIC = 0x4843524E47  # "HCRNG"
+_HEADER_FIELDS = 8  # magic, slot_count, max_height, max_width, channels, latest_sequence, reserved...
+_META_FIELDS = 8  # version, sequence, timestamp_ns, height, width, window, reserved...
+_ALIGN = 64
+
+# Header indices
+_H_MAGIC, _H_SLOTS, _H_HEIGHT, _H_WIDTH, _H_CHANNELS, _H_LATEST = range(6)
+# Slot metadata indices
+_M_VERSION, _M_SEQUENCE, _M_TIMESTAMP, _M_HEIGHT, _M_WIDTH, _M_WINDOW = range(6)
+
+
+def _aligned(size):
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class RingFrame:
+    """A frame read from the ring: a view into a slot plus the slot version it was read at"""
+
+    def __init__(self, ring, slot, version, sequence, timestamp_ns, window, image):
+        self.ring = ring
+        self.slot = slot
+        self.version = version
+        self.sequence = sequence  # Frame number assigned by the writer (starts at 1)
+        self.timestamp_ns = timestamp_ns  # time.monotonic_ns() of the capturing process
+        self.window = window
+        self.image = image  # Read-only (height, width, channels) view into shared memory
+
+    def is_valid(self):
+        """Return False if the writer has reused the slot since this frame was read"""
+        return self.ring._slot_version(self.slot) == self.version
+
+    def copy(self):
+        """Copy the pixels out of shared memory; returns None if the copy was torn"""
+        image = self.image.copy()
+        return image if self.is_valid() else None
+
+
+class FrameRing:
+    """Fixed-slot ring of frames in shared memory
+
+    Create it in the capturing process with FrameRing.create(...) and attach in
+    consumer processes with FrameRing.attach(name).
+    """
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._owner = owner
+        self.name = shm.name
+
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        if header[_H_MAGIC] != _MAGIC:
+            raise ValueError(f"Shared memory block {shm.name} is not a frame ring")
+        self._header = header
+        self.slot_count = int(header[_H_SLOTS])
+        self.max_height = int(header[_H_HEIGHT])
+        self.max_width = int(header[_H_WIDTH])
+        self.channels = int(header[_H_CHANNELS])
+
+        meta_offset = _HEADER_FIELDS * 8
+        self._meta = np.ndarray((self.slot_count, _META_FIELDS), dtype=np.int64, buffer=shm.buf, offset=meta_offset)
+        self._slot_size = _aligned(self.max_height * self.max_width * self.channels)
+        self._data_offset = _aligned(meta_offset + self.slot_count * _META_FIELDS * 8)
+        self._slots = [
+            np.ndarray((self._slot_size,), dtype=np.uint8, buffer=shm.buf, offset=self._data_offset + i * self._slot_size)
+            for i in range(self.slot_count)
+        ]
+
+    @classmethod
+    def create(cls, max_width, max_height, channels=4, slots=4, name=None):
+        """Allocate a new ring in shared memory (writer side)
+
+        Args:
+            max_width, max_height: Largest frame the ring has to hold
+            channels: Channels per pixel (4 for BGRX captures)
+            slots: Number of frames kept; readers lagging further behind lose frames
+            name: Optional shared memory name, generated if omitted
+        """
+        if slots < 2:
+            raise ValueError("A frame ring needs at least 2 slots")
+        meta_offset = _HEADER_FIELDS * 8
+        data_offset = _aligned(meta_offset + slots * _META_FIELDS * 8)
+        size = data_offset + slots * _aligned(max_height * max_width * channels)
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[_H_SLOTS] = slots
+        header[_H_HEIGHT] = max_height
+        header[_H_WIDTH] = max_width
+        header[_H_CHANNELS] = channels
+        np.ndarray((slots, _META_FIELDS), dtype=np.int64, buffer=shm.buf, offset=meta_offset)[:] = 0
+        header[_H_MAGIC] = _MAGIC  # Last, so attaching readers never see a half-initialized header
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to an existing ring by name (reader side)"""
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def latest_sequence(self):
+        """Sequence number of the newest complete frame (0 before the first write)"""
+        return int(self._header[_H_LATEST])
+
+    def write(self, frame, window=0, timestamp_ns=None):
+        """Copy a frame into the next slot, overwriting the oldest frame
+
+        Args:
+            frame: (height, width, channels) uint8 array no larger than the ring's maximum
+            window: Window the frame was captured from
+            timestamp_ns: Capture time, defaults to time.monotonic_ns()
+
+        Returns:
+            Sequence number assigned to the frame
+        """
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        if height > self.max_height or width > self.max_width or channels != self.channels:
+            raise ValueError(
+                f"Frame {width}x{height}x{channels} does not fit ring slots "
+                f"{self.max_width}x{self.max_height}x{self.channels}"
+            )
+
+        sequence = self.latest_sequence + 1
+        slot = (sequence - 1) % self.slot_count
+        meta = self._meta[slot]
+
+        meta[_M_VERSION] += 1  # Odd: slot is being written
+        size = height * width * channels
+        np.copyto(self._slots[slot][:size].reshape(frame.shape), frame)
+        meta[_M_SEQUENCE] = sequence
+        meta[_M_TIMESTAMP] = time.monotonic_ns() if timestamp_ns is None else timestamp_ns
+        meta[_M_HEIGHT] = height
+        meta[_M_WIDTH] = width
+        meta[_M_WINDOW] = window
+        meta[_M_VERSION] += 1  # Even: slot is complete
+
+        self._header[_H_LATEST] = sequence
+        return sequence
+
+    def read_latest(self):
+        """Return the newest frame as a RingFrame view, or None if nothing was written yet"""
+        for _ in range(self.slot_count):
+            sequence = self.latest_sequence
+            if sequence == 0:
+                return None
+            frame = self.read(sequence)
+            if frame is not None:
+                return frame
+        return None
+
+    def read(self, sequence):
+        """Return frame `sequence` as a RingFrame view
+
+        Returns:
+            RingFrame, or None if the frame was already overwritten, not written
+            yet, or is being written right now
+        """
+        if sequence < 1:
+            return None
+        slot = (sequence - 1) % self.slot_count
+        meta = self._meta[slot]
+        version = int(meta[_M_VERSION])
+        if version % 2:
+            return None
+        if int(meta[_M_SEQUENCE]) != sequence:
+            return None
+
+        height = int(meta[_M_HEIGHT])
+        width = int(meta[_M_WIDTH])
+        timestamp_ns = int(meta[_M_TIMESTAMP])
+        window = int(meta[_M_WINDOW])
+        shape = (height, width, self.channels) if self.channels > 1 else (height, width)
+        image = self._slots[slot][:height * width * self.channels].reshape(shape)
+        image.flags.writeable = False
+
+        # Metadata read across a concurrent write is caught here; the pixels by is_valid() later
+        if int(meta[_M_VERSION]) != version:
+            return None
+        return RingFrame(self, slot, version, sequence, timestamp_ns, window, image)
+
+    def _slot_version(self, slot):
+        return int(self._meta[slot][_M_VERSION])
+
+    def close(self):
+        """Detach from the shared memory; views into it must no longer be used"""
+        self._header = None
+        self._meta = None
+        self._slots = []
+        self._shm.close()
+
+    def unlink(self):
+        """Free the shared memory block (writer side, after every process has closed it)"""
+        if self._owner:
+            self._shm.unlink()
@@ -0,0 +1,130 @@
+"""Process-wide cache of decoded template images.
+
+Image matchers used to cv2.imread their template on every check, for every
+window. The cache decodes each file once and serves the same (read-only)
+array to all window threads until the file's mtime or size changes. Memory
+is capped with least-recently-used eviction.
+
+A template that is missing or can't be decoded is reported once; later
+lookups return None quietly until the file changes.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+
+# Decoded templates kept in memory before the least recently used ones are dropped
+MAX_TEMPLATE_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def _file_signature(path):
+    """(mtime_ns, size) of a file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def template_signature(path):
+    """(mtime_ns, size) of a template file as the cache validates it, or None if it doesn't exist"""
+    return _file_signature(os.path.abspath(path))
+
+
+def iter_template_paths(actions):
+    """Yield every image_path in an action tree, including true/false branches"""
+    for action in actions:
+        image_path = action.get("image_path")
+        if image_path:
+            yield image_path
+        for branch in ("true_actions", "false_actions"):
+            yield from iter_template_paths(action.get(branch, []))
+
+
+class _CachedTemplate:
+    def __init__(self, image, signature):
+        self.image = image
+        self.signature = signature
+
+
+class TemplateCache:
+    """Thread-safe LRU cache of templates keyed by path, invalidated by mtime and size"""
+
+    def __init__(self, max_bytes=MAX_TEMPLATE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.loads = 0
+        self._lock = threading.Lock()
+        self._templates = OrderedDict()  # path -> _CachedTemplate, least recently used first
+        self._bytes = 0
+        self._failed = {}  # path -> signature it failed at (None = missing)
+
+    def get(self, path):
+        """Return the decoded BGR template (read-only), or None if it can't be loaded"""
+        key = os.path.abspath(path)
+        signature = _file_signature(key)
+        with self._lock:
+            cached = self._templates.get(key)
+            if cached is not None and cached.signature == signature:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return cached.image
+            if key in self._failed and self._failed[key] == signature:
+                return None
+
+        if signature is None:
+            image = None
+            message = f"❌ Template image not found: {path} (matcher won't match until the file exists)"
+        else:
+            image = cv2.imread(key, cv2.IMREAD_COLOR)
+            message = f"❌ Could not decode template image: {path}"
+
+        with self._lock:
+            self._drop(key)
+            if image is None:
+                self._failed[key] = signature
+                print(message)
+                return None
+            self._failed.pop(key, None)
+            # Shared between window threads, nobody may write into it
+            image.flags.writeable = False
+            self._templates[key] = _CachedTemplate(image, signature)
+            self._bytes += image.nbytes
+            self.loads += 1
+            # Keep at least the template just loaded
+            while self._bytes > self.max_bytes and len(self._templates) > 1:
+                self._drop(next(iter(self._templates)))
+            return image
+
+    def preload(self, actions):
+        """Load every template of an action tree up front
+
+        Returns:
+            Number of templates that could not be loaded
+        """
+        failed = 0
+        for path in set(iter_template_paths(actions)):
+            if self.get(path) is None:
+                failed += 1
+        return failed
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+            self._failed.clear()
+            self._bytes = 0
+
+    def _drop(self, key):
+        cached = self._templates.pop(key, None)
+        if cached is not None:
+            self._bytes -= cached.image.nbytes
+
+
+_template_cache = TemplateCache()
+
+
+def get_template_cache() -> TemplateCache:
+    """Get the process-wide template cache"""
+    return _template_cache
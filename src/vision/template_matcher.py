@@ -0,0 +1,538 @@
+"""Compiled template matchers.
+
+A TemplateMatcher is built once per (template, threshold, scale) and holds
+everything the template side of a match needs: the (downscaled) template,
+its contiguous per-channel or grayscale planes, its size, the overlap
+distances used to suppress duplicate matches and the strategy picked from
+the threshold. Matching a screenshot then only does screenshot-side work.
+
+Pyramid mode (for full-window searches) correlates a 1/2 or 1/4 scale
+Gaussian pyramid level of the screenshot first, then runs the
+full-resolution correlation only in small windows around the coarse
+candidates. The refined values are the exhaustive values at those
+positions and every position left out scores -1, so thresholds and
+confidences mean the same as before. A match can still be lost when it
+scores below the coarse threshold at the pyramid level, which happens on
+fine detail (noise-like textures, dithering) that the downscale averages
+away, so pyramid mode is opt-in. It falls back to the exhaustive search
+when the coarse pass finds too many candidates, or fewer matches than were
+asked for; searches for every match (no limit) are always exhaustive. That
+fallback makes a search for an absent template cost the pyramid pass plus
+the exhaustive search, unless even the best coarse score is more than
+PYRAMID_ABSENT_MARGIN below the threshold.
+Pyramid mode also switches itself off for templates too small to survive
+the downscale.
+
+Color matching needs every channel to match, so a position can only pass if the template's most detailed channel
+alone passes. That channel is correlated first, and only the positions
+where it reaches the threshold are scored in every channel, directly at
+those positions (the same normalized correlation the exact check uses,
+computed in float64, so confidences can differ from OpenCV's DFT-based
+three-channel map in the sixth decimal). When the prefilter channel passes
+almost everywhere, the other two channels are correlated over the whole
+screenshot instead. Either way a search costs about one grayscale match
+plus the candidates. The screenshot is split into its channel planes in one
+pass, or the caller passes planes it already has (the action loop splits
+each cycle's frame once for all its matchers).
+
+Exact matching (thresholds of 0.999 and up) does no correlation at all. A
+position matches when no template pixel differs by more than
+EXACT_MAX_PIXEL_DIFF on any channel and the mean difference stays within
+the threshold. A few anchor pixels spread over the template are compared
+first, on the whole screenshot at once, and only the positions they all
+accept get the full pixel-by-pixel check, vectorized over chunks of
+candidates. Positions that pass it must also reach the threshold (minus
+EXACT_NCC_MARGIN) in normalized correlation, computed at those positions
+only, so a nearly flat template does not match every area of its fill color.
+
+Matchers are immutable once built and shared by all window threads; scratch
+planes and result maps come from the calling thread's buffer pool.
+"""
+
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from src.vision.buffer_pool import get_buffer_pool
+from src.vision.frames import downscale, split_planes, to_gray
+from src.vision.peaks import find_peaks, find_peaks_iterative, suppress_overlaps
+from src.vision.template_cache import get_template_cache
+
+# Strategies, picked from the threshold
+STRATEGY_EXACT = "exact"  # >= 0.999: pixel-by-pixel comparison, no correlation
+STRATEGY_COLOR = "color"  # >= 0.99: all three channels must match
+STRATEGY_GRAY = "gray"  # Lower thresholds: one grayscale match
+
+# Pyramid levels (factor 2 ** level), largest first, and the smallest template side
+# (in full-resolution pixels) each one needs so the coarse template keeps enough detail
+PYRAMID_LEVELS = ((2, 64), (1, 32))
+# Coarse positions scoring this much below the threshold are still refined
+PYRAMID_COARSE_MARGIN = 0.3
+# No exhaustive fallback when the best coarse score is this far below the threshold: the
+# template is absent (present copies scored at least threshold - 0.55 at the coarse level
+# in benchmark_matching.py, absent ones on noise down to threshold - 0.9)
+PYRAMID_ABSENT_MARGIN = 0.6
+# More candidate blobs than this and the exhaustive search is cheaper
+PYRAMID_MAX_CANDIDATES = 256
+# Extra full-resolution pixels searched around each coarse candidate
+PYRAMID_REFINE_PADDING = 2
+
+# Largest difference an exact match allows on any pixel and channel (anti-aliasing)
+EXACT_MAX_PIXEL_DIFF = 10
+# Anchor pixels on a grid x grid raster over the template, compared before the full check
+EXACT_ANCHOR_GRID = 4
+# Anchors are compared on the whole screenshot while more candidates than this remain
+EXACT_MASK_CANDIDATES = 4096
+# Candidate windows compared at once in the full check (bytes of int16 differences)
+EXACT_CHUNK_BYTES = 8 * 1024 * 1024
+# Exact matches must also reach the threshold minus this in normalized correlation (every channel)
+EXACT_NCC_MARGIN = 0.01
+
+# Color prefilter candidates are scored at their positions while they cover at most this many
+# template pixels in total (candidates x template area); beyond that correlating the other
+# two channels over the whole screenshot is cheaper
+PREFILTER_MAX_CANDIDATE_PIXELS = 2 * 1024 * 1024
+
+# Up to this many matches are found with one minMaxLoc pass each instead of ranking all candidates
+ITERATIVE_PEAK_LIMIT = 2
+
+
+def pyramid_down(image, levels, buffer_name=None):
+    """Gaussian pyramid level of an image (each level halves both sides, rounding up)
+
+    Args:
+        buffer_name: Write the levels into pooled buffers under this name instead of new arrays
+    """
+    for level in range(levels):
+        dst = None
+        if buffer_name is not None:
+            shape = ((image.shape[0] + 1) // 2, (image.shape[1] + 1) // 2) + image.shape[2:]
+            dst = get_buffer_pool().get(f"{buffer_name}_{level}", shape)
+        image = cv2.pyrDown(image, dst=dst)
+    return image
+
+
+def select_strategy(threshold):
+    if threshold >= 0.999:
+        return STRATEGY_EXACT
+    if threshold >= 0.99:
+        return STRATEGY_COLOR
+    return STRATEGY_GRAY
+
+
+class TemplateMatcher:
+    """Template-side preprocessing for one template, threshold and scale"""
+
+    def __init__(self, template, threshold=0.99, scale=1, scale_method="area", pyramid=False, name=None,
+                 prefilter=True):
+        """
+        Args:
+            template: BGR template image
+            threshold: Matching threshold (0.0 to 1.0)
+            scale: Factor screenshots are downscaled by before matching
+            scale_method: Method screenshots are downscaled with ("area" or "stride")
+            pyramid: Search coarse-to-fine when a match limit is given (ignored for templates
+                     too small to downscale and for exact matching)
+            name: Name used in logs (usually the template path)
+            prefilter: Correlate color templates on one channel first (see module docstring)
+
+        Raises:
+            ValueError: If the template is smaller than the scale factor
+        """
+        self.threshold = threshold
+        self.scale = scale
+        self.scale_method = scale_method
+        self.name = name
+        self.strategy = select_strategy(threshold)
+
+        if scale > 1:
+            template = downscale(template, scale, scale_method)
+            if template is None:
+                raise ValueError(f"Template image {name} is smaller than the scale factor {scale}")
+        self.template = template
+        self.height, self.width = template.shape[:2]
+
+        self.planes = self._template_planes(template)
+        # Exact strategy: channel-first signed copy for the full check and the anchor pixels
+        self.template_int16 = None
+        self.anchors = []
+        if self.strategy == STRATEGY_EXACT:
+            self.template_int16 = np.ascontiguousarray(template.transpose(2, 0, 1), dtype=np.int16)
+            self.anchors = self._exact_anchors(template)
+
+        # Channel with the most detail rejects the most positions on its own; None = no prefilter
+        self.prefilter_channel = None
+        if prefilter and self.strategy == STRATEGY_COLOR:
+            self.prefilter_channel = int(np.argmax([plane.std() for plane in self.planes]))
+
+        # Mean-free template with its per-channel norms, for scoring single positions
+        # (the exact check and the prefilter candidates)
+        self.template_centered = None
+        self.template_norms = None
+        if self.strategy == STRATEGY_EXACT or self.prefilter_channel is not None:
+            centered = np.stack(self.planes).astype(np.float64)
+            centered -= centered.mean(axis=(1, 2), keepdims=True)
+            self.template_centered = centered
+            self.template_norms = np.sqrt((centered * centered).sum(axis=(1, 2)))
+
+        # Matches closer than this are the same match (at least 10 pixels)
+        self.overlap_x = max(self.width // 2, 10)
+        self.overlap_y = max(self.height // 2, 10)
+
+        # Coarse template for pyramid mode; factor 0 = exhaustive search only
+        self.pyramid_level = 0
+        self.pyramid_factor = 0
+        self.coarse_planes = None
+        if pyramid and self.strategy != STRATEGY_EXACT:
+            for level, min_side in PYRAMID_LEVELS:
+                if min(self.height, self.width) >= min_side:
+                    self.pyramid_level = level
+                    self.pyramid_factor = 2 ** level
+                    self.coarse_planes = self._template_planes(pyramid_down(template, level))
+                    break
+
+    @staticmethod
+    def _exact_anchors(template):
+        """Anchor pixels as (y, x, lower, upper) color bounds, the rarest colors first
+
+        Pixels far from the template's median color are the least likely to
+        match by chance, so they reject the most positions.
+        """
+        height, width = template.shape[:2]
+        median = np.median(template.reshape(-1, 3), axis=0)
+        points = {
+            (int(y), int(x))
+            for y in np.linspace(0, height - 1, EXACT_ANCHOR_GRID)
+            for x in np.linspace(0, width - 1, EXACT_ANCHOR_GRID)
+        }
+        points = sorted(points, key=lambda p: -np.abs(template[p].astype(np.int16) - median).sum())
+        anchors = []
+        for y, x in points:
+            pixel = template[y, x].astype(np.int16)
+            lower = tuple(int(v) for v in np.clip(pixel - EXACT_MAX_PIXEL_DIFF, 0, 255))
+            upper = tuple(int(v) for v in np.clip(pixel + EXACT_MAX_PIXEL_DIFF, 0, 255))
+            anchors.append((y, x, lower, upper))
+        return anchors
+
+    def _template_planes(self, template):
+        if self.strategy == STRATEGY_GRAY:
+            return [cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)]
+        return [np.ascontiguousarray(template[:, :, channel]) for channel in range(3)]
+
+    @property
+    def match_type(self):
+        match_type = {STRATEGY_EXACT: "exact", STRATEGY_COLOR: "color", STRATEGY_GRAY: "grayscale"}[self.strategy]
+        if self.scale > 1:
+            match_type += f", {self.scale}x downscaled"
+        if self.pyramid_factor:
+            match_type += f", pyramid 1/{self.pyramid_factor}"
+        return match_type
+
+    def find_matches(self, screenshot, limit=None, planes=None):
+        """Find non-overlapping matches, best first
+
+        Args:
+            screenshot: Screenshot (BGR, or BGRA/BGRX; gray for the gray strategy), already
+                        downscaled by self.scale
+            limit: Stop after this many matches
+            planes: Optional B, G, R planes of the screenshot (views are fine) for the color
+                    strategy, so it doesn't split the screenshot itself
+
+        Returns:
+            List of (x, y, confidence), with x/y mapped back to full resolution
+        """
+        screenshot_h, screenshot_w = screenshot.shape[:2]
+        # Check if screenshot is smaller than template (can't match)
+        if screenshot_h < self.height or screenshot_w < self.width:
+            print(f"⚠️ Screenshot ({screenshot_w}x{screenshot_h}) is smaller than template ({self.width}x{self.height})")
+            return []
+        return self._find(screenshot, limit, pyramid=self.pyramid_factor > 0, planes=planes)
+
+    def find_near(self, screenshot, location, margin, limit=None, planes=None):
+        """Find matches only within margin pixels of a location (e.g. the last match)
+
+        Args:
+            screenshot: Screenshot as for find_matches
+            location: Full-resolution (x, y) to search around
+            margin: Full-resolution pixels searched on each side of the location
+            planes: Optional planes of the screenshot as for find_matches
+
+        Returns:
+            List of (x, y, confidence) like find_matches; empty if the location is
+            outside the screenshot
+        """
+        result_h, result_w = self._result_shape(screenshot)
+        x, y = location[0] // self.scale, location[1] // self.scale
+        margin = max(1, margin // self.scale)
+        x0, y0 = max(0, x - margin), max(0, y - margin)
+        x1, y1 = min(result_w, x + margin + 1), min(result_h, y + margin + 1)
+        if x0 >= x1 or y0 >= y1:
+            return []
+        window = screenshot[y0:y1 + self.height - 1, x0:x1 + self.width - 1]
+        if planes is not None:
+            planes = [plane[y0:y1 + self.height - 1, x0:x1 + self.width - 1] for plane in planes]
+        matches = self._find(window, limit, pyramid=False, planes=planes)
+        return [(mx + x0 * self.scale, my + y0 * self.scale, confidence) for mx, my, confidence in matches]
+
+    def _find(self, screenshot, limit, pyramid, planes=None):
+        if self.strategy == STRATEGY_EXACT:
+            filtered = self._suppress_ranked(self._exact_matches(screenshot), limit)
+            return [(int(x) * self.scale, int(y) * self.scale, confidence) for x, y, confidence in filtered]
+
+        if pyramid and limit is not None:
+            result, coarse_best = self._pyramid_result(screenshot)
+            if result is not None:
+                matches = self._peaks(result, limit)
+                if len(matches) >= limit or coarse_best < self.threshold - PYRAMID_ABSENT_MARGIN:
+                    return matches
+                # The coarse pass may have missed some, search everything
+
+        if self.prefilter_channel is not None:
+            result = self._prefiltered_result(screenshot, planes)
+        else:
+            result = self._correlate(self._image_planes(screenshot, "match", planes), self.planes, "match")
+        return self._peaks(result, limit)
+
+    def _peaks(self, result, limit):
+        """Non-overlapping peaks of a result map as full-resolution (x, y, confidence)"""
+        # Result-map positions always leave room for the whole template, no bounds check needed
+        if limit is not None and limit <= ITERATIVE_PEAK_LIMIT:
+            # The result map is scratch, suppression may overwrite it
+            filtered = find_peaks_iterative(result, self.threshold, self.overlap_x, self.overlap_y, limit)
+        else:
+            filtered = find_peaks(result, self.threshold, self.overlap_x, self.overlap_y, limit)
+        return [(int(x) * self.scale, int(y) * self.scale, confidence) for x, y, confidence in filtered]
+
+    def _result_shape(self, screenshot):
+        return (screenshot.shape[0] - self.height + 1, screenshot.shape[1] - self.width + 1)
+
+    def _image_planes(self, image, buffer_name=None, planes=None):
+        """Contiguous gray or per-channel planes of an image, matching the strategy
+
+        Planes come from the buffer pool under buffer_name, or are allocated when it is None.
+        Color planes the caller already has are returned as they are.
+        """
+        pool = get_buffer_pool()
+        image_h, image_w = image.shape[:2]
+        if self.strategy == STRATEGY_GRAY:
+            dst = pool.get(f"{buffer_name}_gray", (image_h, image_w)) if buffer_name else None
+            return [to_gray(image, dst=dst)]
+        if planes is not None:
+            return planes
+        if buffer_name is not None:
+            planes = [pool.get(f"{buffer_name}_plane_{channel}", (image_h, image_w)) for channel in range(3)]
+        return split_planes(image, planes)
+
+    @staticmethod
+    def _correlate(image_planes, template_planes, buffer_name=None):
+        """TM_CCOEFF_NORMED per plane, combined with the minimum (all channels must match well)"""
+        pool = get_buffer_pool()
+        image_h, image_w = image_planes[0].shape
+        template_h, template_w = template_planes[0].shape
+        result_shape = (image_h - template_h + 1, image_w - template_w + 1)
+        results = []
+        for channel, (image_plane, template_plane) in enumerate(zip(image_planes, template_planes)):
+            suffix = "gray" if len(image_planes) == 1 else channel
+            result = pool.get(f"{buffer_name}_result_{suffix}", result_shape, np.float32) if buffer_name else None
+            results.append(cv2.matchTemplate(image_plane, template_plane, cv2.TM_CCOEFF_NORMED, result=result))
+        result_combined = results[0]
+        for result in results[1:]:
+            np.minimum(result_combined, result, out=result_combined)
+        return result_combined
+
+    def _prefiltered_result(self, screenshot, planes=None):
+        """Combined result map, scoring every channel only where the prefilter channel passes
+
+        The combined score is the minimum over the channels, so only positions where
+        the prefilter channel reaches the threshold can pass. Those are rescored in
+        every channel at their position; all other positions keep their prefilter
+        score, which is below the threshold already. With too many candidates the other
+        channels are correlated over the whole screenshot instead.
+        """
+        planes = self._image_planes(screenshot, "match", planes)
+        pool = get_buffer_pool()
+        result_shape = self._result_shape(screenshot)
+        channel = self.prefilter_channel
+        result = pool.get(f"match_result_{channel}", result_shape, np.float32)
+        cv2.matchTemplate(planes[channel], self.planes[channel], cv2.TM_CCOEFF_NORMED, result=result)
+        if cv2.minMaxLoc(result)[1] < self.threshold:
+            return result
+
+        passed = np.greater_equal(result, self.threshold, out=pool.get("match_passed", result_shape, np.bool_))
+        indices = np.flatnonzero(passed)
+        if indices.size * self.height * self.width <= PREFILTER_MAX_CANDIDATE_PIXELS:
+            ys, xs = np.divmod(indices, result_shape[1])
+            windows = [np.lib.stride_tricks.sliding_window_view(plane, (self.height, self.width)) for plane in planes]
+            patches = np.stack([window[ys, xs] for window in windows], axis=1)
+            result[ys, xs] = self._normalized_correlation(patches)
+            return result
+
+        for other in range(3):
+            if other != channel:
+                scores = pool.get(f"match_result_{other}", result_shape, np.float32)
+                cv2.matchTemplate(planes[other], self.planes[other], cv2.TM_CCOEFF_NORMED, result=scores)
+                np.minimum(result, scores, out=result)
+        return result
+
+    def _pyramid_result(self, screenshot):
+        """Full-size result map with exact values around coarse candidates and -1 elsewhere
+
+        Returns:
+            Tuple (result map, best coarse score); the map is None when the exhaustive
+            search should be used instead
+        """
+        factor = self.pyramid_factor
+        coarse_h, coarse_w = self.coarse_planes[0].shape
+        screenshot_h, screenshot_w = screenshot.shape[:2]
+        if screenshot_h // factor < coarse_h or screenshot_w // factor < coarse_w:
+            return None, None
+
+        coarse = pyramid_down(screenshot, self.pyramid_level, "pyramid_level")
+        coarse_result = self._correlate(self._image_planes(coarse, "pyramid"), self.coarse_planes, "pyramid")
+        coarse_best = cv2.minMaxLoc(coarse_result)[1]
+
+        # One refine window per blob of coarse positions that could be a match
+        mask = (coarse_result >= self.threshold - PYRAMID_COARSE_MARGIN).view(np.uint8)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        if count - 1 > PYRAMID_MAX_CANDIDATES:
+            return None, coarse_best
+
+        result_h, result_w = self._result_shape(screenshot)
+        result = get_buffer_pool().get("pyramid_result", (result_h, result_w), np.float32)
+        result.fill(-1.0)
+        # A coarse hit at cx stands for full-resolution positions around cx * factor
+        radius = factor + PYRAMID_REFINE_PADDING
+        for left, top, width, height, _ in stats[1:]:
+            x0 = max(0, left * factor - radius)
+            y0 = max(0, top * factor - radius)
+            x1 = min(result_w, (left + width - 1) * factor + radius + 1)
+            y1 = min(result_h, (top + height - 1) * factor + radius + 1)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            window = screenshot[y0:y1 + self.height - 1, x0:x1 + self.width - 1]
+            result[y0:y1, x0:x1] = self._correlate(self._image_planes(window), self.planes)
+        return result, coarse_best
+
+    def _exact_matches(self, screenshot):
+        """Positions where every pixel is within EXACT_MAX_PIXEL_DIFF and the similarity reaches the threshold
+
+        Returns:
+            List of (x, y, similarity), best first (ties in row-major order), where
+            similarity = 1 - mean absolute difference / 255
+        """
+        pool = get_buffer_pool()
+        image = screenshot[:, :, :3]
+        result_h, result_w = self._result_shape(screenshot)
+
+        # Anchors on the whole screenshot while many positions pass, then on the survivors only
+        mask = None
+        indices = None
+        for y, x, lower, upper in self.anchors:
+            if indices is None:
+                view = image[y:y + result_h, x:x + result_w]
+                if mask is None:
+                    mask = cv2.inRange(view, lower, upper, dst=pool.get("exact_mask", (result_h, result_w)))
+                else:
+                    anchor_mask = cv2.inRange(view, lower, upper, dst=pool.get("exact_anchor", (result_h, result_w)))
+                    cv2.bitwise_and(mask, anchor_mask, dst=mask)
+                if cv2.countNonZero(mask) <= EXACT_MASK_CANDIDATES:
+                    indices = np.flatnonzero(mask)
+            else:
+                ys, xs = np.divmod(indices, result_w)
+                pixels = image[ys + y, xs + x]
+                indices = indices[np.all((pixels >= lower) & (pixels <= upper), axis=1)]
+            if indices is not None and indices.size == 0:
+                return []
+        if indices is None:
+            indices = np.flatnonzero(mask)
+
+        # Full check, a chunk of candidate windows at a time
+        windows = np.lib.stride_tricks.sliding_window_view(image, (self.height, self.width), axis=(0, 1))
+        chunk_size = max(1, EXACT_CHUNK_BYTES // self.template_int16.nbytes)
+        kept_indices, kept_similarities = [], []
+        for start in range(0, indices.size, chunk_size):
+            chunk = indices[start:start + chunk_size]
+            ys, xs = np.divmod(chunk, result_w)
+            diff = np.abs(windows[ys, xs].astype(np.int16) - self.template_int16)
+            # Mean absolute difference per channel, as similarity (1 = perfect match)
+            similarity = 1.0 - diff.mean(axis=(2, 3)).mean(axis=1) / 255.0
+            passed = np.flatnonzero((similarity >= self.threshold) & (diff.max(axis=(1, 2, 3)) <= EXACT_MAX_PIXEL_DIFF))
+            if passed.size:
+                correlated = self._normalized_correlation(windows[ys[passed], xs[passed]])
+                passed = passed[correlated >= self.threshold - EXACT_NCC_MARGIN]
+            kept_indices.append(chunk[passed])
+            kept_similarities.append(similarity[passed])
+        if not kept_indices:
+            return []
+        indices = np.concatenate(kept_indices)
+        similarities = np.concatenate(kept_similarities)
+        order = np.lexsort((indices, -similarities))
+        ys, xs = np.divmod(indices[order], result_w)
+        return list(zip(xs.tolist(), ys.tolist(), similarities[order]))
+
+    def _normalized_correlation(self, patches):
+        """TM_CCOEFF_NORMED of (n, 3, h, w) patches against the template, minimum over the channels
+
+        Follows OpenCV for flat input: a flat template channel scores 1 everywhere,
+        a flat patch channel scores 0 against a template channel that is not flat.
+        """
+        count = patches.shape[0]
+        area = self.height * self.width
+        scores = np.ones(count)
+        for channel in range(3):
+            if self.template_norms[channel] == 0:
+                continue
+            # One channel at a time keeps the float copy small; the template is mean-free, so
+            # the patch needs no centering for the numerator
+            plane = patches[:, channel].reshape(count, area).astype(np.float64)
+            numerators = plane @ self.template_centered[channel].ravel()
+            sums = plane.sum(axis=1)
+            variances = np.maximum(np.einsum("ni,ni->n", plane, plane) - sums * sums / area, 0.0)
+            denominators = np.sqrt(variances) * self.template_norms[channel]
+            channel_scores = np.divide(numerators, denominators, out=np.zeros(count), where=denominators > 0)
+            np.minimum(scores, channel_scores, out=scores)
+        return scores
+
+    def _suppress_ranked(self, matches, limit):
+        """Greedy non-maximum suppression over a list of (x, y, confidence), best first"""
+        if not matches:
+            return []
+        xs = np.array([match[0] for match in matches])
+        ys = np.array([match[1] for match in matches])
+        return [matches[index] for index in suppress_overlaps(xs, ys, self.overlap_x, self.overlap_y, limit)]
+
+
+_matchers = {}  # (path, threshold, scale, scale_method, pyramid) -> (template, TemplateMatcher or None)
+_matchers_lock = threading.Lock()
+
+
+def get_template_matcher(template_path, threshold=0.99, scale=1, scale_method="area", pyramid=False):
+    """Get the compiled matcher for a template, rebuilding it when the template file changed
+
+    Returns:
+        TemplateMatcher, or None if the template can't be loaded (reported once)
+    """
+    template = get_template_cache().get(template_path)
+    if template is None:
+        return None
+    key = (os.path.abspath(template_path), threshold, scale, scale_method, pyramid)
+    with _matchers_lock:
+        entry = _matchers.get(key)
+    if entry is not None and entry[0] is template:
+        return entry[1]
+
+    try:
+        matcher = TemplateMatcher(template, threshold, scale, scale_method, pyramid, name=template_path)
+    except ValueError as e:
+        print(f"⚠️ {e}")
+        matcher = None
+    with _matchers_lock:
+        _matchers[key] = (template, matcher)
+    return matcher
+
+
+def clear_template_matchers():
+    with _matchers_lock:
+        _matchers.clear()
@@ -0,0 +1,343 @@
+"""X11 frame source using the MIT-SHM extension.
+
+XShmGetImage has the X server copy window pixels straight into a shared
+memory segment mapped into this process, so no image data goes through the
+X socket. The segment is reused by the next capture of the same size, so
+capture() copies the pixels out of it: callers (the frame cache, the session
+recorder) own the frames they get, as with the Win32 source. Works on any X
+server with MIT-SHM, including Xvfb. Window handles are X window ids.
+"""
+
+import ctypes
+import ctypes.util
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from src.vision.frame_source import FrameSource, WindowGeometry
+from src.vision.latency import record_latency
+from src.vision.regions import compute_source_rect
+
+ZPIXMAP = 2
+IS_VIEWABLE = 2
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+ALL_PLANES = ctypes.c_ulong(-1).value
+
+
+class XWindowAttributes(ctypes.Structure):
+    _fields_ = [
+        ("x", ctypes.c_int), ("y", ctypes.c_int),
+        ("width", ctypes.c_int), ("height", ctypes.c_int),
+        ("border_width", ctypes.c_int), ("depth", ctypes.c_int),
+        ("visual", ctypes.c_void_p), ("root", ctypes.c_ulong),
+        ("class_", ctypes.c_int), ("bit_gravity", ctypes.c_int),
+        ("win_gravity", ctypes.c_int), ("backing_store", ctypes.c_int),
+        ("backing_planes", ctypes.c_ulong), ("backing_pixel", ctypes.c_ulong),
+        ("save_under", ctypes.c_int), ("colormap", ctypes.c_ulong),
+        ("map_installed", ctypes.c_int), ("map_state", ctypes.c_int),
+        ("all_event_masks", ctypes.c_long), ("your_event_mask", ctypes.c_long),
+        ("do_not_propagate_mask", ctypes.c_long), ("override_redirect", ctypes.c_int),
+        ("screen", ctypes.c_void_p),
+    ]
+
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong), ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p), ("readOnly", ctypes.c_int),
+    ]
+
+
+class XImage(ctypes.Structure):
+    # Only the leading fields are declared; obdata and the function table that
+    # follow are never touched from Python (the image is only used by pointer)
+    _fields_ = [
+        ("width", ctypes.c_int), ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int), ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p), ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int), ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int), ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int), ("bits_per_pixel", ctypes.c_int),
+        ("red_mask", ctypes.c_ulong), ("green_mask", ctypes.c_ulong),
+        ("blue_mask", ctypes.c_ulong),
+    ]
+
+
+class XErrorEvent(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_int), ("display", ctypes.c_void_p),
+        ("resourceid", ctypes.c_ulong), ("serial", ctypes.c_ulong),
+        ("error_code", ctypes.c_ubyte), ("request_code", ctypes.c_ubyte),
+        ("minor_code", ctypes.c_ubyte),
+    ]
+
+
+_X_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(XErrorEvent))
+
+_libs = None
+_libs_lock = threading.Lock()
+_error_state = threading.local()
+
+
+@_X_ERROR_HANDLER
+def _record_x_error(display, event):
+    # The default Xlib handler exits the process; remember the error instead.
+    # Errors are reported on the thread that made the failing request.
+    _error_state.code = event.contents.error_code
+    return 0
+
+
+def _load_libs():
+    """Load libX11, libXext and libc and declare the functions used here"""
+    global _libs
+    with _libs_lock:
+        if _libs is not None:
+            return _libs
+
+        x11 = ctypes.CDLL(ctypes.util.find_library("X11") or "libX11.so.6")
+        xext = ctypes.CDLL(ctypes.util.find_library("Xext") or "libXext.so.6")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+        x11.XInitThreads.restype = ctypes.c_int
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        x11.XDefaultRootWindow.restype = ctypes.c_ulong
+        x11.XGetWindowAttributes.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(XWindowAttributes)]
+        x11.XGetWindowAttributes.restype = ctypes.c_int
+        x11.XTranslateCoordinates.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.c_ulong, ctypes.c_int, ctypes.c_int,
+            ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_ulong),
+        ]
+        x11.XTranslateCoordinates.restype = ctypes.c_int
+        x11.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XSetErrorHandler.argtypes = [_X_ERROR_HANDLER]
+        x11.XSetErrorHandler.restype = ctypes.c_void_p
+        x11.XDestroyImage.argtypes = [ctypes.POINTER(XImage)]
+
+        xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+        xext.XShmQueryExtension.restype = ctypes.c_int
+        xext.XShmCreateImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_void_p,
+            ctypes.POINTER(XShmSegmentInfo), ctypes.c_uint, ctypes.c_uint,
+        ]
+        xext.XShmCreateImage.restype = ctypes.POINTER(XImage)
+        xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(XShmSegmentInfo)]
+        xext.XShmAttach.restype = ctypes.c_int
+        xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(XShmSegmentInfo)]
+        xext.XShmGetImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(XImage), ctypes.c_int, ctypes.c_int, ctypes.c_ulong,
+        ]
+        xext.XShmGetImage.restype = ctypes.c_int
+
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmget.restype = ctypes.c_int
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+        # Each thread opens its own display connection; Xlib still needs this
+        # before the first call when it is used from several threads
+        x11.XInitThreads()
+        x11.XSetErrorHandler(_record_x_error)
+
+        _libs = (x11, xext, libc)
+        return _libs
+
+
+class _ShmImage:
+    """An XImage backed by a shared memory segment, plus a numpy view of it"""
+
+    def __init__(self, ximage, shminfo, frame):
+        self.ximage = ximage
+        self.shminfo = shminfo
+        self.frame = frame  # (height, width, 4) BGRX view into the segment
+
+
+class X11ShmFrameSource(FrameSource):
+    """Captures X11 windows through MIT-SHM shared memory images"""
+
+    # Shared images are kept per (window, width, height); a profile only has a few crop sizes
+    MAX_IMAGES_PER_THREAD = 16
+
+    # Crop/click conversion reuses the geometry; capture still reads the live attributes
+    geometry_ttl = 0.5
+
+    def __init__(self, display_name=None):
+        self.display_name = display_name  # None = $DISPLAY
+        self._thread_state = threading.local()
+
+    def is_valid(self, window) -> bool:
+        return self._window_attributes(window) is not None
+
+    def geometry(self, window) -> WindowGeometry:
+        attributes = self._window_attributes(window)
+        if attributes is None:
+            return None
+
+        x11, _, _ = _load_libs()
+        display = self._display()
+        root_x = ctypes.c_int()
+        root_y = ctypes.c_int()
+        child = ctypes.c_ulong()
+        x11.XTranslateCoordinates(
+            display, window, x11.XDefaultRootWindow(display), 0, 0,
+            ctypes.byref(root_x), ctypes.byref(root_y), ctypes.byref(child),
+        )
+        minimized = attributes.map_state != IS_VIEWABLE
+        return WindowGeometry(attributes.width, attributes.height, root_x.value, root_y.value, minimized)
+
+    def capture(self, window, rect=None):
+        started = time.perf_counter()
+        attributes = self._window_attributes(window)
+        record_latency(window, "geometry", time.perf_counter() - started)
+        # X has no equivalent of PrintWindow, unmapped (minimized) windows have no pixels
+        if attributes is None or attributes.map_state != IS_VIEWABLE:
+            return None
+
+        source_rect = None
+        if rect:
+            source_rect = compute_source_rect(rect, attributes.width, attributes.height)
+        if source_rect is None:
+            source_rect = (0, 0, attributes.width, attributes.height)
+        x, y, width, height = source_rect
+
+        image = self._shm_image(window, attributes, width, height)
+        if image is None:
+            return None
+
+        _, xext, _ = _load_libs()
+        _error_state.code = 0
+        started = time.perf_counter()
+        ok = xext.XShmGetImage(self._display(), window, image.ximage, x, y, ALL_PLANES)
+        record_latency(window, "render", time.perf_counter() - started)
+        if not ok or _error_state.code:
+            return None
+        # The next same-size capture overwrites the segment, hand out a copy
+        return image.frame.copy()
+
+    def release(self, window):
+        images = self._images()
+        for key in [key for key in images if key[0] == window]:
+            self._destroy_image(images.pop(key))
+
+    def release_all(self):
+        images = self._images()
+        while images:
+            _, image = images.popitem()
+            self._destroy_image(image)
+        display = getattr(self._thread_state, "display", None)
+        if display:
+            x11, _, _ = _load_libs()
+            x11.XCloseDisplay(display)
+            self._thread_state.display = None
+
+    def _display(self):
+        display = getattr(self._thread_state, "display", None)
+        if not display:
+            x11, xext, _ = _load_libs()
+            name = self.display_name.encode() if self.display_name else None
+            display = x11.XOpenDisplay(name)
+            if not display:
+                raise RuntimeError(f"Cannot open X display {self.display_name or '$DISPLAY'}")
+            if not xext.XShmQueryExtension(display):
+                x11.XCloseDisplay(display)
+                raise RuntimeError("X server does not support the MIT-SHM extension")
+            self._thread_state.display = display
+        return display
+
+    def _images(self) -> OrderedDict:
+        images = getattr(self._thread_state, "images", None)
+        if images is None:
+            images = OrderedDict()
+            self._thread_state.images = images
+        return images
+
+    def _window_attributes(self, window):
+        x11, _, _ = _load_libs()
+        attributes = XWindowAttributes()
+        _error_state.code = 0
+        status = x11.XGetWindowAttributes(self._display(), window, ctypes.byref(attributes))
+        if not status or _error_state.code:
+            return None
+        return attributes
+
+    def _shm_image(self, window, attributes, width, height):
+        images = self._images()
+        key = (window, width, height)
+        image = images.get(key)
+        if image is not None:
+            images.move_to_end(key)
+            return image
+
+        image = self._create_image(attributes, width, height)
+        if image is None:
+            return None
+        images[key] = image
+        if len(images) > self.MAX_IMAGES_PER_THREAD:
+            _, oldest = images.popitem(last=False)
+            self._destroy_image(oldest)
+        return image
+
+    def _create_image(self, attributes, width, height):
+        x11, xext, libc = _load_libs()
+        display = self._display()
+
+        shminfo = XShmSegmentInfo()
+        ximage = xext.XShmCreateImage(
+            display, attributes.visual, attributes.depth, ZPIXMAP, None,
+            ctypes.byref(shminfo), width, height,
+        )
+        if not ximage:
+            return None
+        if ximage.contents.bits_per_pixel != 32:
+            print(f"⚠️ Unsupported X visual: {ximage.contents.bits_per_pixel} bits per pixel (need 32)")
+            x11.XDestroyImage(ximage)
+            return None
+
+        bytes_per_line = ximage.contents.bytes_per_line
+        shminfo.shmid = libc.shmget(IPC_PRIVATE, bytes_per_line * height, IPC_CREAT | 0o600)
+        if shminfo.shmid < 0:
+            x11.XDestroyImage(ximage)
+            return None
+        address = libc.shmat(shminfo.shmid, None, 0)
+        if address is None or address == ctypes.c_void_p(-1).value:
+            libc.shmctl(shminfo.shmid, IPC_RMID, None)
+            x11.XDestroyImage(ximage)
+            return None
+        shminfo.shmaddr = address
+        shminfo.readOnly = 0
+        ximage.contents.data = address
+
+        _error_state.code = 0
+        attached = xext.XShmAttach(display, ctypes.byref(shminfo))
+        x11.XSync(display, 0)
+        # Once both sides are attached the segment can be marked for removal,
+        # it then disappears automatically when the last user detaches (or dies)
+        libc.shmctl(shminfo.shmid, IPC_RMID, None)
+        if not attached or _error_state.code:
+            libc.shmdt(address)
+            x11.XDestroyImage(ximage)
+            return None
+
+        # 32 bpp ZPixmap on a little-endian TrueColor visual is laid out as B, G, R, X
+        buffer = (ctypes.c_ubyte * (bytes_per_line * height)).from_address(address)
+        rows = np.frombuffer(buffer, dtype=np.uint8).reshape(height, bytes_per_line)
+        frame = rows[:, :width * 4].reshape(height, width, 4)
+        frame.flags.writeable = False
+        return _ShmImage(ximage, shminfo, frame)
+
+    def _destroy_image(self, image):
+        x11, xext, libc = _load_libs()
+        display = self._display()
+        image.frame = None
+        xext.XShmDetach(display, ctypes.byref(image.shminfo))
+        # XDestroyImage on a shm image frees only the XImage struct, not the segment
+        x11.XDestroyImage(image.ximage)
+        libc.shmdt(image.shminfo.shmaddr)
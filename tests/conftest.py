@@ -0,0 +1,124 @@
+"""Shared fixtures. Tests run from the repository root (python -m pytest)."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.vision import capture_context
+from src.vision.capture_context import CaptureBackend
+from src.vision.capture_methods import CaptureMethodSelector, ContextCaptureMethod
+from src.vision.frame_source import Win32FrameSource, WindowGeometry, get_frame_source, set_frame_source
+
+
+class FakeSurface:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.released = False
+
+
+class FakeBackend(CaptureBackend):
+    """Renders a deterministic BGRX pattern and counts the platform calls"""
+
+    RENDER_METHODS = ("full", "fast")
+
+    def __init__(self, frame=None):
+        self.frame = frame  # (height, width, 4) window content; None = pattern of the requested size
+        self.created = []
+        self.released = []
+        self.renders = 0
+        self.blits = 0
+        self.blit_ok = True
+        self.fail_render = False
+
+    def create_surface(self, hwnd, width, height):
+        surface = FakeSurface(width, height)
+        surface.bits = b""
+        self.created.append(surface)
+        return surface
+
+    def render(self, hwnd, surface, method=None):
+        if self.fail_render:
+            raise OSError("stale DC")
+        self.renders += 1
+        surface.bits = self._content(surface.width, surface.height)[:surface.height, :surface.width].tobytes()
+        return True
+
+    def blit_region(self, hwnd, surface, rect):
+        if not self.blit_ok:
+            return False
+        self.blits += 1
+        x, y, width, height = rect
+        content = self._content(x + width, y + height)
+        surface.bits = np.ascontiguousarray(content[y:y+height, x:x+width]).tobytes()
+        return True
+
+    def read_bits(self, surface):
+        return surface.bits
+
+    def release_surface(self, hwnd, surface):
+        surface.released = True
+        self.released.append(surface)
+
+    def _content(self, width, height):
+        if self.frame is not None:
+            return self.frame
+        return window_pattern(width, height)
+
+
+def window_pattern(width, height):
+    """BGRX test image where every pixel is different from its neighbours"""
+    y, x = np.mgrid[0:height, 0:width]
+    return np.dstack([x % 256, y % 256, (x * 7 + y * 13) % 256, np.full_like(x, 255)]).astype(np.uint8)
+
+
+class FakeWin32Source(Win32FrameSource):
+    """Win32FrameSource with the window queries faked; set width/height to resize the window"""
+
+    geometry_ttl = 0
+
+    def __init__(self, width, height):
+        super().__init__(CaptureMethodSelector([ContextCaptureMethod("full")]))
+        self.width = width
+        self.height = height
+        self.geometry_calls = 0
+        self.captures = 0
+
+    def capture(self, window, rect=None):
+        self.captures += 1
+        return super().capture(window, rect)
+
+    def is_valid(self, window):
+        return True
+
+    def geometry(self, window):
+        self.geometry_calls += 1
+        return WindowGeometry(self.width, self.height, 0, 0)
+
+
+@pytest.fixture
+def fake_backend():
+    return FakeBackend()
+
+
+@pytest.fixture
+def installed_backend(monkeypatch):
+    """FakeBackend used by every capture context until the test ends"""
+    backend = FakeBackend()
+    monkeypatch.setattr(capture_context, "_backend_factory", lambda: backend)
+    yield backend
+    capture_context.release_all_capture_contexts()
+
+
+@pytest.fixture
+def fake_win32_source(installed_backend):
+    """320x200 FakeWin32Source installed as the global frame source"""
+    source = FakeWin32Source(320, 200)
+    previous = get_frame_source()
+    set_frame_source(source)
+    yield source
+    set_frame_source(previous)
@@ -0,0 +1,101 @@
+import tracemalloc
+
+import cv2
+import numpy as np
+import pytest
+
+from src import action_loop
+from src.vision.buffer_pool import BufferPool, get_buffer_pool
+from src.vision.frame_source import FrameSource, WindowGeometry, get_frame_source, set_frame_source
+
+WIDTH, HEIGHT = 640, 480
+WINDOW = -3
+WARMUP_CYCLES = 3
+CYCLES = 10
+
+
+class StaticFrameSource(FrameSource):
+    """Serves one preallocated BGRX frame, like a capture that reuses its bitmap"""
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    def is_valid(self, window):
+        return True
+
+    def geometry(self, window):
+        return WindowGeometry(WIDTH, HEIGHT, 0, 0)
+
+    def capture(self, window, rect=None):
+        return action_loop.crop_frame(self.frame, rect) if rect else self.frame
+
+
+def test_pool_reuses_buffers_per_key():
+    pool = BufferPool()
+    first = pool.get("a", (4, 4))
+    assert pool.get("a", (4, 4)) is first
+    assert pool.get("a", (4, 5)) is not first
+    assert pool.get("b", (4, 4)) is not first
+    assert pool.get("a", (4, 4), np.float32) is not first
+    assert pool.allocations == 4
+
+
+def test_pool_evicts_least_recently_used():
+    pool = BufferPool()
+    first = pool.get("first", (2, 2))
+    for index in range(BufferPool.MAX_BUFFERS):
+        pool.get(f"other{index}", (2, 2))
+    assert pool.get("first", (2, 2)) is not first
+
+
+def test_disabled_pool_hands_out_fresh_arrays():
+    pool = BufferPool()
+    pool.enabled = False
+    assert pool.get("a", (4, 4)) is not pool.get("a", (4, 4))
+    assert pool.allocations == 0
+
+
+@pytest.fixture
+def window(tmp_path):
+    rng = np.random.default_rng(0)
+    frame = np.ascontiguousarray(rng.integers(0, 256, (HEIGHT, WIDTH, 4), dtype=np.uint8))
+    template_path = str(tmp_path / "template.png")
+    cv2.imwrite(template_path, frame[220:260, 330:390, :3])
+    previous = get_frame_source()
+    set_frame_source(StaticFrameSource(frame))
+    yield template_path
+    set_frame_source(previous)
+
+
+# Match locations are relative to the crop
+@pytest.mark.parametrize("crop_area, threshold, gray, location", [
+    (None, 0.99, False, (330, 220)),
+    ((300, 200, 200, 150), 0.99, False, (30, 20)),
+    ((300, 200, 200, 150), 0.90, True, (30, 20)),
+    (None, 0.999, False, (330, 220)),
+])
+def test_steady_state_cycles_allocate_no_pool_buffers(window, crop_area, threshold, gray, location):
+    pool = get_buffer_pool()
+
+    def cycle():
+        screenshot = action_loop.capture_window_screenshot(WINDOW, crop_area, gray=gray)
+        return action_loop.match_template_image(screenshot, window, 1, threshold)
+
+    for _ in range(WARMUP_CYCLES):
+        assert cycle() == location
+    allocations = pool.allocations
+
+    tracemalloc.start()
+    try:
+        peaks = []
+        for _ in range(CYCLES):
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            assert cycle() == location
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    assert pool.allocations == allocations
+    # Nothing frame-sized is allocated per cycle any more
+    assert max(peaks) < WIDTH * HEIGHT // 4
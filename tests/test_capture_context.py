@@ -0,0 +1,55 @@
+import pytest
+
+from src.vision.capture_context import CaptureContext
+
+
+def test_grab_reuses_surface_for_same_size(fake_backend):
+    context = CaptureContext(1, fake_backend)
+    for _ in range(5):
+        assert len(context.grab(64, 48)) == 64 * 48 * 4
+    assert context.rebuild_count == 1
+    assert fake_backend.renders == 5
+    assert fake_backend.released == []
+
+
+def test_grab_rebuilds_surface_when_size_changes(fake_backend):
+    context = CaptureContext(1, fake_backend)
+    context.grab(64, 48)
+    context.grab(80, 48)
+    assert context.rebuild_count == 2
+    assert context.size == (80, 48)
+    assert fake_backend.released == [fake_backend.created[0]]
+
+
+def test_failed_render_releases_surface_and_recovers(fake_backend):
+    context = CaptureContext(1, fake_backend)
+    context.grab(64, 48)
+    fake_backend.fail_render = True
+    with pytest.raises(OSError):
+        context.grab(64, 48)
+    assert fake_backend.created[0].released
+    fake_backend.fail_render = False
+    assert context.grab(64, 48) is not None
+    assert context.rebuild_count == 2
+
+
+def test_region_surfaces_are_kept_per_size_and_bounded(fake_backend):
+    context = CaptureContext(1, fake_backend)
+    context.grab_region((0, 0, 10, 10))
+    context.grab_region((5, 5, 10, 10))
+    assert context.rebuild_count == 1
+    for size in range(11, 11 + CaptureContext.MAX_REGION_SURFACES):
+        context.grab_region((0, 0, size, size))
+    # The 10x10 surface was the least recently used one
+    assert fake_backend.created[0].released
+    assert len(fake_backend.released) == 1
+
+
+def test_release_frees_every_surface(fake_backend):
+    context = CaptureContext(1, fake_backend)
+    context.grab(64, 48)
+    context.grab_region((0, 0, 10, 10))
+    context.release()
+    assert all(surface.released for surface in fake_backend.created)
+    context.grab(64, 48)
+    assert context.rebuild_count == 3
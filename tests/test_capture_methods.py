@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from conftest import window_pattern
+from src.vision.capture_methods import CaptureMethod, CaptureMethodSelector
+
+WIDTH, HEIGHT = 64, 48
+
+
+class FakeMethod(CaptureMethod):
+    def __init__(self, name, delay=0.0, frame="pattern"):
+        self.name = name
+        self.delay = delay  # Simulated capture time added by the fake clock
+        self.frame = frame  # "pattern", "black", "different", "raise" or None
+        self.calls = 0
+
+    def capture(self, window, width, height):
+        self.calls += 1
+        _clock.now += self.delay
+        if self.frame == "raise":
+            raise OSError("stale handle")
+        if self.frame is None:
+            return None
+        if self.frame == "black":
+            return np.zeros((height, width, 4), dtype=np.uint8)
+        frame = window_pattern(width, height)
+        if self.frame == "different":
+            frame = 255 - frame
+        return frame
+
+
+class _Clock:
+    now = 0.0
+
+
+_clock = _Clock()
+
+
+@pytest.fixture(autouse=True)
+def fake_clock(monkeypatch):
+    from src.vision import capture_methods
+
+    _clock.now = 0.0
+    monkeypatch.setattr(capture_methods.time, "perf_counter", lambda: _clock.now)
+    monkeypatch.setattr(capture_methods.time, "monotonic", lambda: _clock.now)
+
+
+def test_calibration_picks_fastest_method_with_matching_pixels():
+    methods = [FakeMethod("full", 0.030), FakeMethod("print", 0.010), FakeMethod("blit", 0.001, "different")]
+    selector = CaptureMethodSelector(methods)
+    assert selector.calibrate(1, WIDTH, HEIGHT) == ["print", "full", "blit"]
+    assert selector.selected(1) == "print"
+
+
+def test_black_or_failing_methods_are_tried_last():
+    methods = [FakeMethod("full", 0.030), FakeMethod("print", 0.010, "black"), FakeMethod("blit", 0.001, "raise")]
+    selector = CaptureMethodSelector(methods)
+    assert selector.calibrate(1, WIDTH, HEIGHT) == ["full", "print", "blit"]
+
+
+def test_capture_calibrates_on_first_use_and_uses_selection():
+    fast = FakeMethod("fast", 0.001)
+    selector = CaptureMethodSelector([FakeMethod("full", 0.030), fast])
+    frame = selector.capture(1, WIDTH, HEIGHT)
+    assert frame.shape == (HEIGHT, WIDTH, 4)
+    assert selector.selected(1) == "fast"
+    calls = fast.calls
+    selector.capture(1, WIDTH, HEIGHT)
+    assert fast.calls == calls + 1
+
+
+@pytest.mark.parametrize("failure", ["black", "raise", None])
+def test_failing_selected_method_falls_back_and_is_demoted(failure):
+    full, fast = FakeMethod("full", 0.030), FakeMethod("fast", 0.001)
+    selector = CaptureMethodSelector([full, fast])
+    selector.calibrate(1, WIDTH, HEIGHT)
+    fast.frame = failure
+    frame = selector.capture(1, WIDTH, HEIGHT)
+    assert np.array_equal(frame, window_pattern(WIDTH, HEIGHT))
+    assert selector.selected(1) == "full"
+
+
+def test_recalibration_gives_dropped_methods_another_chance():
+    full, fast = FakeMethod("full", 0.030), FakeMethod("fast", 0.001)
+    selector = CaptureMethodSelector([full, fast])
+    selector.calibrate(1, WIDTH, HEIGHT)
+    fast.frame = "black"
+    selector.capture(1, WIDTH, HEIGHT)
+    fast.frame = "pattern"
+    _clock.now += CaptureMethodSelector.RECALIBRATE_SECONDS
+    selector.capture(1, WIDTH, HEIGHT)
+    assert selector.selected(1) == "fast"
+
+
+def test_black_window_still_returns_a_frame():
+    selector = CaptureMethodSelector([FakeMethod("full", 0.030, "black")])
+    frame = selector.capture(1, WIDTH, HEIGHT)
+    assert frame is not None and not frame.any()
+
+
+def test_forget_drops_the_calibration():
+    selector = CaptureMethodSelector([FakeMethod("full")])
+    selector.calibrate(1, WIDTH, HEIGHT)
+    selector.forget(1)
+    assert selector.selected(1) is None
+
+
+def test_process_loop_forgets_the_calibration(fake_win32_source, monkeypatch):
+    from src import action_loop
+
+    calibrated = []
+    monkeypatch.setattr(action_loop, "_run_action_cycles",
+                        lambda name, hwnd, actions: calibrated.append(hwnd in fake_win32_source.selector._selections))
+    action_loop.loop_for_process("test", 5, [])
+    action_loop.running_flags.pop(5, None)
+    assert calibrated == [True]
+    assert 5 not in fake_win32_source.selector._selections
@@ -0,0 +1,70 @@
+import numpy as np
+
+from src.vision.capture_plan import (
+    action_crop_area,
+    plan_cycle_capture,
+    rect_contains,
+    rect_union,
+)
+from src.vision.frame_cache import FrameCache
+from src.vision.frame_source import WindowGeometry
+
+# Client area at screen (100, 50)
+GEOMETRY = WindowGeometry(800, 600, 100, 50)
+
+
+def matcher(x, y, width, height, action_type="image_matcher", **fields):
+    action = {"type": action_type, "crop_x": x + 100, "crop_y": y + 50, "crop_width": width, "crop_height": height}
+    action.update(fields)
+    return action
+
+
+def test_rect_helpers():
+    assert rect_union([(10, 10, 10, 10), (30, 5, 5, 5)]) == (10, 5, 25, 15)
+    assert rect_contains((0, 0, 100, 100), (10, 10, 90, 90))
+    assert not rect_contains((0, 0, 100, 100), (10, 10, 91, 90))
+
+
+def test_crop_area_in_client_coordinates_and_clamped():
+    assert action_crop_area(matcher(10, 20, 30, 40), GEOMETRY) == (10, 20, 30, 40)
+    assert action_crop_area(matcher(780, 590, 50, 50), GEOMETRY) == (780, 590, 20, 10)
+    assert action_crop_area(matcher(10, 20, 30, 40, use_full_screen=True), GEOMETRY) is None
+    assert action_crop_area({"type": "image_matcher"}, GEOMETRY) is None
+    minimized = WindowGeometry(800, 600, 100, 50, minimized=True)
+    assert action_crop_area(matcher(10, 20, 30, 40), minimized) is None
+
+
+def test_union_of_small_crops():
+    actions = [matcher(10, 10, 50, 50), {"type": "delay", "ms": 10}, matcher(100, 80, 40, 20, "ocr_matcher")]
+    plan = plan_cycle_capture(actions, GEOMETRY)
+    assert plan.region == (10, 10, 130, 90)
+    assert plan.matcher_count == 2
+
+
+def test_no_plan_for_a_single_matcher():
+    actions = [matcher(10, 10, 50, 50), matcher(100, 80, 40, 20, enabled=False)]
+    assert plan_cycle_capture(actions, GEOMETRY) is None
+
+
+def test_full_window_when_union_is_large_or_a_matcher_needs_it():
+    assert plan_cycle_capture([matcher(0, 0, 10, 10), matcher(700, 500, 100, 100)], GEOMETRY).region is None
+    assert plan_cycle_capture([matcher(0, 0, 10, 10), {"type": "image_matcher"}], GEOMETRY).region is None
+    assert plan_cycle_capture([matcher(0, 0, 10, 10), matcher(20, 0, 10, 10)], None).region is None
+
+
+def test_nested_matchers_are_not_planned():
+    nested = matcher(10, 10, 50, 50, true_actions=[matcher(500, 400, 10, 10)])
+    assert plan_cycle_capture([nested, matcher(60, 10, 10, 10)], GEOMETRY).region == (10, 10, 60, 50)
+
+
+def test_frame_cache_hands_out_sub_views_of_the_planned_region():
+    cache = FrameCache(region=(10, 10, 130, 90))
+    assert cache.covers((20, 30, 10, 10))
+    assert not cache.covers((0, 0, 10, 10))
+    assert not cache.covers(None)
+    assert cache.frame_crop_area((20, 30, 10, 10)) == (10, 20, 10, 10)
+    frame = np.zeros((90, 130, 4), dtype=np.uint8)
+    cache.put(frame)
+    assert cache.get() is frame
+    cache.invalidate()
+    assert cache.get() is None
@@ -0,0 +1,188 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src import action_loop
+from src.vision import capture_thread as capture_thread_module
+from src.vision.capture_thread import CaptureThread
+from src.vision.frame_source import FrameSource, WindowGeometry
+from src.vision.shm_ring import FrameRing
+
+WINDOW = -6
+WIDTH, HEIGHT = 64, 48
+
+
+class CountingSource(FrameSource):
+    """Uniform BGRX frames whose value is the capture number"""
+
+    def __init__(self):
+        self.captures = 0
+        self.released_all = 0
+
+    def is_valid(self, window):
+        return True
+
+    def geometry(self, window):
+        return WindowGeometry(WIDTH, HEIGHT, 0, 0)
+
+    def capture(self, window, rect=None):
+        self.captures += 1
+        frame = np.full((HEIGHT, WIDTH, 4), self.captures % 256, dtype=np.uint8)
+        return action_loop.crop_frame(frame, rect) if rect else frame
+
+    def release_all(self):
+        self.released_all += 1
+
+
+def frame(value):
+    return np.full((HEIGHT, WIDTH, 4), value, dtype=np.uint8)
+
+
+@pytest.fixture
+def thread():
+    """A CaptureThread that is fed by the test instead of its own loop"""
+    capture_thread = CaptureThread(WINDOW, CountingSource(), fps=100)
+    capture_thread._running = True
+    yield capture_thread
+    capture_thread._running = False
+
+
+def test_read_returns_the_latest_frame(thread):
+    assert thread.read(wait_ms=0) == (None, None)
+    thread._publish(frame(1))
+    thread._publish(frame(2))
+    image, info = thread.read(wait_ms=0)
+    assert info.sequence == 2
+    assert image.shape == (HEIGHT, WIDTH, 3)
+    assert (image == 2).all()
+
+
+def test_stale_frame_falls_back_to_a_synchronous_capture(thread, monkeypatch):
+    source = CountingSource()
+    monkeypatch.setattr(action_loop, "get_frame_source", lambda: source)
+    thread._publish(frame(7))
+    thread._buffers[thread._front].info.timestamp -= 1.0
+    assert thread.read(max_age_ms=100, wait_ms=0) == (None, None)
+
+    action_loop.capture_threads[WINDOW] = thread
+    try:
+        screenshot = action_loop.capture_window_screenshot(WINDOW, max_age_ms=100)
+    finally:
+        action_loop.capture_threads.pop(WINDOW, None)
+    assert source.captures == 1
+    assert (screenshot == 1).all()
+
+
+def test_invalidate_waits_for_a_newer_frame(thread):
+    thread._publish(frame(1))
+    thread.invalidate()
+    assert thread.read(wait_ms=0) == (None, None)
+    time.sleep(0.001)
+    thread._publish(frame(2))
+    image, info = thread.read(wait_ms=0)
+    assert info.sequence == 2
+    assert (image == 2).all()
+
+
+def test_read_retries_when_the_writer_laps_it(thread, monkeypatch):
+    thread._publish(frame(1))
+    to_bgr = capture_thread_module.to_bgr
+    laps = []
+
+    def to_bgr_while_writing(view, dst=None):
+        if not laps:
+            # The writer fills the other buffer, then the one being copied
+            laps.append(True)
+            thread._publish(frame(2))
+            thread._publish(frame(3))
+        return to_bgr(view, dst)
+
+    monkeypatch.setattr(capture_thread_module, "to_bgr", to_bgr_while_writing)
+    image, info = thread.read(wait_ms=0)
+    assert info.sequence == 3
+    assert (image == 3).all()
+
+
+def test_concurrent_reads_never_mix_frames(thread):
+    stop = threading.Event()
+
+    def writer():
+        value = 0
+        while not stop.is_set():
+            value = (value + 1) % 256
+            thread._publish(frame(value))
+
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    writer_thread.start()
+    try:
+        reads = 0
+        deadline = time.monotonic() + 0.5
+        while time.monotonic() < deadline:
+            image, _ = thread.read(wait_ms=100)
+            if image is not None:
+                assert (image == image[0, 0, 0]).all()
+                reads += 1
+        assert reads
+    finally:
+        stop.set()
+        writer_thread.join(1)
+
+
+def test_stop_joins_and_releases_capture_resources():
+    source = CountingSource()
+    capture_thread = CaptureThread(WINDOW, source, fps=200)
+    capture_thread.start()
+    image, _ = capture_thread.read(wait_ms=1000)
+    assert image is not None
+    capture_thread.stop()
+    assert not capture_thread._thread.is_alive()
+    assert not capture_thread.running
+    assert source.released_all == 1
+    # Readers don't wait for frames that will never come
+    capture_thread.invalidate()
+    started = time.monotonic()
+    assert capture_thread.read(wait_ms=1000) == (None, None)
+    assert time.monotonic() - started < 0.5
+
+
+def test_frames_are_shared_through_the_ring_when_enabled(monkeypatch):
+    source = CountingSource()
+    monkeypatch.setattr(action_loop, "get_frame_source", lambda: source)
+    monkeypatch.setattr(action_loop, "CAPTURE_SHARED_RING_SLOTS", 3)
+    action_loop.running_flags[WINDOW] = True
+    try:
+        action_loop.start_capture_thread("test", WINDOW, 200)
+        image, _ = action_loop.capture_threads[WINDOW].read(wait_ms=1000)
+        assert image is not None
+        reader = FrameRing.attach(action_loop.get_frame_ring_name(WINDOW))
+        try:
+            # The ring is written after the frame is handed to the action thread
+            deadline = time.monotonic() + 1.0
+            latest = reader.read_latest()
+            while latest is None and time.monotonic() < deadline:
+                time.sleep(0.001)
+                latest = reader.read_latest()
+            assert latest is not None and latest.window == WINDOW
+            assert latest.image.shape == (HEIGHT, WIDTH, 4)
+        finally:
+            reader.close()
+    finally:
+        action_loop.stop_capture_thread(WINDOW)
+        action_loop.running_flags.pop(WINDOW, None)
+    assert WINDOW not in action_loop.frame_rings
+    with pytest.raises(FileNotFoundError):
+        FrameRing.attach(action_loop.get_frame_ring_name(WINDOW))
+
+
+def test_frames_too_large_for_the_ring_are_not_shared(thread):
+    thread.ring = FrameRing.create(WIDTH // 2, HEIGHT, slots=2)
+    try:
+        thread._publish(frame(1))
+        assert thread.ring.read_latest() is None
+        image, _ = thread.read(wait_ms=0)
+        assert (image == 1).all()
+    finally:
+        thread.ring.close()
+        thread.ring.unlink()
@@ -0,0 +1,80 @@
+import os
+
+import cv2
+import numpy as np
+
+from src import action_loop
+from src.vision.change_detection import ChangeDetector, region_signature
+from src.vision.location_tracker import LocationTracker
+
+
+def region(value=0):
+    frame = np.zeros((20, 30, 3), dtype=np.uint8)
+    frame[5:10, 5:10] = value
+    return frame
+
+
+def test_unchanged_region_reuses_result():
+    detector = ChangeDetector()
+    action = {"type": "image_matcher"}
+    signature = region_signature(region(1))
+    assert detector.lookup(1, action, signature) == (False, None)
+    detector.store(1, action, signature, (3, 4))
+    assert detector.lookup(1, action, region_signature(region(1))) == (True, (3, 4))
+    assert detector.lookup(1, action, region_signature(region(2))) == (False, None)
+
+
+def test_different_dependency_is_a_change():
+    detector = ChangeDetector()
+    action = {"type": "image_matcher"}
+    signature = region_signature(region(1))
+    detector.store(1, action, signature, (3, 4), dependency=(100, 10))
+    assert detector.lookup(1, action, signature, dependency=(100, 10)) == (True, (3, 4))
+    assert detector.lookup(1, action, signature, dependency=(200, 10)) == (False, None)
+
+
+def test_forget_drops_only_that_window():
+    detector = ChangeDetector()
+    tracker = LocationTracker()
+    action = {"type": "image_matcher"}
+    for window in (1, 2):
+        detector.store(window, action, region_signature(region()), True)
+        tracker.store(window, action, (1, 1))
+    detector.forget(1)
+    tracker.forget(1)
+    assert [entry[0] for entry in detector.stats()] == [2]
+    assert [entry[0] for entry in tracker.stats()] == [2]
+    assert tracker.last_location(1, action) is None
+
+
+def test_template_change_invalidates_cached_result(tmp_path):
+    template_path = str(tmp_path / "template.png")
+    cv2.imwrite(template_path, np.full((4, 4, 3), 255, dtype=np.uint8))
+    action = {"type": "image_matcher", "image_path": template_path}
+    calls = []
+
+    def evaluate():
+        calls.append(1)
+        return len(calls)
+
+    screenshot = region(1)
+    assert action_loop.evaluate_if_changed(-2, action, screenshot, evaluate) == 1
+    assert action_loop.evaluate_if_changed(-2, action, screenshot, evaluate) == 1
+    cv2.imwrite(template_path, np.zeros((6, 6, 3), dtype=np.uint8))
+    stat = os.stat(template_path)
+    os.utime(template_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert action_loop.evaluate_if_changed(-2, action, screenshot, evaluate) == 2
+    action_loop.change_detector.forget(-2)
+
+
+def test_summary_counts_skipped_checks():
+    detector = ChangeDetector()
+    action = {"type": "image_matcher", "image_path": "images\\button.png"}
+    signature = region_signature(region(1))
+    assert detector.format_summary(1) == "change detection: no checks yet"
+    detector.lookup(1, action, signature)
+    detector.store(1, action, signature, None)
+    for _ in range(3):
+        detector.lookup(1, action, signature)
+    detector.lookup(2, action, signature)
+    assert detector.format_summary(1) == "change detection skipped 3/4 checks (75%): button.png 3/4"
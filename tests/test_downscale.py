@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from src.vision.frames import downscale, to_gray
+from src.vision.template_matcher import TemplateMatcher
+
+WIDTH, HEIGHT = 640, 480
+
+
+@pytest.fixture
+def noise():
+    return np.random.default_rng(3).integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("factor", [2, 4, 8])
+def test_area_averages_each_block(noise, factor):
+    frame = noise[:HEIGHT - 3, :WIDTH - 5]  # Not a multiple of the factor, the rest is trimmed
+    scaled = downscale(frame, factor)
+    height, width = frame.shape[0] // factor, frame.shape[1] // factor
+    blocks = frame[:height * factor, :width * factor].reshape(height, factor, width, factor, 3)
+    assert scaled.shape == (height, width, 3)
+    assert np.abs(scaled.astype(np.int16) - blocks.mean(axis=(1, 3))).max() <= 0.5 + 1e-9
+
+
+@pytest.mark.parametrize("factor", [2, 4, 8])
+def test_stride_keeps_the_top_left_pixel(noise, factor):
+    frame = noise[:HEIGHT - 3, :WIDTH - 5]
+    scaled = downscale(frame, factor, "stride")
+    height, width = frame.shape[0] // factor, frame.shape[1] // factor
+    assert scaled.flags.c_contiguous
+    assert np.array_equal(scaled, frame[:height * factor:factor, :width * factor:factor])
+
+
+@pytest.mark.parametrize("method", ["area", "stride"])
+def test_result_is_written_into_dst(noise, method):
+    dst = np.empty((HEIGHT // 4, WIDTH // 4, 3), dtype=np.uint8)
+    scaled = downscale(noise, 4, method, dst=dst)
+    assert scaled is dst
+    assert np.array_equal(dst, downscale(noise, 4, method))
+
+
+def test_factor_one_small_frames_and_unsupported_factors(noise):
+    assert downscale(noise, 1) is noise
+    assert downscale(noise[:3, :3], 4) is None
+    with pytest.raises(ValueError):
+        downscale(noise, 3)
+
+
+@pytest.mark.parametrize("method", ["area", "stride"])
+@pytest.mark.parametrize("scale", [2, 4])
+@pytest.mark.parametrize("threshold", [0.8, 0.99])
+def test_match_coordinates_round_trip_to_full_resolution(noise, scale, method, threshold):
+    rng = np.random.default_rng(scale)
+    screenshot = downscale(noise, scale, method)
+    if threshold < 0.99:
+        screenshot = to_gray(screenshot)
+    for _ in range(10):
+        # Positions on the block grid, where the downscaled template lines up exactly
+        x = int(rng.integers(0, (WIDTH - 64) // scale)) * scale
+        y = int(rng.integers(0, (HEIGHT - 48) // scale)) * scale
+        template = noise[y:y + 48, x:x + 64].copy()
+        matcher = TemplateMatcher(template, threshold, scale=scale, scale_method=method)
+        matches = matcher.find_matches(screenshot, limit=1)
+        assert matches and matches[0][:2] == (x, y)
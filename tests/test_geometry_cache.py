@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+
+from src import action_loop
+from src.vision import frame_source as frame_source_module
+from src.vision.frame_source import FrameSource, GeometryCache, WindowGeometry, get_frame_source, set_frame_source
+
+WINDOW = 9
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(frame_source_module.time, "monotonic", clock)
+    return clock
+
+
+class CountingProbe:
+    def __init__(self):
+        self.calls = 0
+        self.geometry = WindowGeometry(320, 200, 0, 0)
+
+    def __call__(self, window):
+        self.calls += 1
+        return self.geometry
+
+
+def test_geometry_is_reused_until_the_ttl_expires(clock):
+    probe = CountingProbe()
+    cache = GeometryCache(probe, ttl_seconds=0.5)
+    assert cache.get(WINDOW) is probe.geometry
+    clock.now += 0.4
+    cache.get(WINDOW)
+    assert probe.calls == 1
+    clock.now += 0.1
+    cache.get(WINDOW)
+    assert probe.calls == 2
+    assert cache.probes == 2
+
+
+def test_failed_probes_are_not_cached(clock):
+    probe = CountingProbe()
+    probe.geometry = None
+    cache = GeometryCache(probe, ttl_seconds=0.5)
+    assert cache.get(WINDOW) is None
+    probe.geometry = WindowGeometry(320, 200, 0, 0)
+    assert cache.get(WINDOW) is probe.geometry
+    assert probe.calls == 2
+
+
+def test_invalidate_forces_a_new_probe(clock):
+    probe = CountingProbe()
+    cache = GeometryCache(probe, ttl_seconds=0.5)
+    cache.get(WINDOW)
+    cache.get(WINDOW + 1)
+    cache.invalidate(WINDOW)
+    cache.get(WINDOW)
+    cache.get(WINDOW + 1)
+    assert probe.calls == 3
+    cache.invalidate()
+    cache.get(WINDOW + 1)
+    assert probe.calls == 4
+
+
+class ResizingSource(FrameSource):
+    """Returns frames of frame_size, which tests change behind the cached geometry's back"""
+
+    geometry_ttl = 60.0
+
+    def __init__(self, width, height):
+        self.frame_size = (width, height)
+        self.geometry_calls = 0
+
+    def is_valid(self, window):
+        return True
+
+    def geometry(self, window):
+        self.geometry_calls += 1
+        width, height = self.frame_size
+        return WindowGeometry(width, height, 0, 0)
+
+    def capture(self, window, rect=None):
+        width, height = self.frame_size
+        frame = np.zeros((height, width, 4), dtype=np.uint8)
+        return action_loop.crop_frame(frame, rect) if rect else frame
+
+
+@pytest.fixture
+def resizing_source():
+    source = ResizingSource(320, 200)
+    previous = get_frame_source()
+    set_frame_source(source)
+    yield source
+    set_frame_source(previous)
+
+
+def test_frame_size_mismatch_invalidates_the_geometry(resizing_source):
+    action_loop.capture_window_screenshot(WINDOW)
+    action_loop.capture_window_screenshot(WINDOW)
+    assert resizing_source.geometry_calls == 1
+
+    resizing_source.frame_size = (400, 300)
+    screenshot = action_loop.capture_window_screenshot(WINDOW)
+    assert screenshot.shape == (300, 400, 3)
+    assert resizing_source.cached_geometry(WINDOW).width == 400
+    assert resizing_source.geometry_calls == 2
+
+
+def test_clamped_crop_invalidates_the_geometry(resizing_source):
+    crop_area = (280, 150, 40, 50)
+    action_loop.capture_window_screenshot(WINDOW, crop_area)
+    resizing_source.cached_geometry(WINDOW)
+    assert resizing_source.geometry_calls == 1
+
+    # The window shrank, the crop is clamped to the smaller frame
+    resizing_source.frame_size = (300, 180)
+    screenshot = action_loop.capture_window_screenshot(WINDOW, crop_area)
+    assert screenshot.shape == (30, 20, 3)
+    resizing_source.cached_geometry(WINDOW)
+    assert resizing_source.geometry_calls == 2
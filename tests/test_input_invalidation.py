@@ -0,0 +1,37 @@
+import pytest
+
+from src import action_loop
+from src.vision.frame_cache import FrameCache
+
+WINDOW = -5
+CROP = (10, 10, 40, 30)
+
+
+@pytest.fixture
+def cycle(fake_win32_source):
+    """A running window loop with a full-window FrameCache, as _run_action_cycles sets it up"""
+    action_loop.running_flags[WINDOW] = True
+    action_loop.frame_caches[WINDOW] = FrameCache()
+    yield fake_win32_source
+    action_loop.frame_caches.pop(WINDOW, None)
+    action_loop.running_flags.pop(WINDOW, None)
+
+
+def check():
+    assert action_loop.capture_window_screenshot(WINDOW, CROP) is not None
+
+
+@pytest.mark.parametrize("send_input", [
+    lambda: action_loop.send_left_click(WINDOW, 20, 20),
+    lambda: action_loop.send_double_click(WINDOW, 20, 20),
+    lambda: action_loop.send_hotkey(WINDOW, "a"),
+    lambda: action_loop.execute_actions([{"type": "delay", "ms": 0}], WINDOW),
+], ids=["click", "double_click", "hotkey", "delay"])
+def test_input_makes_the_next_check_capture_again(cycle, send_input):
+    check()
+    check()
+    assert cycle.captures == 1  # The second check reused the cycle's frame
+
+    send_input()
+    check()
+    assert cycle.captures == 2
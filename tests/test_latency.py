@@ -0,0 +1,40 @@
+import threading
+
+from src.vision.latency import LatencyHistogram, LatencyRecorder
+
+
+def test_percentiles_in_milliseconds():
+    histogram = LatencyHistogram(size=100)
+    for value in range(1, 101):
+        histogram.add(value / 1000.0)
+    p50, p95, p99 = histogram.percentiles()
+    assert 50 <= p50 <= 51
+    assert 95 <= p95 <= 96
+    assert histogram.percentiles() is not None
+    assert LatencyHistogram().percentiles() is None
+
+
+def test_window_keeps_only_recent_samples():
+    histogram = LatencyHistogram(size=10)
+    for _ in range(10):
+        histogram.add(1.0)
+    for _ in range(10):
+        histogram.add(0.001)
+    assert histogram.percentiles() == [1.0, 1.0, 1.0]
+    assert histogram.count == 20
+
+
+def test_concurrent_recording_loses_no_samples():
+    recorder = LatencyRecorder()
+    threads_count, samples = 4, 20000
+
+    def record():
+        for _ in range(samples):
+            recorder.record(1, "render", 0.001)
+
+    threads = [threading.Thread(target=record) for _ in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert recorder.summary(1)[1]["render"]["count"] == threads_count * samples
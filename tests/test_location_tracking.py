@@ -0,0 +1,42 @@
+import cv2
+import numpy as np
+import pytest
+
+from src import action_loop
+
+WINDOW = -4
+
+
+@pytest.fixture
+def scene(tmp_path):
+    rng = np.random.default_rng(3)
+    screenshot = rng.integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    template = screenshot[40:72, 50:98].copy()
+    template_path = str(tmp_path / "template.png")
+    cv2.imwrite(template_path, template)
+    yield screenshot, template, template_path
+    action_loop.location_tracker.forget(WINDOW)
+
+
+def test_local_match_is_taken_while_it_scores_as_before(scene):
+    screenshot, _, template_path = scene
+    action = {"type": "image_matcher"}
+    for _ in range(3):
+        assert action_loop.match_image_tracked(WINDOW, action, screenshot, template_path) == (50, 40)
+    assert action_loop.location_tracker.counters(WINDOW, action) == (2, 0)
+
+
+def test_worse_local_match_searches_everywhere(scene):
+    screenshot, template, template_path = scene
+    action = {"type": "image_matcher"}
+    assert action_loop.match_image_tracked(WINDOW, action, screenshot, template_path) == (50, 40)
+
+    # The tracked spot still passes the threshold, but a better copy appeared elsewhere
+    changed = screenshot.copy()
+    noise = np.random.default_rng(4).integers(-10, 11, template.shape)
+    changed[40:72, 50:98] = np.clip(template.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+    changed[150:182, 200:248] = template
+    assert action_loop.find_template_match(changed, template_path, near=(50, 40)) is not None
+
+    assert action_loop.match_image_tracked(WINDOW, action, changed, template_path) == (200, 150)
+    assert action_loop.location_tracker.counters(WINDOW, action) == (0, 1)
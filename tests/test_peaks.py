@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from src.vision.peaks import find_peaks, find_peaks_iterative
+
+OVERLAP_X, OVERLAP_Y = 5, 4
+
+
+def reference_peaks(result, threshold, overlap_x, overlap_y, limit=None):
+    """The matcher's original ranking: stable sort by confidence, then pairwise greedy suppression"""
+    locations = np.where(result >= threshold)
+    matches = []
+    for pt in zip(*locations[::-1]):  # Switch x and y coordinates
+        matches.append((pt[0], pt[1], result[pt[1], pt[0]]))
+    matches.sort(key=lambda x: x[2], reverse=True)
+
+    filtered = []
+    for x, y, conf in matches:
+        overlap = False
+        for existing_x, existing_y, _ in filtered:
+            if abs(x - existing_x) < overlap_x and abs(y - existing_y) < overlap_y:
+                overlap = True
+                break
+        if not overlap:
+            filtered.append((x, y, conf))
+            if limit is not None and len(filtered) >= limit:
+                break
+    return filtered
+
+
+def as_tuples(peaks):
+    return [(int(x), int(y), float(value)) for x, y, value in peaks]
+
+
+def quantized_map(seed, shape=(60, 80), levels=8):
+    """Scores on a few levels, so most positions tie with many others"""
+    rng = np.random.default_rng(seed)
+    return (rng.integers(0, levels, shape) / levels).astype(np.float32)
+
+
+def peaky_map(seed, shape=(60, 80), peaks=25):
+    """Low noise with overlapping plateaus of equal peaks"""
+    rng = np.random.default_rng(seed)
+    result = (rng.random(shape) * 0.5).astype(np.float32)
+    for _ in range(peaks):
+        y, x = int(rng.integers(0, shape[0] - 3)), int(rng.integers(0, shape[1] - 3))
+        result[y:y + 3, x:x + 3] = rng.choice([0.9, 0.95, 1.0])
+    return result
+
+
+MAPS = [quantized_map(seed) for seed in range(3)] + [peaky_map(seed) for seed in range(3)]
+
+
+@pytest.mark.parametrize("result", MAPS)
+@pytest.mark.parametrize("limit", [None, 1, 2, 5, 40])
+@pytest.mark.parametrize("chunk_size", [1, 3, 16, 512])
+def test_find_peaks_matches_the_reference(result, limit, chunk_size):
+    threshold = 0.6
+    expected = reference_peaks(result, threshold, OVERLAP_X, OVERLAP_Y, limit)
+    peaks = find_peaks(result, threshold, OVERLAP_X, OVERLAP_Y, limit, chunk_size=chunk_size)
+    assert as_tuples(peaks) == as_tuples(expected)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7])
+def test_ties_across_chunk_boundaries_keep_row_major_order(chunk_size):
+    result = np.zeros((20, 30), dtype=np.float32)
+    # Equal scores far apart, and a tie chain overlapping across rows
+    for x, y in [(25, 2), (3, 2), (14, 9), (2, 15), (27, 15), (15, 10), (16, 11)]:
+        result[y, x] = 0.9
+    result[17, 9] = 0.95
+    expected = reference_peaks(result, 0.5, OVERLAP_X, OVERLAP_Y)
+    assert as_tuples(expected)[:3] == [(9, 17, pytest.approx(0.95)), (3, 2, pytest.approx(0.9)),
+                                       (25, 2, pytest.approx(0.9))]
+    peaks = find_peaks(result, 0.5, OVERLAP_X, OVERLAP_Y, chunk_size=chunk_size)
+    assert as_tuples(peaks) == as_tuples(expected)
+
+
+def test_empty_and_below_threshold_maps():
+    empty = np.zeros((0, 0), dtype=np.float32)
+    assert find_peaks(empty, 0.5, OVERLAP_X, OVERLAP_Y) == []
+    low = np.full((10, 10), 0.4, dtype=np.float32)
+    assert find_peaks(low, 0.5, OVERLAP_X, OVERLAP_Y) == []
+    assert find_peaks(low, 0.5, OVERLAP_X, OVERLAP_Y, limit=1) == []
+    assert find_peaks_iterative(low.copy(), 0.5, OVERLAP_X, OVERLAP_Y, 2) == []
+
+
+@pytest.mark.parametrize("result", MAPS)
+@pytest.mark.parametrize("limit", [1, 2])
+def test_iterative_matches_find_peaks(result, limit):
+    expected = find_peaks(result, 0.6, OVERLAP_X, OVERLAP_Y, limit)
+    # The iterative search overwrites the map
+    peaks = find_peaks_iterative(result.copy(), 0.6, OVERLAP_X, OVERLAP_Y, limit)
+    assert as_tuples(peaks) == as_tuples(expected)
+
+
+@pytest.mark.parametrize("limit", [1, 2])
+def test_iterative_ties_resolve_to_the_first_maximum_in_row_major_order(limit):
+    result = np.zeros((20, 30), dtype=np.float32)
+    result[12, 1] = result[3, 20] = result[3, 22] = result[15, 25] = 1.0
+    peaks = find_peaks_iterative(result.copy(), 0.5, OVERLAP_X, OVERLAP_Y, limit)
+    # (22, 3) overlaps (20, 3); the next tie in row-major order is (1, 12)
+    assert as_tuples(peaks) == [(20, 3, 1.0), (1, 12, 1.0)][:limit]
+    assert as_tuples(peaks) == as_tuples(find_peaks(result, 0.5, OVERLAP_X, OVERLAP_Y, limit))
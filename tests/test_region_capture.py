@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from conftest import FakeWin32Source, window_pattern
+from src.vision.frame_source import get_frame_source, set_frame_source
+from src.vision.frames import crop_frame, to_bgr
+
+WIDTH, HEIGHT = 320, 200
+
+
+@pytest.fixture
+def backend(installed_backend):
+    installed_backend.frame = window_pattern(WIDTH, HEIGHT)
+    return installed_backend
+
+
+@pytest.fixture
+def source(backend):
+    return FakeWin32Source(WIDTH, HEIGHT)
+
+
+def test_cropped_capture_blits_only_the_rectangle(source, backend):
+    frame = source.capture(1, (40, 30, 50, 20))
+    assert frame.shape == (20, 50, 4)
+    assert np.array_equal(frame, window_pattern(WIDTH, HEIGHT)[30:50, 40:90])
+    assert backend.blits == 1
+    assert backend.renders == 0
+
+
+def test_cropped_capture_falls_back_to_full_render(source, backend):
+    backend.blit_ok = False
+    frame = source.capture(1, (40, 30, 50, 20))
+    assert np.array_equal(frame, window_pattern(WIDTH, HEIGHT)[30:50, 40:90])
+    assert backend.renders > 0
+
+
+def test_black_region_falls_back_to_full_render(source, backend):
+    backend.frame = window_pattern(WIDTH, HEIGHT)
+    backend.frame[30:50, 40:90] = 0
+    backend.frame[0, 0] = 1  # The full render is not black, only the region
+    frame = source.capture(1, (40, 30, 50, 20))
+    assert backend.renders > 0
+    assert not frame.any()
+
+
+def test_crop_is_clamped_to_the_window(source):
+    frame = source.capture(1, (WIDTH - 10, HEIGHT - 10, 50, 50))
+    assert frame.shape == (10, 10, 4)
+
+
+def test_screenshot_converts_only_the_crop(source):
+    from src import action_loop
+
+    previous = get_frame_source()
+    set_frame_source(source)
+    try:
+        screenshot = action_loop.capture_window_screenshot(1, (40, 30, 50, 20))
+        gray = action_loop.capture_window_screenshot(1, (40, 30, 50, 20), gray=True)
+    finally:
+        set_frame_source(previous)
+    expected = to_bgr(np.ascontiguousarray(crop_frame(window_pattern(WIDTH, HEIGHT), (40, 30, 50, 20))))
+    assert screenshot.shape == (20, 50, 3)
+    assert np.array_equal(screenshot, expected)
+    assert gray.shape == (20, 50)
+
+
+def test_color_matchers_share_the_cycle_planes(source):
+    from src import action_loop
+    from src.vision.frame_cache import FrameCache
+
+    previous = get_frame_source()
+    set_frame_source(source)
+    action_loop.frame_caches[1] = cache = FrameCache(region=(20, 10, 200, 150))
+    try:
+        first, first_planes = action_loop.capture_window_screenshot(1, (40, 30, 50, 20), split=True)
+        shared = cache.get_planes()
+        second, second_planes = action_loop.capture_window_screenshot(1, (100, 60, 30, 40), split=True)
+        assert cache.get_planes() is shared
+        gray, gray_planes = action_loop.capture_window_screenshot(1, (40, 30, 50, 20), gray=True, split=True)
+    finally:
+        action_loop.frame_caches.pop(1, None)
+        set_frame_source(previous)
+    assert source.captures == 1
+    assert gray_planes is None
+    for screenshot, planes in ((first, first_planes), (second, second_planes)):
+        assert all(np.shares_memory(plane, whole) for plane, whole in zip(planes, shared))
+        assert all(np.array_equal(plane, channel) for plane, channel in zip(planes, np.moveaxis(screenshot, 2, 0)))
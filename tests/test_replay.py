@@ -0,0 +1,38 @@
+import threading
+
+import numpy as np
+import pytest
+
+from src import action_loop
+from src.vision.replay_source import ReplayFrameSource
+
+FRAMES = 5
+
+
+@pytest.fixture
+def replay(tmp_path):
+    path = tmp_path / "frames.npy"
+    frames = np.zeros((FRAMES, 40, 60, 3), dtype=np.uint8)
+    for index in range(FRAMES):
+        frames[index, :, :, 0] = index * 40
+    np.save(path, frames)
+    return ReplayFrameSource(str(path))
+
+
+def run_with_timeout(actions, source, timeout=10):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(cycles=action_loop.run_replay(actions, source)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "replay did not finish"
+    return result["cycles"]
+
+
+def test_replay_with_empty_action_list_finishes(replay):
+    assert run_with_timeout([], replay) == FRAMES
+    assert replay.exhausted
+
+
+def test_replay_runs_one_cycle_per_frame(replay):
+    actions = [{"type": "delay", "ms": 1000}]
+    assert run_with_timeout(actions, replay) == FRAMES
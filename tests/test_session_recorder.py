@@ -0,0 +1,130 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from src import action_loop
+from src.vision.replay_source import ReplayFrameSource
+from src.vision.session_recorder import SessionReader, SessionRecorder
+
+FRAMES = 4
+
+
+def frame_bgr(index):
+    frame = np.zeros((40, 60, 3), dtype=np.uint8)
+    frame[:, :, 1] = 100
+    frame[index * 5:index * 5 + 5, 10:20] = 255
+    return frame
+
+
+def test_bgr_and_bgrx_frames_share_one_layout(tmp_path):
+    path = str(tmp_path / "session.hcrec")
+    recorder = SessionRecorder(path, keyframe_interval=100)
+    recorder.start()
+    for index in range(FRAMES):
+        frame = frame_bgr(index)
+        if index % 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+        assert recorder.record_frame(7, frame)
+    recorder.stop()
+
+    reader = SessionReader(path)
+    try:
+        assert reader.frame_count(7) == FRAMES
+        # Switching capture paths must not force a keyframe per frame
+        assert [entry.keyframe for entry in reader._frames[7]] == [True] + [False] * (FRAMES - 1)
+        for index in range(FRAMES):
+            np.testing.assert_array_equal(reader.frame(7, index), frame_bgr(index))
+    finally:
+        reader.close()
+
+
+def test_frames_are_dropped_but_events_never_are(tmp_path):
+    recorder = SessionRecorder(str(tmp_path / "session.hcrec"), max_queue=1)
+    release = threading.Event()
+    write_record = recorder._write_record
+
+    def slow_write_record(*args):
+        release.wait(10)
+        write_record(*args)
+
+    recorder._write_record = slow_write_record
+    recorder.start()
+    try:
+        # The writer takes the first event and stalls on it, the second fills the queue
+        assert recorder.record_event(1, "left_click", x=1, y=2)
+        while not recorder._queue.empty():
+            time.sleep(0.001)
+        assert recorder.record_event(1, "left_click", x=3, y=4)
+        started = time.perf_counter()
+        assert recorder.record_frame(1, np.zeros((8, 8, 3), dtype=np.uint8)) is False
+        assert recorder.record_event(1, "left_click", x=5, y=6)
+        assert time.perf_counter() - started < 1
+        assert recorder.frames_dropped == 1
+    finally:
+        release.set()
+        recorder.stop()
+    assert recorder.events_written == 3
+    assert recorder.frames_written == 0
+
+
+class CountingReplaySource(ReplayFrameSource):
+    def __init__(self, path):
+        super().__init__(path)
+        self.captures = 0
+
+    def capture(self, window, rect=None):
+        self.captures += 1
+        return super().capture(window, rect)
+
+
+@pytest.fixture
+def replay(tmp_path):
+    path = tmp_path / "frames.npy"
+    np.save(path, np.stack([frame_bgr(index) for index in range(FRAMES)]))
+    template_path = str(tmp_path / "template.png")
+    cv2.imwrite(template_path, frame_bgr(0)[0:10, 5:25])
+    return CountingReplaySource(str(path)), template_path
+
+
+def test_recording_shares_the_cycle_capture(tmp_path, replay):
+    source, template_path = replay
+    actions = [{"type": "image_matcher", "image_path": template_path, "use_full_screen": True}]
+    path = str(tmp_path / "session.hcrec")
+    action_loop.start_session_recording(path)
+    try:
+        assert action_loop.run_replay(actions, source) == FRAMES
+    finally:
+        action_loop.stop_session_recording()
+
+    # One full-window capture per cycle, used by both the recording and the matcher
+    assert source.captures == FRAMES
+    reader = SessionReader(path)
+    try:
+        assert reader.frame_count(action_loop.REPLAY_WINDOW) == FRAMES
+        np.testing.assert_array_equal(reader.frame(action_loop.REPLAY_WINDOW, 1), frame_bgr(1))
+    finally:
+        reader.close()
+
+
+def test_recording_replacing_the_region_plan_is_logged(tmp_path, replay, capsys):
+    source, template_path = replay
+    crop = {"type": "image_matcher", "image_path": template_path, "crop_y": 0, "crop_width": 25, "crop_height": 10}
+    actions = [dict(crop, crop_x=0), dict(crop, crop_x=20)]
+    path = str(tmp_path / "session.hcrec")
+    action_loop.start_session_recording(path)
+    try:
+        assert action_loop.run_replay(actions, source) == FRAMES
+    finally:
+        action_loop.stop_session_recording()
+
+    notices = [line for line in capsys.readouterr().out.splitlines() if "instead of the planned" in line]
+    assert len(notices) == 1 and "45x10 region of 2 matchers" in notices[0]
+    assert source.captures == FRAMES
+    reader = SessionReader(path)
+    try:
+        assert reader.frame(action_loop.REPLAY_WINDOW, 1).shape == (40, 60, 3)
+    finally:
+        reader.close()
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from src.vision.shm_ring import FrameRing
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRing.create(64, 48, channels=4, slots=3)
+    yield ring
+    ring.close()
+    ring.unlink()
+
+
+def frame(value, width=64, height=48):
+    return np.full((height, width, 4), value, dtype=np.uint8)
+
+
+def test_reader_attaches_by_name_and_sees_latest_frame(ring):
+    reader = FrameRing.attach(ring.name)
+    try:
+        assert reader.read_latest() is None
+        ring.write(frame(1), window=7)
+        ring.write(frame(2, 32, 16), window=7)
+        latest = reader.read_latest()
+        assert latest.sequence == 2
+        assert latest.window == 7
+        assert latest.image.shape == (16, 32, 4)
+        assert np.array_equal(latest.copy(), frame(2, 32, 16))
+    finally:
+        reader.close()
+
+
+def test_overwritten_frames_are_gone(ring):
+    for value in range(1, 5):
+        ring.write(frame(value))
+    assert ring.read(1) is None  # Slot reused by frame 4
+    assert ring.read(2).image[0, 0, 0] == 2
+    assert ring.read(5) is None  # Not written yet
+
+
+def test_slot_reuse_invalidates_a_taken_view(ring):
+    ring.write(frame(1))
+    view = ring.read(1)
+    assert view.is_valid()
+    for value in range(2, 5):
+        ring.write(frame(value))
+    assert not view.is_valid()
+    assert view.copy() is None
+
+
+def test_slot_being_written_is_not_readable(ring):
+    ring.write(frame(1))
+    # Simulate a writer caught between the two version bumps
+    ring._meta[0][0] += 1
+    assert ring.read(1) is None
+    ring._meta[0][0] += 1
+    assert ring.read(1) is not None
+
+
+def test_frame_larger_than_slot_is_rejected(ring):
+    with pytest.raises(ValueError):
+        ring.write(frame(1, 65, 48))
+    with pytest.raises(ValueError):
+        ring.write(np.zeros((48, 64, 3), dtype=np.uint8))
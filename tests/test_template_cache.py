@@ -0,0 +1,131 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from src.vision.template_cache import TemplateCache
+
+
+def write_image(path, value, width=20, height=10):
+    image = np.full((height, width, 3), value, dtype=np.uint8)
+    assert cv2.imwrite(str(path), image)
+    return image
+
+
+def set_mtime(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_template_is_decoded_once(tmp_path):
+    path = tmp_path / "a.png"
+    expected = write_image(path, 10)
+    cache = TemplateCache()
+    first = cache.get(str(path))
+    assert np.array_equal(first, expected)
+    assert cache.get(str(path)) is first
+    assert (cache.loads, cache.hits) == (1, 1)
+
+
+def test_cached_arrays_are_read_only(tmp_path):
+    path = tmp_path / "a.png"
+    write_image(path, 10)
+    image = TemplateCache().get(str(path))
+    with pytest.raises(ValueError):
+        image[0, 0] = 0
+
+
+def test_changed_mtime_reloads(tmp_path):
+    path = tmp_path / "a.png"
+    write_image(path, 10)
+    set_mtime(path, 1_000_000_000)
+    cache = TemplateCache()
+    cache.get(str(path))
+    size = path.stat().st_size
+    # Same size, only the modification time tells the files apart
+    write_image(path, 20)
+    assert path.stat().st_size == size
+    set_mtime(path, 2_000_000_000)
+    assert cache.get(str(path))[0, 0, 0] == 20
+    assert cache.loads == 2
+
+
+def test_changed_size_reloads(tmp_path):
+    path = tmp_path / "a.png"
+    write_image(path, 10)
+    set_mtime(path, 1_000_000_000)
+    cache = TemplateCache()
+    cache.get(str(path))
+    size = path.stat().st_size
+    write_image(path, 10, width=30)
+    assert path.stat().st_size != size
+    set_mtime(path, 1_000_000_000)
+    assert cache.get(str(path)).shape == (10, 30, 3)
+    assert cache.loads == 2
+
+
+def test_least_recently_used_templates_are_evicted(tmp_path):
+    paths = [str(tmp_path / f"{name}.png") for name in "abc"]
+    for value, path in enumerate(paths):
+        write_image(path, value)
+    # Room for two 20x10 BGR templates
+    cache = TemplateCache(max_bytes=2 * 20 * 10 * 3)
+    cache.get(paths[0])
+    cache.get(paths[1])
+    cache.get(paths[0])  # b is now the least recently used
+    cache.get(paths[2])
+    assert cache.loads == 3
+    cache.get(paths[0])
+    cache.get(paths[2])
+    assert cache.loads == 3
+    cache.get(paths[1])
+    assert cache.loads == 4
+
+
+def test_template_larger_than_the_cap_is_still_served(tmp_path):
+    path = str(tmp_path / "a.png")
+    write_image(path, 10)
+    cache = TemplateCache(max_bytes=1)
+    image = cache.get(path)
+    assert image is not None
+    assert cache.get(path) is image
+
+
+def test_missing_template_is_reported_once(tmp_path, capsys):
+    path = tmp_path / "missing.png"
+    cache = TemplateCache()
+    assert cache.get(str(path)) is None
+    assert cache.get(str(path)) is None
+    assert cache.get(str(path)) is None
+    assert capsys.readouterr().out.count("not found") == 1
+
+    # Once the file appears it is loaded
+    write_image(path, 10)
+    assert cache.get(str(path)) is not None
+    assert capsys.readouterr().out == ""
+
+
+def test_preload_covers_nested_branches(tmp_path, capsys):
+    for name in "abc":
+        write_image(tmp_path / f"{name}.png", 10)
+    actions = [
+        {"type": "image_matcher", "image_path": str(tmp_path / "a.png"), "true_actions": [
+            {"type": "image_matcher", "image_path": str(tmp_path / "b.png"), "false_actions": [
+                {"type": "image_matcher", "image_path": str(tmp_path / "missing.png")},
+            ]},
+        ], "false_actions": [
+            {"type": "image_matcher", "image_path": str(tmp_path / "c.png")},
+            {"type": "image_matcher", "image_path": str(tmp_path / "a.png")},
+        ]},
+    ]
+    cache = TemplateCache()
+    assert cache.preload(actions) == 1
+    assert cache.loads == 3
+    assert "missing.png" in capsys.readouterr().out
+
+    # The matchers find everything decoded, the missing file stays quiet
+    for name in "abc":
+        assert cache.get(str(tmp_path / f"{name}.png")) is not None
+    assert cache.get(str(tmp_path / "missing.png")) is None
+    assert cache.loads == 3
+    assert capsys.readouterr().out == ""
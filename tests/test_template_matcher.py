@@ -0,0 +1,104 @@
+import cv2
+import numpy as np
+import pytest
+
+from src.vision import template_matcher
+from src.vision.template_matcher import TemplateMatcher
+
+WIDTH, HEIGHT = 640, 480
+TEMPLATE_W, TEMPLATE_H = 48, 32
+
+
+@pytest.fixture
+def noise():
+    """Random color per pixel, the fine detail a pyramid level averages away"""
+    return np.random.default_rng(1).integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("threshold", [0.8, 0.99])
+def test_pyramid_recall_on_noise(noise, threshold):
+    rng = np.random.default_rng(2)
+    for _ in range(40):
+        x, y = int(rng.integers(0, WIDTH - TEMPLATE_W)), int(rng.integers(0, HEIGHT - TEMPLATE_H))
+        template = noise[y:y + TEMPLATE_H, x:x + TEMPLATE_W].copy()
+        matcher = TemplateMatcher(template, threshold, pyramid=True)
+        assert matcher.pyramid_factor
+        screenshot = noise if threshold >= 0.99 else cv2.cvtColor(noise, cv2.COLOR_BGR2GRAY)
+        matches = matcher.find_matches(screenshot, limit=1)
+        assert matches and matches[0][:2] == (x, y)
+
+
+def test_pyramid_finds_the_second_copy(noise):
+    screenshot = noise.copy()
+    template = screenshot[73:73 + TEMPLATE_H, 135:135 + TEMPLATE_W].copy()
+    screenshot[430:430 + TEMPLATE_H, 584:584 + TEMPLATE_W] = template
+    matcher = TemplateMatcher(template, 0.99, pyramid=True)
+    matches = matcher.find_matches(screenshot, limit=2)
+    assert sorted(match[:2] for match in matches) == [(135, 73), (584, 430)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_prefilter_keeps_matches_and_scores(seed):
+    rng = np.random.default_rng(seed)
+    template = rng.integers(0, 256, (24, 30, 3), dtype=np.uint8)
+    screenshot = rng.integers(0, 256, (200, 260, 3), dtype=np.uint8)
+    # Noisy copies score nearly the same, within rounding of each other
+    for _ in range(5):
+        y, x = int(rng.integers(0, 170)), int(rng.integers(0, 225))
+        noise = rng.integers(-3, 4, template.shape)
+        screenshot[y:y + 24, x:x + 30] = np.clip(template.astype(np.int16) + noise, 0, 255)
+    expected = TemplateMatcher(template, 0.99, prefilter=False).find_matches(screenshot, limit=4)
+    matches = TemplateMatcher(template, 0.99).find_matches(screenshot, limit=4)
+    # Candidates are scored in float64 and OpenCV's map rounds in float32, so copies
+    # scoring within 1e-6 of each other may swap places
+    scores = {match[:2]: float(match[2]) for match in matches}
+    assert scores == pytest.approx({match[:2]: float(match[2]) for match in expected}, abs=1e-5)
+    assert [score for score in scores.values()] == sorted(scores.values(), reverse=True)
+
+
+def test_exact_nearly_flat_template_needs_its_detail():
+    screenshot = np.random.default_rng(0).integers(0, 256, (200, 260, 3), dtype=np.uint8)
+    screenshot[50:150, 60:200] = (30, 40, 200)
+    template = np.zeros((20, 20, 3), dtype=np.uint8)
+    template[:] = (30, 40, 200)
+    template[5, 5] = (33, 40, 200)
+    matcher = TemplateMatcher(template, 0.999)
+    # Every pixel of the fill is within tolerance, but the fill has none of the template's detail
+    assert matcher.find_matches(screenshot) == []
+
+    screenshot[100:120, 120:140] = template
+    assert [match[:2] for match in matcher.find_matches(screenshot)] == [(120, 100)]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_prefilter_candidates_score_like_the_full_correlation(seed, monkeypatch):
+    rng = np.random.default_rng(seed)
+    template = rng.integers(0, 256, (24, 30, 3), dtype=np.uint8)
+    screenshot = rng.integers(0, 256, (200, 260, 3), dtype=np.uint8)
+    screenshot[40:64, 50:80] = template
+    screenshot[120:144, 200:230] = np.clip(template.astype(np.int16) + rng.integers(-3, 4, template.shape), 0, 255)
+    matcher = TemplateMatcher(template, 0.99)
+    candidates = matcher.find_matches(screenshot)
+    # Too many candidates: the other channels are correlated everywhere
+    monkeypatch.setattr(template_matcher, "PREFILTER_MAX_CANDIDATE_PIXELS", 0)
+    correlated = matcher.find_matches(screenshot)
+    assert [match[:2] for match in candidates] == [(50, 40), (200, 120)]
+    assert [match[:2] for match in correlated] == [match[:2] for match in candidates]
+    assert [match[2] for match in candidates] == pytest.approx([match[2] for match in correlated], abs=1e-5)
+
+
+@pytest.mark.parametrize("prefilter", [True, False])
+def test_given_planes_are_used_as_the_screenshot(noise, prefilter):
+    template = noise[100:132, 200:248].copy()
+    matcher = TemplateMatcher(template, 0.99, prefilter=prefilter)
+    # Views into planes of a larger frame, as the action loop passes them
+    padded = np.zeros((HEIGHT + 20, WIDTH + 20, 3), dtype=np.uint8)
+    padded[10:-10, 10:-10] = noise
+    planes = [plane[10:-10, 10:-10] for plane in cv2.split(padded)]
+    expected = matcher.find_matches(noise, limit=1)
+    assert matcher.find_matches(noise, limit=1, planes=planes) == expected
+    near = matcher.find_near(noise, (200, 100), 16, limit=1, planes=planes)
+    # A smaller correlation window rounds differently
+    assert near[0][:2] == expected[0][:2] and near[0][2] == pytest.approx(expected[0][2], abs=1e-5)
+    # The planes are what gets searched
+    assert matcher.find_matches(noise, limit=1, planes=[np.zeros_like(plane) for plane in planes]) == []
@@ -0,0 +1,47 @@
+"""Runs against a real X server (e.g. Xvfb) and is skipped without one."""
+
+import os
+
+import numpy as np
+import pytest
+
+pytestmark = pytest.mark.skipif(not os.environ.get("DISPLAY"), reason="needs an X server ($DISPLAY)")
+
+
+@pytest.fixture
+def source():
+    from src.vision.x11_source import X11ShmFrameSource
+
+    source = X11ShmFrameSource()
+    yield source
+    source.release_all()
+
+
+@pytest.fixture
+def root_window(source):
+    from src.vision.x11_source import _load_libs
+
+    x11, _, _ = _load_libs()
+    return x11.XDefaultRootWindow(source._display())
+
+
+def test_root_window_geometry_and_capture(source, root_window):
+    geometry = source.geometry(root_window)
+    frame = source.capture(root_window)
+    assert frame.shape == (geometry.height, geometry.width, 4)
+    assert frame.dtype == np.uint8
+
+
+def test_captures_do_not_share_the_segment(source, root_window):
+    first = source.capture(root_window, (0, 0, 32, 32))
+    second = source.capture(root_window, (0, 0, 32, 32))
+    assert first.shape == (32, 32, 4)
+    assert not np.shares_memory(first, second)
+    # Still valid once the shared images are gone
+    source.release_all()
+    assert first.sum() >= 0
+
+
+def test_invalid_window(source):
+    assert not source.is_valid(0x7FFFFFF)
+    assert source.capture(0x7FFFFFF) is None